@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AiTutorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_tutor'
+    
+    def ready(self):
+        # Connect the lesson index signal handlers
+        from .retrieval_service import connect_lesson_signals
+        connect_lesson_signals()
+        
+        # A per-process cache silently turns the history cache off
+        from .session_cache import warn_if_bypassed
+        warn_if_bypassed()
@@ -0,0 +1,375 @@
+"""
+Deferred batch generation for non-interactive AI Tutor work.
+Practice problems and concept explanations are queued as GenerationJob rows,
+submitted in groups to a batch-style completion endpoint, polled for results and
+written back to their destination.
+"""
+
+import io
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import GenerationJob, SimpleConcept
+from .openai_service import OpenAITutor
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# In-memory batches for the local backend (mirrors the MockCollection fallback)
+_local_batches = {}
+
+# batch_id of jobs claimed for a batch that is still being uploaded
+CLAIM_PREFIX = 'claim:'
+
+
+class LocalBatchBackend:
+    """
+    Batch backend that answers requests with the tutor's built-in response engine.
+    Used in development, in tests and whenever the OpenAI Batch API is unavailable.
+    """
+
+    name = 'local'
+
+    def __init__(self, tutor=None):
+        self.tutor = tutor or OpenAITutor()
+
+    def submit(self, requests):
+        """
+        Submit a group of requests.
+
+        Args:
+            requests (list): Dicts with 'custom_id', 'message' and 'topic' keys
+
+        Returns:
+            str: Identifier of the created batch
+        """
+        batch_id = f"local_batch_{uuid.uuid4().hex}"
+        _local_batches[batch_id] = list(requests)
+        return batch_id
+
+    def retrieve(self, batch_id):
+        """
+        Fetch the results of a batch.
+
+        Returns:
+            tuple: (status, results) where status is 'in_progress', 'completed' or 'failed'
+                and results maps custom_id to {'content': ...} or {'error': ...}
+        """
+        requests = _local_batches.pop(batch_id, None)
+        if requests is None:
+            return 'failed', {}
+
+        results = {}
+        for request in requests:
+            if request.get('kind') == 'practice_problem':
+                # The fallback engine answers in prose, so structured problems come from templates
+                from .inventory_service import sample_problem_payload
+                content = sample_problem_payload(
+                    request.get('topic') or 'General', request.get('difficulty'), seed=request['custom_id']
+                )
+            else:
+                content = self.tutor._generate_intelligent_response(
+                    request['message'], request.get('topic'), simulate_delay=False
+                )
+            results[request['custom_id']] = {'content': content}
+        return 'completed', results
+
+
+class OpenAIBatchBackend:
+    """Batch backend built on the OpenAI Batch API (/v1/batches)."""
+
+    name = 'openai'
+
+    PENDING_STATUSES = ('validating', 'in_progress', 'finalizing', 'cancelling')
+
+    def __init__(self, tutor):
+        self.tutor = tutor
+        self.client = tutor.client
+
+    def submit(self, requests):
+        """Upload the requests as a JSONL file and create a batch for them."""
+        lines = []
+        for request in requests:
+            lines.append(json.dumps({
+                'custom_id': request['custom_id'],
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': self.tutor.model,
+                    'messages': self.tutor.build_messages(request['message'], request.get('topic')),
+                    **OpenAITutor.COMPLETION_PARAMS,
+                },
+            }))
+
+        input_file = self.client.files.create(
+            file=io.BytesIO("\n".join(lines).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} with {len(requests)} requests")
+        return batch.id
+
+    def retrieve(self, batch_id):
+        """Poll a batch and parse its output file once it has finished."""
+        batch = self.client.batches.retrieve(batch_id)
+
+        if batch.status in self.PENDING_STATUSES:
+            return 'in_progress', {}
+        if batch.status != 'completed':
+            logger.warning(f"OpenAI batch {batch_id} ended with status {batch.status}")
+            return 'failed', {}
+
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                if record.get('error') or response.get('status_code') != 200:
+                    results[record['custom_id']] = {'error': json.dumps(record.get('error') or response)}
+                else:
+                    results[record['custom_id']] = {
+                        'content': response['body']['choices'][0]['message']['content']
+                    }
+        return 'completed', results
+
+
+def get_batch_backend(tutor=None):
+    """
+    Pick the batch backend for the current configuration.
+
+    Returns the OpenAI backend when a live client with Batch API support is
+    configured, otherwise the local backend.
+    """
+    tutor = tutor or OpenAITutor()
+    if tutor.client is not None and hasattr(tutor.client, 'batches'):
+        return OpenAIBatchBackend(tutor)
+    return LocalBatchBackend(tutor)
+
+
+class BatchGenerationQueue:
+    """Queue of deferred generation jobs, submitted and collected in batches."""
+
+    def __init__(self, backend=None, batch_size=None, max_attempts=None):
+        self.backend = backend or get_batch_backend()
+        self.batch_size = batch_size or getattr(settings, 'AI_TUTOR_BATCH_SIZE', 50)
+        self.max_attempts = max_attempts or getattr(settings, 'AI_TUTOR_BATCH_MAX_ATTEMPTS', 3)
+
+    @staticmethod
+    def enqueue(kind, subject, prompt, topic='', metadata=None):
+        """
+        Queue a generation job, reusing an unfinished job for the same subject.
+
+        Args:
+            kind (str): One of GenerationJob.KIND_CHOICES
+            subject (str): Concept, topic or step title being generated
+            prompt (str): The message sent to the model
+            topic (str, optional): Topic used for the system prompt
+            metadata (dict, optional): Extra data needed to write the result back
+
+        Returns:
+            GenerationJob: The queued (or already queued) job
+        """
+        existing = GenerationJob.objects.filter(
+            kind=kind,
+            subject=subject,
+            status__in=['pending', 'submitted']
+        ).first()
+        if existing:
+            return existing
+
+        return GenerationJob.objects.create(
+            kind=kind,
+            subject=subject,
+            prompt=prompt,
+            topic=topic or '',
+            metadata=metadata or {}
+        )
+
+    def submit_pending(self):
+        """
+        Submit pending jobs in groups of at most batch_size.
+
+        Returns:
+            int: Number of jobs submitted
+        """
+        submitted = 0
+        while True:
+            # Claim a group under the row locks, and upload it once they are released:
+            # the backend call is network I/O and must not hold the locks
+            claim = f"{CLAIM_PREFIX}{uuid.uuid4().hex}"
+            with transaction.atomic():
+                jobs = list(
+                    GenerationJob.objects.select_for_update()
+                    .filter(status='pending')
+                    .order_by('created_at')[:self.batch_size]
+                )
+                if not jobs:
+                    break
+                GenerationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                    status='submitted',
+                    batch_id=claim,
+                    updated_at=timezone.now()
+                )
+
+            requests = [
+                {
+                    'custom_id': str(job.job_id),
+                    'kind': job.kind,
+                    'message': job.prompt,
+                    'topic': job.topic,
+                    'difficulty': job.metadata.get('difficulty'),
+                }
+                for job in jobs
+            ]
+            try:
+                batch_id = self.backend.submit(requests)
+            except Exception as e:
+                logger.error(f"Error submitting generation batch: {str(e)}")
+                GenerationJob.objects.filter(batch_id=claim).update(
+                    status='pending',
+                    batch_id='',
+                    updated_at=timezone.now()
+                )
+                break
+
+            GenerationJob.objects.filter(batch_id=claim).update(batch_id=batch_id, updated_at=timezone.now())
+            submitted += len(jobs)
+
+        return submitted
+
+    @staticmethod
+    def release_stale_claims():
+        """
+        Return jobs claimed by a submission that never finished (e.g. the process
+        died during the upload) to the pending queue.
+
+        Returns:
+            int: Number of jobs released
+        """
+        cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'AI_TUTOR_BATCH_CLAIM_TIMEOUT', 60 * 60))
+        released = GenerationJob.objects.filter(
+            status='submitted', batch_id__startswith=CLAIM_PREFIX, updated_at__lt=cutoff
+        ).update(status='pending', batch_id='', updated_at=timezone.now())
+        if released:
+            logger.warning(f"Released {released} generation job(s) from interrupted batch submissions")
+        return released
+
+    def poll(self):
+        """
+        Poll every outstanding batch and write finished results back.
+
+        Returns:
+            int: Number of jobs that reached a final state
+        """
+        finished = 0
+        self.release_stale_claims()
+        batch_ids = (
+            GenerationJob.objects.filter(status='submitted')
+            .exclude(batch_id__startswith=CLAIM_PREFIX)
+            .values_list('batch_id', flat=True)
+            .distinct()
+        )
+
+        for batch_id in list(batch_ids):
+            try:
+                status, results = self.backend.retrieve(batch_id)
+            except Exception as e:
+                logger.error(f"Error polling generation batch {batch_id}: {str(e)}")
+                continue
+
+            if status == 'in_progress':
+                continue
+
+            for job in GenerationJob.objects.filter(batch_id=batch_id, status='submitted'):
+                outcome = results.get(str(job.job_id))
+                if outcome and 'content' in outcome:
+                    self._complete(job, outcome['content'])
+                else:
+                    self._retry_or_fail(job, (outcome or {}).get('error', f"Batch {status} without a result"))
+                finished += 1
+
+        return finished
+
+    def run_once(self):
+        """Submit pending work and collect finished batches."""
+        return self.submit_pending(), self.poll()
+
+    def _complete(self, job, content):
+        """Store a result on the job and hand it to the writer for its kind."""
+        try:
+            with transaction.atomic():
+                WRITERS[job.kind](job, content)
+                job.status = 'completed'
+                job.result = content
+                job.error = ''
+                job.completed_at = timezone.now()
+                job.save(update_fields=['status', 'result', 'error', 'completed_at', 'updated_at'])
+        except Exception as e:
+            logger.error(f"Error writing back generation job {job.job_id}: {str(e)}")
+            self._retry_or_fail(job, str(e))
+
+    def _retry_or_fail(self, job, error):
+        """Requeue a job that did not produce a result, or fail it after max_attempts."""
+        job.attempts += 1
+        job.error = error
+        job.batch_id = ''
+        job.status = 'failed' if job.attempts >= self.max_attempts else 'pending'
+        job.save(update_fields=['attempts', 'error', 'batch_id', 'status', 'updated_at'])
+
+
+def _write_concept_explanation(job, content):
+    """Save a generated explanation as a SimpleConcept."""
+    SimpleConcept.objects.update_or_create(title=job.subject, defaults={'content': content})
+
+
+def _write_practice_problem(job, content):
+    """Validate a generated practice problem and add it to the ready inventory."""
+    from .inventory_service import store_generated_problem
+    store_generated_problem(job, content)
+
+
+WRITERS = {
+    'concept_explanation': _write_concept_explanation,
+    'practice_problem': _write_practice_problem,
+}
+
+
+def enqueue_concept_explanation(concept, topic=''):
+    """Queue a detailed explanation of a concept."""
+    prompt = (
+        f"Explain the concept '{concept}' to a student. Cover what it is, why it matters, "
+        "a worked code example and common pitfalls."
+    )
+    return BatchGenerationQueue.enqueue('concept_explanation', concept, prompt, topic=topic)
+
+
+def enqueue_practice_problem(topic, difficulty='beginner'):
+    """Queue generation of a practice problem for a topic and difficulty."""
+    prompt = (
+        f"Write a {difficulty} Python practice problem about {topic}. Reply with a single JSON "
+        "object with the keys: title, description, function_name, starter_code, hint, "
+        "reference_solution (a correct implementation of function_name) and test_cases "
+        "(a list of {\"input\": [positional arguments], \"expected\": return value})."
+    )
+    return BatchGenerationQueue.enqueue(
+        'practice_problem',
+        f"{topic}:{difficulty}:{uuid.uuid4().hex[:8]}",
+        prompt,
+        topic=topic,
+        metadata={'difficulty': difficulty}
+    )
+
@@ -0,0 +1,216 @@
+"""
+Pre-generated practice problem inventory.
+A background worker keeps AI_TUTOR_INVENTORY_TARGET ready, validated problems per
+(topic, difficulty) bucket. Students claim a ready problem with one indexed
+read and a compare-and-set update, and a claim that leaves the bucket below
+AI_TUTOR_INVENTORY_LOW_WATER queues a refill through the batch generation queue.
+"""
+
+import json
+import logging
+import random
+import re
+
+from django.conf import settings
+from django.utils import timezone
+
+from .batch_service import enqueue_practice_problem
+from .judge_service import judge_enabled, judge_submission
+from .models import GenerationJob, PracticeProblem
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('title', 'description', 'function_name', 'reference_solution', 'test_cases')
+
+# Attempts at the claim compare-and-set before giving up on a contended bucket
+CLAIM_RETRIES = 5
+
+
+def get_buckets():
+    """(topic, difficulty) buckets the inventory is kept for."""
+    buckets = getattr(settings, 'AI_TUTOR_INVENTORY_BUCKETS', None)
+    if buckets:
+        return [tuple(bucket) for bucket in buckets]
+
+    topics = PracticeProblem.objects.order_by('topic').values_list('topic', flat=True).distinct()
+    return [(topic, difficulty) for topic in topics for difficulty, _ in PracticeProblem.DIFFICULTY_CHOICES]
+
+
+def _ready(topic, difficulty):
+    return PracticeProblem.objects.filter(topic=topic, difficulty=difficulty, inventory_state='ready')
+
+
+def _queued_jobs(topic, difficulty):
+    return GenerationJob.objects.filter(
+        kind='practice_problem',
+        subject__startswith=f"{topic}:{difficulty}:",
+        status__in=['pending', 'submitted']
+    ).count()
+
+
+def refill(topic, difficulty):
+    """
+    Queue enough generation jobs to bring a bucket back up to its target.
+
+    Returns:
+        int: Number of jobs queued
+    """
+    target = getattr(settings, 'AI_TUTOR_INVENTORY_TARGET', 10)
+    deficit = target - _ready(topic, difficulty).count() - _queued_jobs(topic, difficulty)
+    for _ in range(max(deficit, 0)):
+        enqueue_practice_problem(topic, difficulty)
+    return max(deficit, 0)
+
+
+def replenish_all():
+    """Refill every bucket. Returns the number of generation jobs queued."""
+    return sum(refill(topic, difficulty) for topic, difficulty in get_buckets())
+
+
+def claim_problem(user, topic, difficulty):
+    """
+    Atomically claim a ready problem from a bucket for a user.
+
+    Returns:
+        PracticeProblem: The claimed problem, or None if the bucket is empty
+
+    Raises:
+        ValueError: If (topic, difficulty) is not one of get_buckets()
+    """
+    # Anything but a known bucket would queue generation jobs for arbitrary strings
+    if (topic, difficulty) not in get_buckets():
+        raise ValueError(f"Unknown inventory bucket {topic}/{difficulty}")
+
+    claimed = None
+    for _ in range(CLAIM_RETRIES):
+        candidate = _ready(topic, difficulty).order_by('pk').values_list('pk', flat=True).first()
+        if candidate is None:
+            break
+
+        # Compare-and-set: only one concurrent request can move the row out of 'ready'
+        updated = PracticeProblem.objects.filter(pk=candidate, inventory_state='ready').update(
+            inventory_state='claimed',
+            claimed_by=user,
+            claimed_at=timezone.now()
+        )
+        if updated:
+            claimed = PracticeProblem.objects.get(pk=candidate)
+            break
+
+    low_water = getattr(settings, 'AI_TUTOR_INVENTORY_LOW_WATER', 3)
+    if claimed is None or _ready(topic, difficulty).count() < low_water:
+        try:
+            refill(topic, difficulty)
+        except Exception as e:
+            logger.warning(f"Could not queue inventory refill for {topic}/{difficulty}: {str(e)}")
+
+    return claimed
+
+
+def parse_problem(content):
+    """Extract the problem JSON object from a model response."""
+    fenced = re.search(r"```(?:json)?\s*(\{.*\})\s*```", content, re.DOTALL)
+    text = fenced.group(1) if fenced else content[content.find('{'):content.rfind('}') + 1]
+    data = json.loads(text)
+
+    missing = [field for field in REQUIRED_FIELDS if not data.get(field)]
+    if missing:
+        raise ValueError(f"Generated problem is missing {', '.join(missing)}")
+    if not isinstance(data['test_cases'], list) or not all(
+        isinstance(case, dict) and isinstance(case.get('input'), list) and 'expected' in case
+        for case in data['test_cases']
+    ):
+        raise ValueError("Generated test cases must be a list of {input: [...], expected: ...}")
+    return data
+
+
+def store_generated_problem(job, content):
+    """
+    Validate a generated problem and add it to its bucket as 'ready'.
+    Raises ValueError when the problem is malformed or its reference solution fails.
+    """
+    data = parse_problem(content)
+    problem = PracticeProblem(
+        title=data['title'][:200],
+        description=data['description'],
+        topic=job.topic,
+        difficulty=job.metadata.get('difficulty', 'beginner'),
+        function_name=data['function_name'],
+        starter_code=data.get('starter_code', ''),
+        test_cases=data['test_cases'],
+        hint=data.get('hint', ''),
+        source='generated',
+        inventory_state='ready'
+    )
+
+    # A problem is only served once its own reference solution passes every test
+    if judge_enabled():
+        report = judge_submission(problem, data['reference_solution'], use_cache=False)
+        if not report['passed']:
+            raise ValueError("Reference solution does not pass the generated test cases")
+    else:
+        logger.warning("Judge unavailable - generated problem stored without execution check")
+
+    problem.save()
+    return problem
+
+
+# Parametrised problems used by the local batch backend in place of a model
+LOCAL_PROBLEM_TEMPLATES = [
+    {
+        'title': 'Sum of Even Numbers',
+        'description': 'Write a function sum_even(numbers) that returns the sum of the even integers in a list.',
+        'function_name': 'sum_even',
+        'signature': 'sum_even(numbers)',
+        'reference_solution': "def sum_even(numbers):\n    return sum(n for n in numbers if n % 2 == 0)\n",
+        'hint': 'Use the modulo operator to test whether a number is even.',
+        'make_input': lambda rng: [[rng.randint(-50, 50) for _ in range(rng.randint(0, 8))]],
+        'solve': lambda numbers: sum(n for n in numbers if n % 2 == 0),
+    },
+    {
+        'title': 'Count Vowels',
+        'description': 'Write a function count_vowels(text) that returns how many vowels (a, e, i, o, u) a string contains, ignoring case.',
+        'function_name': 'count_vowels',
+        'signature': 'count_vowels(text)',
+        'reference_solution': "def count_vowels(text):\n    return sum(1 for char in text.lower() if char in 'aeiou')\n",
+        'hint': 'Lowercase the string first, then check membership in a string of vowels.',
+        'make_input': lambda rng: [''.join(rng.choice('abcdeiouxyz AEIOU') for _ in range(rng.randint(0, 15)))],
+        'solve': lambda text: sum(1 for char in text.lower() if char in 'aeiou'),
+    },
+    {
+        'title': 'Second Largest',
+        'description': 'Write a function second_largest(numbers) that returns the second largest distinct value in a list, or None if there is none.',
+        'function_name': 'second_largest',
+        'signature': 'second_largest(numbers)',
+        'reference_solution': (
+            "def second_largest(numbers):\n"
+            "    distinct = sorted(set(numbers), reverse=True)\n"
+            "    return distinct[1] if len(distinct) > 1 else None\n"
+        ),
+        'hint': 'Remove duplicates before sorting.',
+        'make_input': lambda rng: [[rng.randint(0, 9) for _ in range(rng.randint(0, 6))]],
+        'solve': lambda numbers: (sorted(set(numbers), reverse=True)[1:2] or [None])[0],
+    },
+]
+
+
+def sample_problem_payload(topic, difficulty, seed=None):
+    """Build a valid problem response (as the model would return it) from a local template."""
+    rng = random.Random(seed)
+    template = rng.choice(LOCAL_PROBLEM_TEMPLATES)
+    test_count = {'beginner': 3, 'intermediate': 5, 'advanced': 8}.get(difficulty, 4)
+    test_cases = []
+    for _ in range(test_count):
+        args = template['make_input'](rng)
+        test_cases.append({'input': args, 'expected': template['solve'](*args)})
+
+    return json.dumps({
+        'title': f"{template['title']} ({topic})",
+        'description': template['description'],
+        'function_name': template['function_name'],
+        'starter_code': f"def {template['signature']}:\n    # Your code here\n    pass\n",
+        'reference_solution': template['reference_solution'],
+        'hint': template['hint'],
+        'test_cases': test_cases,
+    })
@@ -0,0 +1,417 @@
+"""
+Code judge for AI Tutor practice problems.
+Submissions run against a problem's stored test cases in a pool of pre-forked
+worker processes. Every test case executes in a fresh child forked from a pool
+worker, with rlimits on CPU time, address space, written output and process
+creation, and the test cases of one submission run in parallel across the pool.
+Results are cached by (problem, solution hash).
+
+The parent enforces a wall-clock deadline on every child and SIGKILLs it when
+the deadline passes, so a solution that blocks or ignores signals can not hold
+a pool worker. Before running a solution the child closes every inherited file
+descriptor except its result pipe (the pool worker's pipes to the web process
+carry pickles) and clears its environment, which holds the server's secrets.
+
+NOTE: rlimits bound resource usage, they do not isolate the filesystem or network.
+The judge refuses to run until AI_TUTOR_JUDGE_UID names an unprivileged user the
+sandbox children drop to (which needs the web process to run as root), or
+AI_TUTOR_JUDGE_ISOLATED declares that the web process already runs inside a
+disposable container.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import select
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# rlimits and fork are POSIX only - the judge reports itself unavailable elsewhere
+try:
+    import resource
+    JUDGE_AVAILABLE = hasattr(os, 'fork')
+except ImportError:
+    JUDGE_AVAILABLE = False
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Output a solution may print, and size of the result a sandbox child may report
+OUTPUT_LIMIT_BYTES = 64 * 1024
+RESULT_LIMIT_BYTES = 64 * 1024
+
+# Characters of actual output / stdout echoed back to the student per test case
+DISPLAY_LIMIT = 500
+
+# Time a child gets past its wall-clock limit to report its result
+WALL_GRACE_MS = 500
+
+# File descriptor the sandbox child reports its result on; everything above it is closed
+RESULT_FD = 3
+
+# Pool of pre-forked judge workers with lazy initialization
+_pool = None
+_misconfiguration_logged = False
+
+
+class OutputLimitExceeded(Exception):
+    """Raised inside the sandbox when a solution prints more than OUTPUT_LIMIT_BYTES."""
+
+
+class _BoundedWriter(io.StringIO):
+    """stdout/stderr replacement that stops a solution from flooding output."""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.size = 0
+
+    def write(self, text):
+        self.size += len(text)
+        if self.size > self.limit:
+            raise OutputLimitExceeded()
+        return super().write(text)
+
+
+def _warm_up(_):
+    """No-op task used to start every pool worker up front."""
+    return os.getpid()
+
+
+class JudgeUnavailable(RuntimeError):
+    """Raised when submissions can not be judged safely on this server."""
+
+
+def get_judge_pool_size():
+    """Number of workers in the judge pool."""
+    return getattr(settings, 'AI_TUTOR_JUDGE_WORKERS', None) or os.cpu_count() or 1
+
+
+def judge_enabled():
+    """
+    Whether submissions may be executed here: POSIX, and the sandbox is isolated
+    from the web process' files by an unprivileged UID or a container.
+    """
+    global _misconfiguration_logged
+
+    if not JUDGE_AVAILABLE:
+        return False
+    if getattr(settings, 'AI_TUTOR_JUDGE_ISOLATED', False):
+        return True
+    sandbox_uid = getattr(settings, 'AI_TUTOR_JUDGE_UID', None)
+    if sandbox_uid is None or sandbox_uid == 0 or sandbox_uid == os.getuid():
+        return False
+    # Only root can switch the sandbox children to another user
+    if os.geteuid() != 0:
+        if not _misconfiguration_logged:
+            _misconfiguration_logged = True
+            logger.error(
+                f"AI_TUTOR_JUDGE_UID is {sandbox_uid} but the web process runs as UID {os.geteuid()} and can not "
+                "switch to it; the judge is disabled until the process runs as root or AI_TUTOR_JUDGE_ISOLATED is set"
+            )
+        return False
+    return True
+
+
+def reset_judge_pool():
+    """Discard the judge pool, e.g. after a worker died; the next call to get_judge_pool() starts a new one."""
+    global _pool
+
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_judge_pool():
+    """
+    Get the judge worker pool, starting all of its workers on first use.
+
+    Workers come from a forkserver so they do not inherit the web process'
+    threads, database connections or request state.
+
+    Returns:
+        ProcessPoolExecutor: The shared judge pool
+    """
+    global _pool
+
+    if _pool is None:
+        workers = get_judge_pool_size()
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('forkserver')
+        )
+        list(_pool.map(_warm_up, range(workers)))
+        logger.info(f"Judge pool started with {workers} workers")
+
+    return _pool
+
+
+def _address_space_bytes():
+    """Current virtual memory size of this process, read from /proc."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _isolate_descriptors(write_fd):
+    """
+    Leave the sandbox child only its result pipe, on RESULT_FD, and /dev/null as stdio.
+
+    Anything else it inherited - the pool worker's call and result pipes, whose
+    pickles the web process loads, or sockets - would be reachable by the solution.
+    """
+    if write_fd != RESULT_FD:
+        os.dup2(write_fd, RESULT_FD)
+        os.close(write_fd)
+    os.closerange(RESULT_FD + 1, max(os.sysconf('SC_OPEN_MAX'), 1024))
+    null_fd = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(null_fd, fd)
+    os.close(null_fd)
+    return RESULT_FD
+
+
+def _sandbox_child(write_fd, source, function_name, args, time_limit_ms, memory_limit_mb, sandbox_uid):
+    """Body of the forked sandbox process. Never returns."""
+    try:
+        write_fd = _isolate_descriptors(write_fd)
+        # The environment holds API keys, SECRET_KEY and database credentials
+        os.environ.clear()
+        os.chdir('/tmp')
+        if sandbox_uid is not None:
+            os.setgroups([])
+            os.setgid(sandbox_uid)
+            os.setuid(sandbox_uid)
+
+        # Resource limits: CPU seconds, memory on top of the inherited image,
+        # bytes written to files and no further processes
+        cpu_seconds = max(1, math.ceil(time_limit_ms / 1000))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        memory_bytes = _address_space_bytes() + memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (OUTPUT_LIMIT_BYTES, OUTPUT_LIMIT_BYTES))
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+        sys.stdin = io.StringIO('')
+        sys.stdout = sys.stderr = _BoundedWriter(OUTPUT_LIMIT_BYTES)
+
+        namespace = {'__name__': '__solution__'}
+        exec(compile(source, '<solution>', 'exec'), namespace)
+        function = namespace.get(function_name)
+        if not callable(function):
+            raise NameError(f"Your solution must define a function named '{function_name}'")
+
+        started = time.perf_counter()
+        actual = function(*args)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        payload = {
+            'ok': True,
+            'actual': json.loads(json.dumps(actual, default=repr)),
+            'elapsed_ms': elapsed_ms,
+            'stdout': sys.stdout.getvalue()[:DISPLAY_LIMIT],
+        }
+    except MemoryError:
+        payload = {'ok': False, 'error': 'Memory limit exceeded'}
+    except OutputLimitExceeded:
+        payload = {'ok': False, 'error': 'Output limit exceeded'}
+    except BaseException as e:
+        payload = {'ok': False, 'error': f"{type(e).__name__}: {e}"[:DISPLAY_LIMIT]}
+
+    try:
+        data = json.dumps(payload, default=repr).encode('utf-8')
+        if len(data) > RESULT_LIMIT_BYTES:
+            data = json.dumps({'ok': False, 'error': 'Output limit exceeded'}).encode('utf-8')
+        while data:
+            data = data[os.write(write_fd, data):]
+    finally:
+        os._exit(0)
+
+
+def run_test_case(source, function_name, args, time_limit_ms, memory_limit_mb, sandbox_uid=None):
+    """
+    Run one test case in a freshly forked, resource-limited child.
+    Executed inside a judge pool worker.
+
+    Returns:
+        dict: 'ok', 'actual' or 'error', plus 'time_ms', 'cpu_ms' and 'memory_kb'
+    """
+    read_fd, write_fd = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+
+    if pid == 0:
+        os.close(read_fd)
+        _sandbox_child(write_fd, source, function_name, args, time_limit_ms, memory_limit_mb, sandbox_uid)
+
+    os.close(write_fd)
+    # Wall-clock deadline for solutions that sleep, block or ignore signals instead of burning CPU
+    deadline = started + (time_limit_ms * 2 + WALL_GRACE_MS) / 1000
+    chunks, received, status, usage = [], 0, None, None
+    try:
+        while received <= RESULT_LIMIT_BYTES:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                break
+            chunk = os.read(read_fd, 8192)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+
+        # The child may have closed the pipe and kept running
+        while status is None:
+            reaped, status, usage = os.wait4(pid, os.WNOHANG)
+            if reaped:
+                break
+            status = None
+            if time.perf_counter() >= deadline:
+                os.kill(pid, signal.SIGKILL)
+                _, status, usage = os.wait4(pid, 0)
+                break
+            time.sleep(0.005)
+    finally:
+        os.close(read_fd)
+        if status is None:
+            # Interrupted: never leave a solution running
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.wait4(pid, 0)
+            except OSError:
+                pass
+
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    try:
+        result = json.loads(b''.join(chunks).decode('utf-8'))
+    except ValueError:
+        if os.WIFSIGNALED(status) and os.WTERMSIG(status) in (signal.SIGXCPU, signal.SIGKILL):
+            result = {'ok': False, 'error': 'Time limit exceeded'}
+        elif os.WIFSIGNALED(status):
+            result = {'ok': False, 'error': f"Terminated by signal {os.WTERMSIG(status)}"}
+        else:
+            result = {'ok': False, 'error': 'Solution exited without producing a result'}
+
+    result['time_ms'] = round(result.pop('elapsed_ms', wall_ms), 2)
+    result['cpu_ms'] = round((usage.ru_utime + usage.ru_stime) * 1000, 2)
+    result['memory_kb'] = usage.ru_maxrss
+    if result['ok'] and result['time_ms'] > time_limit_ms:
+        result = {**result, 'ok': False, 'error': 'Time limit exceeded'}
+    return result
+
+
+def solution_cache_key(problem, solution):
+    """Cache key for a (problem, solution) pair; changes when the test cases change."""
+    solution_hash = hashlib.sha256(solution.encode('utf-8')).hexdigest()
+    tests_hash = hashlib.sha256(
+        json.dumps(problem.test_cases, sort_keys=True).encode('utf-8')
+    ).hexdigest()[:16]
+    return f"ai_tutor:judge:{problem.pk}:{tests_hash}:{solution_hash}"
+
+
+def _run_test_cases(problem, solution):
+    """
+    Run all test cases of a submission in the judge pool.
+
+    Returns:
+        list: run_test_case() results, in test case order
+
+    Raises:
+        BrokenProcessPool: If a pool worker died
+    """
+    pool = get_judge_pool()
+    sandbox_uid = getattr(settings, 'AI_TUTOR_JUDGE_UID', None)
+    futures = [
+        pool.submit(
+            run_test_case,
+            solution,
+            problem.function_name,
+            case.get('input', []),
+            problem.time_limit_ms,
+            problem.memory_limit_mb,
+            sandbox_uid
+        )
+        for case in problem.test_cases
+    ]
+
+    # Every child is killed at its own deadline; this only bounds time spent queued behind other submissions
+    deadline = time.monotonic() + getattr(settings, 'AI_TUTOR_JUDGE_SUBMISSION_TIMEOUT', 60)
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result(timeout=max(0, deadline - time.monotonic())))
+        except TimeoutError:
+            future.cancel()
+            outcomes.append({'ok': False, 'error': 'Judge busy, please try again', 'busy': True, 'time_ms': 0, 'memory_kb': 0})
+    return outcomes
+
+
+def judge_submission(problem, solution, use_cache=True):
+    """
+    Judge a solution against all of a problem's test cases.
+
+    Args:
+        problem (PracticeProblem): The problem being solved
+        solution (str): Python source defining problem.function_name
+        use_cache (bool): Reuse and store results keyed by (problem, solution hash)
+
+    Returns:
+        dict: 'passed', 'test_cases' (in the feedback.details shape), 'time_ms',
+            'memory_kb' and 'cached'
+
+    Raises:
+        JudgeUnavailable: If the sandbox is not isolated (see judge_enabled())
+    """
+    if not judge_enabled():
+        raise JudgeUnavailable("Code judging is not available on this server")
+
+    key = solution_cache_key(problem, solution)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+    try:
+        outcomes = _run_test_cases(problem, solution)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OOM killer): start a fresh pool and retry once
+        logger.warning("Judge pool broken - restarting it")
+        reset_judge_pool()
+        outcomes = _run_test_cases(problem, solution)
+
+    test_cases = []
+    for case, outcome in zip(problem.test_cases, outcomes):
+        passed = outcome['ok'] and outcome['actual'] == case.get('expected')
+        hidden = case.get('hidden', False)
+        test_cases.append({
+            'input': 'hidden' if hidden else json.dumps(case.get('input', []))[1:-1],
+            'expected': 'hidden' if hidden else repr(case.get('expected')),
+            'actual': repr(outcome['actual'])[:DISPLAY_LIMIT] if outcome['ok'] else outcome['error'],
+            'passed': passed,
+            'time_ms': outcome['time_ms'],
+            'memory_kb': outcome['memory_kb'],
+        })
+
+    report = {
+        'passed': bool(test_cases) and all(case['passed'] for case in test_cases),
+        'test_cases': test_cases,
+        'time_ms': max((case['time_ms'] for case in test_cases), default=0),
+        'memory_kb': max((case['memory_kb'] for case in test_cases), default=0),
+    }
+    # Results cut short by a busy judge say nothing about the solution - do not cache them
+    if use_cache and not any(outcome.get('busy') for outcome in outcomes):
+        cache.set(key, report, getattr(settings, 'AI_TUTOR_JUDGE_CACHE_TIMEOUT', 60 * 60 * 24))
+    return {**report, 'cached': False}
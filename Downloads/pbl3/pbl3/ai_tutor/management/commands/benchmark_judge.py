@@ -0,0 +1,77 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_tutor.judge_service import get_judge_pool, get_judge_pool_size, judge_enabled, judge_submission
+from ai_tutor.models import PracticeProblem
+
+SAMPLE_PROBLEM = PracticeProblem(
+    pk=0,
+    title='Palindrome Checker',
+    function_name='is_palindrome',
+    test_cases=[
+        {'input': ['racecar'], 'expected': True},
+        {'input': ['A man, a plan, a canal: Panama'], 'expected': True},
+        {'input': ['hello world'], 'expected': False},
+        {'input': [''], 'expected': True},
+    ],
+)
+
+SAMPLE_SOLUTION = (
+    "def is_palindrome(text):\n"
+    "    clean_text = ''.join(char for char in text if char.isalnum()).lower()\n"
+    "    return clean_text == clean_text[::-1]\n"
+)
+
+
+class Command(BaseCommand):
+    help = "Measure practice-problem judge throughput (submissions per second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=200, help="Number of submissions to judge")
+        parser.add_argument('--concurrency', type=int, default=8, help="Submissions in flight at once")
+        parser.add_argument('--problem', type=int, default=None, help="PracticeProblem ID (defaults to a built-in sample)")
+        parser.add_argument('--solution-file', default=None, help="Solution to submit for --problem")
+        parser.add_argument('--cached', action='store_true', help="Allow result cache hits")
+
+    def handle(self, *args, **options):
+        if not judge_enabled():
+            raise CommandError(
+                "The judge needs a POSIX system with fork() and rlimits, and AI_TUTOR_JUDGE_UID "
+                "or AI_TUTOR_JUDGE_ISOLATED configured"
+            )
+
+        problem, solution = SAMPLE_PROBLEM, SAMPLE_SOLUTION
+        if options['problem'] is not None:
+            problem = PracticeProblem.objects.get(pk=options['problem'])
+            if not options['solution_file']:
+                raise CommandError("--solution-file is required with --problem")
+            with open(options['solution_file']) as solution_file:
+                solution = solution_file.read()
+
+        get_judge_pool()
+        self.stdout.write(f"Judge pool: {get_judge_pool_size()} workers, {len(problem.test_cases)} test cases per submission")
+
+        def submit(index):
+            # Vary the source so every submission misses the result cache
+            source = solution if options['cached'] else f"{solution}\n# submission {index}\n"
+            started = time.perf_counter()
+            report = judge_submission(problem, source, use_cache=options['cached'])
+            return (time.perf_counter() - started) * 1000, report['passed']
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(submit, range(options['submissions'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        passed = sum(1 for _, ok in results if ok)
+        self.stdout.write(
+            f"{len(results)} submissions in {elapsed:.2f}s: "
+            f"{len(results) / elapsed:.1f} submissions/s, "
+            f"p50 {statistics.median(latencies):.1f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}ms, "
+            f"{passed} passed"
+        )
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_tutor.batch_service import BatchGenerationQueue
+
+
+class Command(BaseCommand):
+    help = "Submit queued AI Tutor generation jobs in batches and collect their results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single submit/poll cycle and exit")
+        parser.add_argument('--interval', type=int, default=30, help="Seconds between cycles")
+        parser.add_argument('--batch-size', type=int, default=None, help="Maximum jobs per batch")
+
+    def handle(self, *args, **options):
+        queue = BatchGenerationQueue(batch_size=options['batch_size'])
+        self.stdout.write(f"Using {queue.backend.name} batch backend")
+
+        while True:
+            submitted, finished = queue.run_once()
+            if submitted or finished:
+                self.stdout.write(f"Submitted {submitted} job(s), finished {finished} job(s)")
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ai_tutor.retrieval_service import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the AI Tutor's lesson retrieval index from all course lessons."
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} lesson(s)"))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_tutor.batch_service import BatchGenerationQueue
+from ai_tutor.inventory_service import replenish_all
+
+
+class Command(BaseCommand):
+    help = "Keep the pre-generated practice problem inventory topped up for every (topic, difficulty) bucket."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single replenish cycle and exit")
+        parser.add_argument('--interval', type=int, default=60, help="Seconds between cycles")
+
+    def handle(self, *args, **options):
+        queue = BatchGenerationQueue()
+
+        while True:
+            queued = replenish_all()
+            submitted, finished = queue.run_once()
+            if queued or submitted or finished:
+                self.stdout.write(
+                    f"Queued {queued} problem(s), submitted {submitted} job(s), finished {finished} job(s)"
+                )
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
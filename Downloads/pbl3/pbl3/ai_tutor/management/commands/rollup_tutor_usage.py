@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ai_tutor.usage_service import rollup_day
+
+
+class Command(BaseCommand):
+    help = "Roll AI Tutor usage records up into daily per-topic aggregates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1, help="Number of closed days to (re)build, ending yesterday")
+        parser.add_argument('--include-today', action='store_true', help="Also roll up the current, still open day")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        days = [today - timedelta(days=offset) for offset in range(1, options['days'] + 1)]
+        if options['include_today']:
+            days.insert(0, today)
+
+        for day in days:
+            topics = rollup_day(day)
+            self.stdout.write(f"{day}: {topics} topic rollup(s)")
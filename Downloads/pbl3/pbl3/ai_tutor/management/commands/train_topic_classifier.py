@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_tutor.topic_classifier import train
+
+
+class Command(BaseCommand):
+    help = "Retrain the AI Tutor topic classifier from stored sessions and report accuracy and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-size', type=float, default=0.2, help="Share of each topic held out for evaluation")
+        parser.add_argument('--min-examples', type=int, default=None, help="Questions a topic needs to be learned")
+        parser.add_argument('--dry-run', action='store_true', help="Report without replacing the saved model")
+
+    def handle(self, *args, **options):
+        try:
+            report = train(
+                test_size=options['test_size'],
+                min_examples=options['min_examples'],
+                save=not options['dry_run']
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Trained on {report['train_examples']} questions, evaluated on {report['test_examples']} "
+            f"({len(report['topics'])} topics)"
+        )
+        self.stdout.write(f"Accuracy: {report['accuracy']:.2%}")
+        for topic, accuracy in report['per_topic_accuracy'].items():
+            self.stdout.write(f"  {topic}: {accuracy:.2%}")
+        self.stdout.write(
+            f"Latency per question: p50 {report['latency_p50_us']} us, p99 {report['latency_p99_us']} us"
+        )
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS("Model saved"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 09:00
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_tutor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('kind', models.CharField(choices=[('practice_problem', 'Practice Problem'), ('concept_explanation', 'Concept Explanation'), ('learning_path_step', 'Learning Path Step')], max_length=30)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('submitted', 'Submitted'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('subject', models.CharField(help_text='Concept, topic or step title being generated', max_length=255)),
+                ('prompt', models.TextField()),
+                ('topic', models.CharField(blank=True, max_length=100)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('batch_id', models.CharField(blank=True, max_length=100)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('result', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ai_tutor_ge_status_156a0e_idx'), models.Index(fields=['batch_id'], name='ai_tutor_ge_batch_i_bbaac5_idx'), models.Index(fields=['kind', 'subject'], name='ai_tutor_ge_kind_cea078_idx')],
+            },
+        ),
+    ]
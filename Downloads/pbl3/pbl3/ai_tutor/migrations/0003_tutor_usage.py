@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 09:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_tutor', '0002_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorUsageRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('topic', models.CharField(blank=True, max_length=100)),
+                ('path', models.CharField(choices=[('upstream', 'Upstream Model'), ('cache', 'Response Cache'), ('fallback', 'Fallback Engine')], max_length=10)),
+                ('model', models.CharField(blank=True, max_length=50)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.PositiveIntegerField(default=0)),
+                ('cost_usd', models.DecimalField(decimal_places=6, default=0, max_digits=10)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TutorUsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('topic', models.CharField(blank=True, max_length=100)),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('upstream_calls', models.PositiveIntegerField(default=0)),
+                ('cache_hits', models.PositiveIntegerField(default=0)),
+                ('fallback_calls', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('cost_usd', models.DecimalField(decimal_places=6, default=0, max_digits=12)),
+                ('latency_total_ms', models.PositiveBigIntegerField(default=0)),
+                ('latency_histogram', models.JSONField(default=list, help_text='Call counts per latency bucket')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day', 'topic'],
+                'unique_together': {('day', 'topic')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_tutor', '0003_tutor_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeProblem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('topic', models.CharField(max_length=100)),
+                ('difficulty', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced')], default='beginner', max_length=15)),
+                ('function_name', models.CharField(help_text='Function the solution must define', max_length=100)),
+                ('starter_code', models.TextField(blank=True)),
+                ('test_cases', models.JSONField(default=list, help_text='List of {"input": [args], "expected": value, "hidden": bool}')),
+                ('hint', models.TextField(blank=True)),
+                ('time_limit_ms', models.PositiveIntegerField(default=2000)),
+                ('memory_limit_mb', models.PositiveIntegerField(default=128)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['difficulty', 'title'],
+            },
+        ),
+    ]
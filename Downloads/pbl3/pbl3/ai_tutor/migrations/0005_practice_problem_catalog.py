@@ -0,0 +1,74 @@
+# Generated by Django 5.2 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_tutor', '0004_practiceproblem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProblemTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='practiceproblem',
+            name='attempt_count',
+            field=models.PositiveIntegerField(default=0, help_text='Students who attempted this problem'),
+        ),
+        migrations.AddField(
+            model_name='practiceproblem',
+            name='solve_count',
+            field=models.PositiveIntegerField(default=0, help_text='Students who solved this problem'),
+        ),
+        migrations.AddField(
+            model_name='practiceproblem',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='problems', to='ai_tutor.problemtag'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceproblem',
+            index=models.Index(fields=['topic', 'difficulty', 'title'], name='ai_tutor_pr_topic_a1a373_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceproblem',
+            index=models.Index(fields=['difficulty', 'title'], name='ai_tutor_pr_difficu_5433e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceproblem',
+            index=models.Index(fields=['-created_at'], name='ai_tutor_pr_created_bffac1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceproblem',
+            index=models.Index(fields=['-attempt_count'], name='ai_tutor_pr_attempt_10ec08_idx'),
+        ),
+        migrations.CreateModel(
+            name='ProblemAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('solved', models.BooleanField(default=False)),
+                ('solved_at', models.DateTimeField(blank=True, null=True)),
+                ('last_attempted_at', models.DateTimeField(auto_now=True)),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='ai_tutor.practiceproblem')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='problem_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'solved'], name='ai_tutor_pr_user_id_a5c92a_idx')],
+                'unique_together': {('user', 'problem')},
+            },
+        ),
+    ]
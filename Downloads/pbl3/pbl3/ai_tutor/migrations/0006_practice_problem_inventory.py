@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 11:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_tutor', '0005_practice_problem_catalog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practiceproblem',
+            name='source',
+            field=models.CharField(choices=[('curated', 'Curated'), ('generated', 'AI Generated')], default='curated', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='practiceproblem',
+            name='inventory_state',
+            field=models.CharField(blank=True, choices=[('', 'Catalog'), ('ready', 'Ready'), ('claimed', 'Claimed')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='practiceproblem',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_problems', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='practiceproblem',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='practiceproblem',
+            index=models.Index(fields=['topic', 'difficulty', 'inventory_state', 'id'], name='ai_tutor_pr_topic_e57863_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 12:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_tutor', '0006_practice_problem_inventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lesson_id', models.PositiveIntegerField(db_index=True)),
+                ('course_id', models.PositiveIntegerField()),
+                ('course_title', models.CharField(max_length=200)),
+                ('lesson_title', models.CharField(max_length=200)),
+                ('position', models.PositiveSmallIntegerField(default=0, help_text='Order of the passage within the lesson')),
+                ('text', models.TextField()),
+                ('length', models.PositiveIntegerField(default=0, help_text='Number of indexed terms')),
+            ],
+            options={
+                'ordering': ['lesson_id', 'position'],
+                'unique_together': {('lesson_id', 'position')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('course_id', models.PositiveIntegerField(help_text='Copied from the chunk to filter postings by course')),
+                ('frequency', models.PositiveSmallIntegerField(default=1)),
+                ('chunk', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='ai_tutor.lessonchunk')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'course_id'], name='ai_tutor_le_term_1d420c_idx')],
+            },
+        ),
+        migrations.AlterField(
+            model_name='tutorusagerecord',
+            name='path',
+            field=models.CharField(choices=[('upstream', 'Upstream Model'), ('cache', 'Response Cache'), ('retrieval', 'Course Material'), ('fallback', 'Fallback Engine')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='tutorusagerollup',
+            name='retrieval_answers',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 import uuid
 
@@ -43,3 +44,273 @@ class SimpleConcept(models.Model):
     
     def __str__(self):
         return self.title
+
+
+class GenerationJob(models.Model):
+    """Deferred, non-interactive LLM generation request processed in batches."""
+    KIND_CHOICES = [
+        ('practice_problem', _('Practice Problem')),
+        ('concept_explanation', _('Concept Explanation')),
+        ('learning_path_step', _('Learning Path Step')),
+    ]
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('submitted', _('Submitted')),
+        ('completed', _('Completed')),
+        ('failed', _('Failed')),
+    ]
+    
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    
+    # Request details
+    subject = models.CharField(max_length=255, help_text=_("Concept, topic or step title being generated"))
+    prompt = models.TextField()
+    topic = models.CharField(max_length=100, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    
+    # Batch tracking
+    batch_id = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    
+    # Outcome
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['batch_id']),
+            models.Index(fields=['kind', 'subject']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} job for {self.subject} ({self.status})"
+
+
+class TutorUsageRecord(models.Model):
+    """Append-only record of a single AI Tutor model call."""
+    PATH_CHOICES = [
+        ('upstream', _('Upstream Model')),
+        ('cache', _('Response Cache')),
+        ('retrieval', _('Course Material')),
+        ('fallback', _('Fallback Engine')),
+    ]
+    
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    user_id = models.IntegerField(null=True, blank=True)
+    topic = models.CharField(max_length=100, blank=True)
+    path = models.CharField(max_length=10, choices=PATH_CHOICES)
+    model = models.CharField(max_length=50, blank=True)
+    
+    # Usage
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.PositiveIntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=10, decimal_places=6, default=0)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.path} call ({self.topic or 'general'}) at {self.created_at:%Y-%m-%d %H:%M:%S}"
+
+
+class TutorUsageRollup(models.Model):
+    """Daily per-topic aggregate of TutorUsageRecord rows."""
+    day = models.DateField()
+    topic = models.CharField(max_length=100, blank=True)
+    
+    # Call counts by path
+    calls = models.PositiveIntegerField(default=0)
+    upstream_calls = models.PositiveIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    retrieval_answers = models.PositiveIntegerField(default=0)
+    fallback_calls = models.PositiveIntegerField(default=0)
+    
+    # Usage totals
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=12, decimal_places=6, default=0)
+    latency_total_ms = models.PositiveBigIntegerField(default=0)
+    latency_histogram = models.JSONField(default=list, help_text=_("Call counts per latency bucket"))
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['day', 'topic']
+        ordering = ['-day', 'topic']
+    
+    def __str__(self):
+        return f"Usage for {self.topic or 'general'} on {self.day}"
+
+
+class ProblemTag(models.Model):
+    """Tag for practice problems."""
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class PracticeProblem(models.Model):
+    """Coding practice problem judged against stored test cases."""
+    DIFFICULTY_CHOICES = [
+        ('beginner', _('Beginner')),
+        ('intermediate', _('Intermediate')),
+        ('advanced', _('Advanced')),
+    ]
+    
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    topic = models.CharField(max_length=100)
+    difficulty = models.CharField(max_length=15, choices=DIFFICULTY_CHOICES, default='beginner')
+    tags = models.ManyToManyField(ProblemTag, blank=True, related_name='problems')
+    
+    # Judging
+    function_name = models.CharField(max_length=100, help_text=_("Function the solution must define"))
+    starter_code = models.TextField(blank=True)
+    test_cases = models.JSONField(
+        default=list,
+        help_text=_('List of {"input": [args], "expected": value, "hidden": bool}')
+    )
+    hint = models.TextField(blank=True)
+    time_limit_ms = models.PositiveIntegerField(default=2000)
+    memory_limit_mb = models.PositiveIntegerField(default=128)
+    
+    # Origin and pre-generated inventory state ('' for regular catalog problems)
+    SOURCE_CHOICES = [
+        ('curated', _('Curated')),
+        ('generated', _('AI Generated')),
+    ]
+    INVENTORY_STATE_CHOICES = [
+        ('', _('Catalog')),
+        ('ready', _('Ready')),
+        ('claimed', _('Claimed')),
+    ]
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='curated')
+    inventory_state = models.CharField(max_length=10, choices=INVENTORY_STATE_CHOICES, blank=True, default='')
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_problems'
+    )
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Denormalised counters maintained by ProblemAttempt.record
+    attempt_count = models.PositiveIntegerField(default=0, help_text=_("Students who attempted this problem"))
+    solve_count = models.PositiveIntegerField(default=0, help_text=_("Students who solved this problem"))
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['difficulty', 'title']
+        indexes = [
+            models.Index(fields=['topic', 'difficulty', 'title']),
+            models.Index(fields=['difficulty', 'title']),
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['-attempt_count']),
+            models.Index(fields=['topic', 'difficulty', 'inventory_state', 'id']),
+        ]
+    
+    def __str__(self):
+        return self.title
+    
+    @property
+    def success_rate(self):
+        """Percentage of students who attempted this problem and solved it."""
+        if self.attempt_count:
+            return int((self.solve_count / self.attempt_count) * 100)
+        return 0
+
+
+class ProblemAttempt(models.Model):
+    """A student's attempts at a practice problem."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='problem_attempts')
+    problem = models.ForeignKey(PracticeProblem, on_delete=models.CASCADE, related_name='attempts')
+    attempts = models.PositiveIntegerField(default=0)
+    solved = models.BooleanField(default=False)
+    solved_at = models.DateTimeField(null=True, blank=True)
+    last_attempted_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'problem']
+        indexes = [
+            models.Index(fields=['user', 'solved']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.problem.title} ({'solved' if self.solved else 'attempted'})"
+    
+    @classmethod
+    def record(cls, user, problem, passed):
+        """
+        Record a judged submission and keep the problem's counters in step.
+        
+        Returns:
+            ProblemAttempt: The user's attempt record
+        """
+        with transaction.atomic():
+            attempt, created = cls.objects.select_for_update().get_or_create(user=user, problem=problem)
+            newly_solved = passed and not attempt.solved
+            
+            # The row is locked, so the in-memory count is current
+            attempt.attempts += 1
+            if newly_solved:
+                attempt.solved = True
+                attempt.solved_at = timezone.now()
+            attempt.save()
+            
+            if created or newly_solved:
+                PracticeProblem.objects.filter(pk=problem.pk).update(
+                    attempt_count=models.F('attempt_count') + int(created),
+                    solve_count=models.F('solve_count') + int(newly_solved)
+                )
+        return attempt
+
+
+class LessonChunk(models.Model):
+    """
+    A passage of lesson content indexed for local retrieval.
+    Lessons and courses are referenced by ID so the index does not require the
+    courses app to be installed.
+    """
+    lesson_id = models.PositiveIntegerField(db_index=True)
+    course_id = models.PositiveIntegerField()
+    course_title = models.CharField(max_length=200)
+    lesson_title = models.CharField(max_length=200)
+    position = models.PositiveSmallIntegerField(default=0, help_text=_("Order of the passage within the lesson"))
+    text = models.TextField()
+    length = models.PositiveIntegerField(default=0, help_text=_("Number of indexed terms"))
+    
+    class Meta:
+        unique_together = ['lesson_id', 'position']
+        ordering = ['lesson_id', 'position']
+    
+    def __str__(self):
+        return f"{self.course_title} - {self.lesson_title} [{self.position}]"
+
+
+class LessonTerm(models.Model):
+    """Posting of a term in a LessonChunk (inverted index for BM25 retrieval)."""
+    term = models.CharField(max_length=50)
+    chunk = models.ForeignKey(LessonChunk, on_delete=models.CASCADE, related_name='terms')
+    course_id = models.PositiveIntegerField(help_text=_("Copied from the chunk to filter postings by course"))
+    frequency = models.PositiveSmallIntegerField(default=1)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'course_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.term} in chunk {self.chunk_id} ({self.frequency})"
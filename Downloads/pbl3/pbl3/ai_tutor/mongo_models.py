@@ -5,7 +5,13 @@ These are not Django ORM models, but classes that facilitate working with MongoD
 from datetime import datetime
 from utils.mongodb import get_collection, is_mongo_available
 from django.conf import settings
+import atexit
+import base64
 import logging
+import threading
+import uuid
+
+from . import session_cache
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -19,11 +25,67 @@ class AiTutorSession:
     returning appropriate default values.
     """
     
+    # Set once the history indexes have been created in this process
+    _indexes_ensured = False
+    
     @staticmethod
     def get_collection():
         """Get the MongoDB collection for AI tutor sessions"""
         return get_collection('ai_tutor_sessions')
     
+    @classmethod
+    def ensure_indexes(cls, collection):
+        """
+        Create the indexes used by session history paging and search, once per process.
+        
+        - (user_id, updated_at, _id) serves keyset pagination newest-first
+        - a text index on title and topic, prefixed by user_id, serves search
+        """
+        if cls._indexes_ensured or not hasattr(collection, 'create_index'):
+            return
+            
+        try:
+            collection.create_index(
+                [('user_id', 1), ('updated_at', -1), ('_id', -1)],
+                name='user_recent_sessions'
+            )
+            collection.create_index(
+                [('user_id', 1), ('title', 'text'), ('topic', 'text')],
+                name='user_session_search'
+            )
+            cls._indexes_ensured = True
+        except Exception as e:
+            logger.error(f"Error creating MongoDB session indexes: {str(e)}")
+    
+    @staticmethod
+    def encode_cursor(session):
+        """Opaque keyset cursor pointing just after a session in newest-first order."""
+        raw = f"{session['updated_at'].isoformat()}|{session['_id']}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decode a cursor made by encode_cursor.
+        
+        Returns:
+            tuple: (updated_at, session _id)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        updated_at, session_id = raw.split('|', 1)
+        
+        try:
+            from bson import ObjectId
+            if ObjectId.is_valid(session_id):
+                session_id = ObjectId(session_id)
+        except ImportError:
+            pass
+            
+        return datetime.fromisoformat(updated_at), session_id
+    
     @classmethod
     def create_session(cls, user_id, topic=None, title=None, metadata=None):
         """
@@ -60,7 +122,11 @@ class AiTutorSession:
             }
             
             result = collection.insert_one(session)
-            return str(result.inserted_id)
+            session_id = str(result.inserted_id)
+            
+            # A new session has no history - cache that, so its first message needs no read
+            session_cache.prime(session_id, [], session_cache.current_version(session_id))
+            return session_id
         except Exception as e:
             logger.error(f"Error creating MongoDB session: {str(e)}")
             return f"temp_session_{datetime.now().timestamp()}"
@@ -90,6 +156,7 @@ class AiTutorSession:
         
         try:
             message = {
+                'id': uuid.uuid4().hex,
                 'content': content,
                 'sender': sender,
                 'timestamp': datetime.now(),
@@ -104,7 +171,11 @@ class AiTutorSession:
                 }
             )
             
-            return result.modified_count > 0
+            if result.modified_count > 0:
+                # Write-through to the hot history cache
+                session_cache.append(session_id, message)
+                return True
+            return False
         except Exception as e:
             logger.error(f"Error adding message to MongoDB: {str(e)}")
             return True  # Return success in fallback mode
@@ -139,6 +210,9 @@ class AiTutorSession:
     def get_messages(cls, session_id, limit=5):
         """Get messages from a session, ordered by timestamp.
         
+        Recent messages are served from the hot history cache; the session
+        document is only read on a cache miss, which re-primes the cache.
+        
         Args:
             session_id: The session ID
             limit: Maximum number of messages to return (default: 5)
@@ -147,6 +221,12 @@ class AiTutorSession:
             list: The messages in the session, or an empty list if not found
         """
         try:
+            cached = session_cache.get_history(session_id)
+            if cached is not None and (limit <= len(cached) or len(cached) < session_cache.max_messages()):
+                return cached[-limit:] if limit else []
+            
+            # Read the version before the document, so the cache is never primed with older history
+            version = session_cache.current_version(session_id)
             session = cls.get_session(session_id)
             if not session:
                 return []
@@ -155,6 +235,7 @@ class AiTutorSession:
             
             # Sort by timestamp if available
             messages.sort(key=lambda x: x.get('metadata', {}).get('timestamp', ''), reverse=True)
+            session_cache.prime(session_id, messages[::-1], version)
             
             # Return the most recent messages up to the limit
             return messages[:limit][::-1]  # Reverse to get chronological order
@@ -195,6 +276,63 @@ class AiTutorSession:
             logger.error(f"Error retrieving user sessions from MongoDB: {str(e)}")
             return []
     
+    @classmethod
+    def get_user_sessions_page(cls, user_id, cursor=None, limit=20, search=None):
+        """
+        Get one page of a user's sessions, newest first, using keyset pagination.
+        
+        Unlike skip-based paging, every page is a single index range scan on
+        (user_id, updated_at, _id), however many sessions the user has. Only the
+        last message of each session is loaded.
+        
+        Args:
+            user_id: ID of the user whose sessions to retrieve
+            cursor: Cursor returned with the previous page, or None for the first page
+            limit: Maximum number of sessions to retrieve
+            search: Optional words to match against session titles and topics
+            
+        Returns:
+            tuple: (list of session documents, cursor for the next page or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = {'user_id': user_id}
+        if cursor:
+            updated_at, session_id = cls.decode_cursor(cursor)
+            query['$or'] = [
+                {'updated_at': {'$lt': updated_at}},
+                {'updated_at': updated_at, '_id': {'$lt': session_id}},
+            ]
+        if search:
+            query['$text'] = {'$search': search}
+            
+        if not is_mongo_available():
+            logger.warning("MongoDB unavailable - returning empty session page")
+            return [], None
+            
+        collection = cls.get_collection()
+        if collection is None:
+            logger.warning("MongoDB collection unavailable - returning empty session page")
+            return [], None
+            
+        cls.ensure_indexes(collection)
+        
+        try:
+            sessions = list(collection.find(
+                query,
+                projection={'messages': {'$slice': -1}},
+                sort=[('updated_at', -1), ('_id', -1)],
+                limit=limit + 1
+            ))
+        except Exception as e:
+            logger.error(f"Error retrieving user session page from MongoDB: {str(e)}")
+            return [], None
+            
+        # One extra document tells whether another page exists
+        next_cursor = cls.encode_cursor(sessions[limit - 1]) if len(sessions) > limit else None
+        return sessions[:limit], next_cursor
+    
     @classmethod
     def delete_session(cls, session_id):
         """
@@ -217,6 +355,7 @@ class AiTutorSession:
             
         try:
             result = collection.delete_one({'_id': session_id})
+            session_cache.invalidate(session_id)
             return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Error deleting MongoDB session: {str(e)}")
@@ -321,11 +460,138 @@ class UserLearningPattern:
     returning appropriate default values.
     """
     
+    # Coalesced counter updates: (user_id, topic, pattern_type) -> pending deltas
+    _pending = {}
+    _pending_lock = threading.Lock()
+    _flush_timer = None
+    
     @staticmethod
     def get_collection():
         """Get the MongoDB collection for user learning patterns"""
         return get_collection('user_learning_patterns')
     
+    @classmethod
+    def log_pattern(cls, user_id, pattern_type, content, metadata=None):
+        """
+        Count a learning event (e.g. a question on a topic) for a user.
+        
+        Events are coalesced in memory and written by flush_patterns() as one
+        bulk write of $inc/$max upserts, at most every AI_TUTOR_PATTERN_FLUSH_INTERVAL
+        seconds, so a chat turn costs no MongoDB round trip.
+        
+        Args:
+            user_id: ID of the user
+            pattern_type: Kind of event, e.g. 'question_topic'
+            content: The topic the event belongs to
+            metadata: Optional data; 'question_length' is accumulated for averages
+            
+        Returns:
+            bool: True (the event is always accepted)
+        """
+        metadata = metadata or {}
+        key = (user_id, content or 'general', pattern_type)
+        
+        with cls._pending_lock:
+            pending = cls._pending.setdefault(key, {'count': 0, 'length_total': 0, 'last_seen_at': None})
+            pending['count'] += 1
+            pending['length_total'] += int(metadata.get('question_length', 0) or 0)
+            pending['last_seen_at'] = datetime.now()
+            
+            flush_now = len(cls._pending) >= getattr(settings, 'AI_TUTOR_PATTERN_MAX_PENDING', 500)
+            if not flush_now and cls._flush_timer is None:
+                cls._flush_timer = threading.Timer(
+                    getattr(settings, 'AI_TUTOR_PATTERN_FLUSH_INTERVAL', 5),
+                    cls.flush_patterns
+                )
+                cls._flush_timer.daemon = True
+                cls._flush_timer.start()
+        
+        if flush_now:
+            cls.flush_patterns()
+        return True
+    
+    @classmethod
+    def flush_patterns(cls):
+        """
+        Write all coalesced pattern counters in a single bulk_write.
+        
+        Returns:
+            int: Number of (user, topic, pattern) counters written
+        """
+        with cls._pending_lock:
+            pending, cls._pending = cls._pending, {}
+            if cls._flush_timer is not None:
+                cls._flush_timer.cancel()
+                cls._flush_timer = None
+        
+        if not pending:
+            return 0
+            
+        if not is_mongo_available():
+            logger.warning(f"MongoDB unavailable - {len(pending)} learning pattern counters dropped")
+            return 0
+            
+        collection = cls.get_collection()
+        if collection is None or not hasattr(collection, 'bulk_write'):
+            logger.warning(f"MongoDB collection unavailable - {len(pending)} learning pattern counters dropped")
+            return 0
+        
+        try:
+            from pymongo import UpdateOne
+            
+            operations = []
+            for (user_id, topic, pattern_type), delta in pending.items():
+                prefix = f"counters.{pattern_type}"
+                operations.append(UpdateOne(
+                    {'user_id': user_id, 'topic': topic},
+                    {
+                        '$inc': {
+                            f"{prefix}.count": delta['count'],
+                            f"{prefix}.length_total": delta['length_total'],
+                        },
+                        '$max': {
+                            f"{prefix}.last_seen_at": delta['last_seen_at'],
+                            'updated_at': delta['last_seen_at'],
+                        },
+                        '$setOnInsert': {'created_at': datetime.now()},
+                    },
+                    upsert=True
+                ))
+            
+            collection.bulk_write(operations, ordered=False)
+            return len(operations)
+        except Exception as e:
+            logger.error(f"Error flushing learning pattern counters to MongoDB: {str(e)}")
+            return 0
+    
+    @classmethod
+    def get_topic_counters(cls, user_id, pattern_type='question_topic'):
+        """
+        Get a user's per-topic counters for one pattern type.
+        
+        Args:
+            user_id: ID of the user
+            pattern_type: Kind of event the counters were logged for
+            
+        Returns:
+            list: Dicts with 'topic', 'count', 'average_length' and 'last_seen_at',
+                most frequent topic first
+        """
+        counters = []
+        for pattern in cls.get_user_learning_patterns(user_id):
+            counter = (pattern.get('counters') or {}).get(pattern_type)
+            if not counter or not counter.get('count'):
+                continue
+            counters.append({
+                'topic': pattern.get('topic'),
+                'count': counter['count'],
+                'average_length': round(counter.get('length_total', 0) / counter['count'], 1),
+                'last_seen_at': counter.get('last_seen_at'),
+            })
+        
+        counters.sort(key=lambda counter: counter['count'], reverse=True)
+        return counters
+    
     @classmethod
     def update_learning_pattern(cls, user_id, topic, learning_style=None, difficulty_level=None, 
                                comprehension_score=None, engagement_metrics=None, metadata=None):
@@ -414,3 +680,7 @@ class UserLearningPattern:
         except Exception as e:
             logger.error(f"Error retrieving learning patterns from MongoDB: {str(e)}")
             return []
+
+
+# Write counters still buffered when the process exits
+atexit.register(UserLearningPattern.flush_patterns)
@@ -18,17 +18,44 @@ except ImportError:
 
 from django.conf import settings
 
+from .providers import ProviderUnavailable, get_router
+from .usage_service import record_usage
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
 class OpenAITutor:
     """Service for interacting with OpenAI for the AI Tutor feature."""
     
+    # Sampling parameters shared by interactive and batched completions
+    COMPLETION_PARAMS = {
+        'temperature': 0.7,
+        'max_tokens': 1500,
+        'presence_penalty': 0.1,
+        'frequency_penalty': 0.1,
+    }
+    
+    # Extra system-prompt guidance per topic family, matched by keyword in the topic
+    TOPIC_PROMPTS = {
+        'python': "Use idiomatic Python 3 with type hints where they help, and mention PEP 8 conventions.",
+        'javascript': "Use modern ES2015+ syntax and point out browser versus Node.js differences when relevant.",
+        'web': "Show HTML, CSS and JavaScript separately and mention accessibility where it applies.",
+        'algorithm': "State the time and space complexity of every algorithm you show.",
+        'data structure': "State the time and space complexity of the main operations you show.",
+        'sql': "Use standard SQL, and mention indexes and query plans when discussing performance.",
+        'database': "Use standard SQL, and mention indexes and query plans when discussing performance.",
+        'machine learning': "Use scikit-learn or NumPy for examples and explain the intuition before the maths.",
+    }
+    
     def __init__(self):
         """Initialize the OpenAI client with API key from settings or environment."""
         self.api_key = getattr(settings, 'OPENAI_API_KEY', os.getenv('OPENAI_API_KEY'))
+        self.model = getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo')
         self.client = None
         
+        # Interactive completions go through the provider router; the client is kept for batch work
+        self.router = get_router()
+        
         # Only try to initialize if OpenAI package is available
         if OPENAI_AVAILABLE:
             try:
@@ -42,7 +69,7 @@ class OpenAITutor:
         else:
             logger.warning("OpenAI package not installed. Using fallback response mode.")
     
-    def get_response(self, message, topic=None, conversation_history=None):
+    def get_response(self, message, topic=None, conversation_history=None, user_id=None, context_snippets=None):
         """
         Get a response from OpenAI based on the user's message and conversation history.
         If OpenAI is unavailable, provides intelligent fallback responses.
@@ -52,6 +79,8 @@ class OpenAITutor:
             topic (str, optional): The topic of conversation for context
             conversation_history (list, optional): List of previous messages in the format
                 [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+            user_id (int, optional): ID of the asking user, recorded in usage telemetry
+            context_snippets (list, optional): Course material passages to ground the answer in
                 
         Returns:
             str: The AI's response
@@ -64,44 +93,86 @@ class OpenAITutor:
         if conversation_history is None:
             conversation_history = []
             
-        # Create system message based on topic
-        system_message = self._create_system_message(topic)
-        
-        # If we have a valid OpenAI client, try to use it
-        if self.client:
+        # Route to the healthiest configured provider, failing over within the deadline
+        if self.router.providers:
             try:
                 # Prepare the messages for the API call
-                messages = [{"role": "system", "content": system_message}]
-                messages.extend(conversation_history)
-                messages.append({"role": "user", "content": message})
-                
-                # Add a small delay to simulate thinking
-                time.sleep(0.5)
+                messages = self.build_messages(message, topic, conversation_history, context_snippets)
                 
                 # Log the request
-                logger.info(f"Sending request to OpenAI with {len(messages)} messages")
-                
-                # Call the OpenAI API
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=1500,
-                    presence_penalty=0.1,
-                    frequency_penalty=0.1
-                )
+                logger.info(f"Sending request to providers with {len(messages)} messages")
                 
-                # Log success and return the content
-                logger.info("Successfully received response from OpenAI API")
-                return response.choices[0].message.content
+                result = self.complete(messages, topic=topic, user_id=user_id)
+                return result['content']
                 
-            except Exception as e:
+            except ProviderUnavailable as e:
                 # Log the error
-                logger.error(f"Error getting response from OpenAI: {str(e)}")
+                logger.error(f"No provider answered: {str(e)}")
                 # Fall through to use the intelligent fallback
         
         # If we reached here, we need to use the fallback response system
-        return self._generate_intelligent_response(message, topic)
+        started = time.perf_counter()
+        response_content = self._generate_intelligent_response(message, topic)
+        record_usage('fallback', (time.perf_counter() - started) * 1000, topic=topic, user_id=user_id)
+        return response_content
+    
+    def complete(self, messages, topic=None, user_id=None, deadline=None):
+        """
+        Get a completion through the provider router and record its usage.
+        
+        Args:
+            messages (list): Chat messages, as built by build_messages
+            topic (str, optional): Conversation topic, for usage telemetry
+            user_id (int, optional): ID of the asking user, for usage telemetry
+            deadline (float, optional): Seconds the request may take across retries
+            
+        Returns:
+            dict: 'content', token counts, 'provider', 'model' and 'latency_ms'
+            
+        Raises:
+            ProviderUnavailable: If no provider answered in time
+        """
+        result = self.router.complete(messages, self.COMPLETION_PARAMS, deadline=deadline)
+        logger.info(
+            f"Received response from {result['provider']} ({result['total_tokens']} tokens, "
+            f"{result['latency_ms']:.0f} ms)"
+        )
+        record_usage(
+            'upstream',
+            result['latency_ms'],
+            topic=topic,
+            user_id=user_id,
+            model=result['model'],
+            prompt_tokens=result['prompt_tokens'],
+            completion_tokens=result['completion_tokens']
+        )
+        return result
+    
+    def build_messages(self, message, topic=None, conversation_history=None, context_snippets=None):
+        """
+        Build the chat-completion message list for a request.
+        
+        Args:
+            message (str): The user's message
+            topic (str, optional): The topic of conversation for context
+            conversation_history (list, optional): Previous messages in chat format
+            context_snippets (list, optional): Course material passages to ground the answer in
+            
+        Returns:
+            list: Messages ready to send to the chat completions endpoint
+        """
+        messages = [{"role": "system", "content": self._create_system_message(topic)}]
+        if context_snippets:
+            messages.append({
+                "role": "system",
+                "content": (
+                    "Relevant excerpts from the student's course material. Base your answer on them "
+                    "where they apply:\n\n" + "\n\n".join(context_snippets)
+                )
+            })
+        messages.extend(conversation_history or [])
+        messages.append({"role": "user", "content": message})
+        return messages
     
     def _create_system_message(self, topic=None):
         """
@@ -128,11 +199,18 @@ class OpenAITutor:
         
         if topic:
             topic_context = f"The current topic is: {topic}. Focus your responses on this subject area."
+            
+            # Specialised guidance for topic families the tutor sees most
+            topic_lower = topic.lower()
+            for keyword, guidance in self.TOPIC_PROMPTS.items():
+                if keyword in topic_lower:
+                    topic_context = f"{topic_context} {guidance}"
+                    break
             return f"{base_message} {topic_context}"
         
         return base_message
     
-    def _generate_intelligent_response(self, message, topic=None):
+    def _generate_intelligent_response(self, message, topic=None, simulate_delay=True):
         """
         Generate an intelligent response when the OpenAI API is unavailable.
         This method analyzes the user's message to provide relevant, educational responses.
@@ -140,6 +218,7 @@ class OpenAITutor:
         Args:
             message (str): The user's message
             topic (str, optional): The conversation topic
+            simulate_delay (bool): Pause briefly to mimic a live model (off for batch work)
             
         Returns:
             str: An intelligent response that appears to come from a real AI tutor
@@ -148,7 +227,8 @@ class OpenAITutor:
         logger.info(f"Using intelligent response mode for message: {message[:50]}...")
         
         # Add a small delay to simulate thinking
-        time.sleep(1)
+        if simulate_delay:
+            time.sleep(1)
         
         # Convert message to lowercase for case-insensitive matching
         message_lower = message.lower()
@@ -161,6 +241,11 @@ class OpenAITutor:
                 "and technology. What specific topic would you like to explore today?"
             )
         
+        # Without keywords in the message itself, fall back on the topic for routing
+        known_terms = ['python', 'javascript', 'js', 'html', 'css', 'web', 'algorithm', 'data structure', 'coding']
+        if topic and not any(term in message_lower for term in known_terms):
+            message_lower = f"{message_lower} {topic.lower()}"
+        
         # Python-related responses
         if 'python' in message_lower:
             if any(term in message_lower for term in ['function', 'def', 'method']):
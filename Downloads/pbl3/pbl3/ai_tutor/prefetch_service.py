@@ -0,0 +1,329 @@
+"""
+Speculative prefetch of AI Tutor follow-up answers.
+Every tutor reply ends with a suggested follow-up question. After a reply is sent,
+the follow-up is extracted and answered in a low-priority background worker, and
+the answer is kept in the response cache under the reply it follows up. When the
+student answers that reply with the suggested question (or simply accepts it), the
+answer is served at once. Speculation is capped by a daily token budget, which each
+prefetch reserves from before it calls the model, and hits, misses and spend are
+counted so the hit rate can be checked against what prefetching costs.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from .openai_service import OpenAITutor
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Replies that accept the suggested follow-up rather than restating it
+AFFIRMATIVE_REPLIES = {
+    'yes', 'yes please', 'yeah', 'yep', 'sure', 'ok', 'okay', 'please', 'go ahead',
+    'tell me more', 'sounds good', 'yes i would', 'yes id like that',
+}
+
+# Tutor phrasings turned into the question a student would send
+FOLLOW_UP_PREFIXES = [
+    (r"^would you like (?:me )?to (?:learn|know|hear) (?:more )?about ", "Tell me about "),
+    (r"^would you like to (?:explore|learn|see|try) ", "Show me "),
+    (r"^would you like me to ", "Please "),
+    (r"^do you want to (?:learn|know) (?:more )?about ", "Tell me about "),
+]
+
+METRICS = ('issued', 'hits', 'misses', 'skipped_budget', 'skipped_busy', 'failed', 'tokens')
+
+# Background worker pool with lazy initialization
+_executor = None
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def extract_follow_up(reply):
+    """
+    Extract the suggested follow-up question from the end of a tutor reply.
+
+    Args:
+        reply (str): Tutor response in Markdown
+
+    Returns:
+        str: The follow-up question, or None when the reply does not end with one
+    """
+    if not reply:
+        return None
+
+    # Ignore code blocks - a question mark inside code is not a suggestion
+    text = re.sub(r"```.*?```", " ", reply, flags=re.DOTALL)
+    last_paragraph = text.strip().split('\n\n')[-1].strip()
+    sentences = re.split(r"(?<=[.!?])\s+", last_paragraph.replace('\n', ' '))
+    question = sentences[-1].strip() if sentences else ''
+    if not question.endswith('?') or len(question) < 10:
+        return None
+    return re.sub(r"[*_`]", '', question)
+
+
+def as_student_question(follow_up):
+    """Rephrase a tutor's suggestion ("Would you like to learn about X?") as the student's request."""
+    for pattern, replacement in FOLLOW_UP_PREFIXES:
+        rephrased, count = re.subn(pattern, replacement, follow_up, count=1, flags=re.IGNORECASE)
+        if count:
+            return rephrased.rstrip('?') + '.'
+    return follow_up
+
+
+def normalize(message):
+    """Normalise a message for matching: lowercase, punctuation stripped, whitespace collapsed."""
+    return ' '.join(re.sub(r"[^\w\s]", '', (message or '').lower()).split())
+
+
+def reply_digest(reply):
+    """Identify a tutor reply, so a prefetch is only served in answer to the reply it was made for."""
+    return hashlib.sha256((reply or '').encode('utf-8')).hexdigest()[:32]
+
+
+def _latest_key(session_id):
+    return f"ai_tutor:prefetch:latest:{session_id}"
+
+
+def _entry_key(session_id, digest):
+    return f"ai_tutor:prefetch:session:{session_id}:{digest}"
+
+
+def _metric_key(metric, day=None):
+    return f"ai_tutor:prefetch:{metric}:{(day or timezone.localdate()).isoformat()}"
+
+
+def _count(metric, amount=1):
+    """Increment a daily prefetch counter in the cache. Returns the new value."""
+    key = _metric_key(metric)
+    cache.add(key, 0, 60 * 60 * 24 * 8)
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        cache.set(key, amount, 60 * 60 * 24 * 8)
+        return amount
+
+
+def _lower_priority():
+    """Run prefetch worker threads at a lower scheduling priority than request threads."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+def get_prefetch_executor():
+    """
+    Get the prefetch worker pool, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: The shared prefetch pool
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'AI_TUTOR_PREFETCH_WORKERS', 1),
+            thread_name_prefix='tutor-prefetch',
+            initializer=_lower_priority
+        )
+
+    return _executor
+
+
+def budget_remaining():
+    """Tokens left in today's speculative prefetch budget."""
+    budget = getattr(settings, 'AI_TUTOR_PREFETCH_DAILY_TOKENS', 200000)
+    return budget - (cache.get(_metric_key('tokens')) or 0)
+
+
+def _reserve_budget():
+    """
+    Reserve the tokens of one prefetch from today's budget.
+
+    The reservation is a single atomic increment of the spend counter, so workers
+    in different processes can not all pass the check before any of them has spent.
+
+    Returns:
+        int: Tokens reserved, or 0 when the budget does not cover another prefetch
+    """
+    budget = getattr(settings, 'AI_TUTOR_PREFETCH_DAILY_TOKENS', 200000)
+    reserve = getattr(settings, 'AI_TUTOR_PREFETCH_TOKEN_RESERVE', 2000)
+    if _count('tokens', reserve) > budget:
+        _count('tokens', -reserve)
+        return 0
+    return reserve
+
+
+def get_prefetched(session_id, message, topic=None):
+    """
+    Look up a prefetched answer for the next message of a chat session.
+
+    Only an answer prefetched for the session's latest reply is served. The entry
+    is consumed on a hit, and discarded after a different message, since the
+    conversation has moved on.
+
+    Returns:
+        str: The prefetched answer, or None
+    """
+    if not session_id:
+        return None
+
+    digest = cache.get(_latest_key(session_id))
+    if not digest:
+        return None
+    key = _entry_key(session_id, digest)
+    entry = cache.get(key)
+    if not entry:
+        return None
+    cache.delete(key)
+
+    asked = normalize(message)
+    if entry['reply'] != digest or entry['topic'] != (topic or ''):
+        _count('misses')
+        return None
+    if asked in entry['matches'] or asked in AFFIRMATIVE_REPLIES:
+        _count('hits')
+        return entry['response']
+
+    _count('misses')
+    return None
+
+
+def _generate(tutor, question, topic, history, user_id):
+    """Answer a speculative question. Returns (content, tokens used)."""
+    if not tutor.router.providers:
+        return tutor._generate_intelligent_response(question, topic, simulate_delay=False), 0
+
+    result = tutor.complete(
+        tutor.build_messages(question, topic, history),
+        topic=topic,
+        user_id=user_id,
+        deadline=getattr(settings, 'AI_TUTOR_PREFETCH_DEADLINE', 60)
+    )
+    return result['content'], result['total_tokens']
+
+
+def _prefetch(session_id, digest, follow_up, topic, history, user_id):
+    """Body of a prefetch task, run in the background pool."""
+    global _pending
+
+    reserved = 0
+    try:
+        # The budget may have been spent while this task was queued
+        reserved = _reserve_budget()
+        if not reserved:
+            _count('skipped_budget')
+            return
+
+        question = as_student_question(follow_up)
+        content, tokens = _generate(OpenAITutor(), question, topic, history, user_id)
+        # Settle the reservation against what the answer actually cost
+        _count('tokens', tokens - reserved)
+        reserved = 0
+
+        cache.set(_entry_key(session_id, digest), {
+            'reply': digest,
+            'matches': {normalize(follow_up), normalize(question)},
+            'topic': topic or '',
+            'response': content,
+        }, getattr(settings, 'AI_TUTOR_PREFETCH_TIMEOUT', 60 * 15))
+    except Exception as e:
+        if reserved:
+            _count('tokens', -reserved)
+        _count('failed')
+        logger.warning(f"Speculative prefetch failed for session {session_id}: {str(e)}")
+    finally:
+        with _pending_lock:
+            _pending -= 1
+        # Worker threads keep their own database connections - do not leak them
+        connections.close_all()
+
+
+def schedule_follow_up(session_id, reply, topic=None, conversation_history=None, user_id=None):
+    """
+    Queue a speculative answer to the follow-up suggested at the end of a reply.
+
+    Args:
+        session_id (str): Chat session the reply belongs to
+        reply (str): The tutor reply that was just sent
+        topic (str, optional): Conversation topic
+        conversation_history (list, optional): History the reply was generated from,
+            in chat format, without the reply itself
+        user_id (int, optional): ID of the user, recorded in usage telemetry
+
+    Returns:
+        bool: True if a prefetch was queued
+    """
+    global _pending
+
+    if not getattr(settings, 'AI_TUTOR_PREFETCH_ENABLED', True) or not session_id:
+        return False
+
+    # This reply is now the one the student answers; prefetches for earlier replies no longer apply
+    digest = reply_digest(reply)
+    cache.set(_latest_key(session_id), digest, getattr(settings, 'AI_TUTOR_PREFETCH_TIMEOUT', 60 * 15))
+
+    follow_up = extract_follow_up(reply)
+    if not follow_up:
+        return False
+
+    if budget_remaining() <= 0:
+        _count('skipped_budget')
+        return False
+
+    # Speculation never queues up behind itself - when the pool is busy, skip
+    with _pending_lock:
+        busy = _pending >= getattr(settings, 'AI_TUTOR_PREFETCH_MAX_PENDING', 20)
+        if not busy:
+            _pending += 1
+    if busy:
+        _count('skipped_busy')
+        return False
+
+    history = list(conversation_history or []) + [{'role': 'assistant', 'content': reply}]
+    try:
+        get_prefetch_executor().submit(_prefetch, session_id, digest, follow_up, topic, history, user_id)
+    except RuntimeError as e:
+        with _pending_lock:
+            _pending -= 1
+        logger.warning(f"Could not queue speculative prefetch: {str(e)}")
+        return False
+
+    _count('issued')
+    return True
+
+
+def prefetch_stats(days=7):
+    """
+    Daily prefetch counters and hit rate over the last `days` days.
+
+    Returns:
+        dict: {'days': {date: counters}, 'total': counters}, where counters include
+            'hit_rate' (hits per issued prefetch)
+    """
+    today = timezone.localdate()
+    per_day = {}
+    total = dict.fromkeys(METRICS, 0)
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        values = cache.get_many([_metric_key(metric, day) for metric in METRICS])
+        counters = {metric: values.get(_metric_key(metric, day), 0) for metric in METRICS}
+        for metric in METRICS:
+            total[metric] += counters[metric]
+        per_day[day.isoformat()] = counters
+
+    for counters in list(per_day.values()) + [total]:
+        counters['hit_rate'] = round(counters['hits'] / counters['issued'], 4) if counters['issued'] else 0
+
+    return {'days': dict(sorted(per_day.items())), 'total': total}
@@ -0,0 +1,231 @@
+"""
+LLM provider routing for the AI Tutor.
+Chat completions can be served by several configured backends: hosted OpenAI
+models and OpenAI-compatible servers such as a small model running on the same
+box (llama.cpp, Ollama, vLLM). Each backend keeps EWMA health scores of its
+latency and error rate; requests go to the healthiest backend first and fail
+over to the next one while the request's deadline allows. The built-in response
+engine in OpenAITutor remains the final, local tier.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+
+# Try to import OpenAI, handle gracefully if not available
+try:
+    from openai import OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DEMO_API_KEY = 'sk-demo-development-key-for-testing-only'
+
+# Router with lazy initialization
+_router = None
+
+
+class ProviderUnavailable(Exception):
+    """Raised when no backend produced a completion within the deadline."""
+
+
+class ProviderHealth:
+    """Exponentially weighted latency and error rate of one backend."""
+
+    def __init__(self, expected_latency_ms, alpha=None):
+        self.alpha = alpha or getattr(settings, 'AI_TUTOR_PROVIDER_EWMA_ALPHA', 0.2)
+        self.latency_ms = float(expected_latency_ms)
+        self.error_rate = 0.0
+        self.samples = 0
+        self.last_failure = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, latency_ms, ok):
+        with self.lock:
+            # The first observation replaces the configured prior outright
+            alpha = 1.0 if self.samples == 0 else self.alpha
+            if ok or self.samples == 0:
+                self.latency_ms += alpha * (latency_ms - self.latency_ms)
+            self.error_rate += alpha * ((0.0 if ok else 1.0) - self.error_rate)
+            self.samples += 1
+            if not ok:
+                self.last_failure = time.monotonic()
+
+    def score(self):
+        """Lower is better: latency inflated by the error rate."""
+        penalty = getattr(settings, 'AI_TUTOR_PROVIDER_ERROR_PENALTY', 10)
+        return self.latency_ms * (1 + penalty * self.error_rate)
+
+    def is_tripped(self):
+        """A backend failing most requests is rested for a cooldown before it is probed again."""
+        cooldown = getattr(settings, 'AI_TUTOR_PROVIDER_COOLDOWN', 30)
+        return self.error_rate >= 0.5 and time.monotonic() - self.last_failure < cooldown
+
+    def as_dict(self):
+        return {
+            'latency_ms': round(self.latency_ms, 1),
+            'error_rate': round(self.error_rate, 4),
+            'samples': self.samples,
+            'score': round(self.score(), 1),
+            'tripped': self.is_tripped(),
+        }
+
+
+class OpenAICompatibleProvider:
+    """A chat-completions backend: the OpenAI API or any server exposing the same API."""
+
+    def __init__(self, name, model, api_key=None, base_url=None, timeout=20, expected_latency_ms=2000):
+        self.name = name
+        self.model = model
+        self.timeout = timeout
+        self.health = ProviderHealth(expected_latency_ms)
+        # Retries are the router's job, so the client itself never retries
+        self.client = OpenAI(api_key=api_key or 'not-needed', base_url=base_url or None, max_retries=0)
+
+    def complete(self, messages, params, timeout):
+        """
+        Request one completion.
+
+        Returns:
+            dict: 'content', 'prompt_tokens', 'completion_tokens' and 'total_tokens'
+        """
+        response = self.client.with_options(timeout=timeout).chat.completions.create(
+            model=self.model,
+            messages=messages,
+            **params
+        )
+        usage = getattr(response, 'usage', None)
+        return {
+            'content': response.choices[0].message.content,
+            'prompt_tokens': getattr(usage, 'prompt_tokens', 0),
+            'completion_tokens': getattr(usage, 'completion_tokens', 0),
+            'total_tokens': getattr(usage, 'total_tokens', 0),
+        }
+
+
+class ProviderRouter:
+    """Routes completions across backends by health, failing over within a deadline."""
+
+    def __init__(self, providers):
+        self.providers = providers
+
+    def ranked(self):
+        """
+        Backends in the order they should be tried: unmeasured ones first, then
+        healthy ones by score, tripped ones last. A small share of requests lead
+        with a random healthy backend so every score keeps being refreshed.
+        """
+        ranked = sorted(
+            self.providers,
+            key=lambda provider: (provider.health.is_tripped(), provider.health.samples > 0, provider.health.score())
+        )
+        healthy = [provider for provider in ranked if not provider.health.is_tripped()]
+        if len(healthy) > 1 and random.random() < getattr(settings, 'AI_TUTOR_PROVIDER_EXPLORE', 0.05):
+            probe = random.choice(healthy[1:])
+            ranked.remove(probe)
+            ranked.insert(0, probe)
+        return ranked
+
+    def complete(self, messages, params, deadline=None):
+        """
+        Get a completion from the healthiest backend that answers in time.
+
+        Args:
+            messages (list): Chat messages
+            params (dict): Sampling parameters
+            deadline (float, optional): Seconds the whole request may take
+
+        Returns:
+            dict: Completion fields plus 'provider', 'model' and 'latency_ms'
+
+        Raises:
+            ProviderUnavailable: If every backend failed or the deadline passed
+        """
+        deadline = deadline or getattr(settings, 'AI_TUTOR_REQUEST_DEADLINE', 20)
+        expires = time.monotonic() + deadline
+        errors = []
+
+        for provider in self.ranked():
+            remaining = expires - time.monotonic()
+            if remaining <= 0.5:
+                errors.append('deadline reached')
+                break
+
+            started = time.perf_counter()
+            try:
+                result = provider.complete(messages, params, timeout=min(provider.timeout, remaining))
+            except Exception as e:
+                latency_ms = (time.perf_counter() - started) * 1000
+                provider.health.record(latency_ms, ok=False)
+                logger.warning(f"Provider {provider.name} failed after {latency_ms:.0f} ms: {str(e)}")
+                errors.append(f"{provider.name}: {str(e)}")
+                continue
+
+            latency_ms = (time.perf_counter() - started) * 1000
+            provider.health.record(latency_ms, ok=True)
+            return {**result, 'provider': provider.name, 'model': provider.model, 'latency_ms': latency_ms}
+
+        raise ProviderUnavailable('; '.join(errors) or 'no providers configured')
+
+    def health_report(self):
+        """Health scores of every backend."""
+        return {provider.name: provider.health.as_dict() for provider in self.providers}
+
+
+def provider_configs():
+    """
+    Backend definitions from settings.AI_TUTOR_PROVIDERS, or a single OpenAI
+    backend built from OPENAI_API_KEY / OPENAI_MODEL when it is not set.
+    """
+    configs = getattr(settings, 'AI_TUTOR_PROVIDERS', None)
+    if configs is not None:
+        return configs
+
+    api_key = getattr(settings, 'OPENAI_API_KEY', os.getenv('OPENAI_API_KEY'))
+    if not api_key or api_key == DEMO_API_KEY:
+        return []
+    return [{
+        'name': 'openai',
+        'model': getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'),
+        'api_key': api_key,
+    }]
+
+
+def get_router():
+    """
+    Get the provider router, building it from settings on first use.
+
+    Returns:
+        ProviderRouter: The shared router (with no providers when none are usable)
+    """
+    global _router
+
+    if _router is None:
+        providers = []
+        if OPENAI_AVAILABLE:
+            for config in provider_configs():
+                try:
+                    providers.append(OpenAICompatibleProvider(
+                        name=config['name'],
+                        model=config['model'],
+                        api_key=config.get('api_key'),
+                        base_url=config.get('base_url'),
+                        timeout=config.get('timeout', 20),
+                        expected_latency_ms=config.get('expected_latency_ms', 2000)
+                    ))
+                except Exception as e:
+                    logger.error(f"Error initializing provider {config.get('name')}: {str(e)}")
+        else:
+            logger.warning("OpenAI package not installed. No upstream providers available.")
+
+        _router = ProviderRouter(providers)
+        logger.info(f"Provider router started with {[provider.name for provider in providers]}")
+
+    return _router
@@ -0,0 +1,290 @@
+"""
+Local retrieval over course lesson content for the AI Tutor.
+Lessons are split into passages and indexed into LessonChunk / LessonTerm rows
+whenever a courses.Lesson is saved. Tutor questions are scored with BM25 against
+the passages of the student's enrolled courses: a confident match is answered
+straight from the course material without a model call, otherwise the top
+passages are sent to the model as context.
+"""
+
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.db.models.signals import post_delete, post_save
+
+from .models import LessonChunk, LessonTerm
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Target passage size in words
+PASSAGE_WORDS = 120
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_+#]+")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'do', 'does', 'for', 'from',
+    'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'so', 'that',
+    'the', 'their', 'then', 'there', 'these', 'this', 'to', 'was', 'we', 'what', 'when', 'where',
+    'which', 'who', 'why', 'will', 'with', 'you', 'your', 'explain', 'please', 'tell', 'about',
+}
+
+STATS_CACHE_KEY = 'ai_tutor:retrieval:corpus_stats'
+
+
+def tokenize(text):
+    """Lowercase terms of a text, without stopwords and with plural 's' removed."""
+    terms = []
+    for token in TOKEN_PATTERN.findall((text or '').lower()):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(token[:50])
+    return terms
+
+
+def split_passages(content, max_words=PASSAGE_WORDS):
+    """Split lesson content into passages of about max_words words, on paragraph boundaries."""
+    passages, current = [], []
+    for paragraph in re.split(r"\n\s*\n", content or ''):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and len(current) + len(words) > max_words:
+            passages.append(' '.join(current))
+            current = []
+        # Paragraphs longer than a passage are cut into several
+        while len(words) > max_words:
+            passages.append(' '.join(words[:max_words]))
+            words = words[max_words:]
+        current.extend(words)
+    if current:
+        passages.append(' '.join(current))
+    return passages
+
+
+@transaction.atomic
+def index_lesson(lesson):
+    """
+    (Re)index one lesson, replacing its previous passages.
+
+    Args:
+        lesson (courses.Lesson): The lesson to index
+
+    Returns:
+        int: Number of passages indexed
+    """
+    LessonChunk.objects.filter(lesson_id=lesson.pk).delete()
+    course = lesson.module.course
+
+    postings = []
+    passages = split_passages(lesson.content)
+    for position, text in enumerate(passages):
+        # The lesson title is indexed with every passage so it matches title words
+        terms = Counter(tokenize(f"{lesson.title} {text}"))
+        chunk = LessonChunk.objects.create(
+            lesson_id=lesson.pk,
+            course_id=course.pk,
+            course_title=course.title,
+            lesson_title=lesson.title,
+            position=position,
+            text=text,
+            length=sum(terms.values())
+        )
+        postings.extend(
+            LessonTerm(term=term, chunk=chunk, course_id=course.pk, frequency=min(count, 32767))
+            for term, count in terms.items()
+        )
+
+    LessonTerm.objects.bulk_create(postings, batch_size=500)
+    cache.delete(STATS_CACHE_KEY)
+    return len(passages)
+
+
+def remove_lesson(lesson_id):
+    """Drop a lesson's passages from the index."""
+    LessonChunk.objects.filter(lesson_id=lesson_id).delete()
+    cache.delete(STATS_CACHE_KEY)
+
+
+def rebuild_index():
+    """
+    Reindex every lesson of the courses app.
+
+    Returns:
+        int: Number of lessons indexed
+    """
+    try:
+        Lesson = apps.get_model('courses', 'Lesson')
+    except LookupError:
+        logger.warning("courses app not installed - lesson index left empty")
+        return 0
+
+    indexed = 0
+    for lesson in Lesson.objects.select_related('module__course').iterator():
+        index_lesson(lesson)
+        indexed += 1
+    return indexed
+
+
+def reindex_saved_lesson(sender, instance, **kwargs):
+    """Keep the index in step with lesson edits. Never blocks the save."""
+    try:
+        index_lesson(instance)
+    except Exception as e:
+        logger.error(f"Error indexing lesson {instance.pk}: {str(e)}")
+
+
+def unindex_deleted_lesson(sender, instance, **kwargs):
+    """Remove a deleted lesson's passages."""
+    remove_lesson(instance.pk)
+
+
+def connect_lesson_signals():
+    """Keep the index in step with lessons, when the courses app is installed."""
+    if not apps.is_installed('courses'):
+        logger.info("courses app not installed - lesson index signals not connected")
+        return
+    Lesson = apps.get_model('courses', 'Lesson')
+    post_save.connect(reindex_saved_lesson, sender=Lesson, dispatch_uid='ai_tutor.reindex_saved_lesson')
+    post_delete.connect(unindex_deleted_lesson, sender=Lesson, dispatch_uid='ai_tutor.unindex_deleted_lesson')
+
+
+def _corpus_stats():
+    """(passage count, average passage length), cached until the index changes."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        totals = LessonChunk.objects.aggregate(count=Count('id'), avg_length=Avg('length'))
+        stats = (totals['count'], totals['avg_length'] or 0)
+        cache.set(STATS_CACHE_KEY, stats, 60 * 60)
+    return stats
+
+
+def enrolled_course_ids(user):
+    """IDs of the courses a user is (or was) actively enrolled in."""
+    if not getattr(user, 'is_authenticated', False):
+        return []
+    try:
+        Enrollment = apps.get_model('courses', 'Enrollment')
+    except LookupError:
+        return []
+    return list(
+        Enrollment.objects.filter(student=user, status__in=['active', 'completed'])
+        .values_list('course_id', flat=True)
+    )
+
+
+def search(question, course_ids, limit=3):
+    """
+    Rank the passages of the given courses against a question with BM25.
+
+    Args:
+        question (str): The student's question
+        course_ids (list): Courses to search
+        limit (int): Number of passages to return
+
+    Returns:
+        list: Dicts with 'chunk' (LessonChunk), 'score' and 'coverage' (share of
+            the question's IDF weight matched by the passage), best first
+    """
+    terms = set(tokenize(question))
+    if not terms or not course_ids:
+        return []
+
+    passage_count, avg_length = _corpus_stats()
+    if not passage_count:
+        return []
+
+    document_frequency = dict(
+        LessonTerm.objects.filter(term__in=terms)
+        .values('term')
+        .annotate(df=Count('id'))
+        .values_list('term', 'df')
+    )
+    idf = {
+        term: math.log(1 + (passage_count - document_frequency.get(term, 0) + 0.5)
+                       / (document_frequency.get(term, 0) + 0.5))
+        for term in terms
+    }
+    total_idf = sum(idf.values())
+
+    scores, matched_idf = defaultdict(float), defaultdict(float)
+    postings = LessonTerm.objects.filter(term__in=terms, course_id__in=course_ids).values_list(
+        'chunk_id', 'term', 'frequency', 'chunk__length'
+    )
+    for chunk_id, term, frequency, length in postings:
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (avg_length or 1))
+        scores[chunk_id] += idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+        matched_idf[chunk_id] += idf[term]
+
+    best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+    chunks = LessonChunk.objects.in_bulk([chunk_id for chunk_id, _ in best])
+    return [
+        {
+            'chunk': chunks[chunk_id],
+            'score': round(score, 4),
+            'coverage': round(matched_idf[chunk_id] / total_idf, 4) if total_idf else 0,
+        }
+        for chunk_id, score in best
+        if chunk_id in chunks
+    ]
+
+
+def format_snippet(chunk):
+    """Passage text labelled with its course and lesson, for use as model context."""
+    return f"[{chunk.course_title} - {chunk.lesson_title}]\n{chunk.text}"
+
+
+def answer_from_lessons(question, user):
+    """
+    Answer a question from the student's course material when possible.
+
+    Returns:
+        tuple: (answer, snippets) - answer is a complete tutor reply for a
+            high-confidence match (else None), snippets are the top passages
+            formatted as model context
+    """
+    try:
+        results = search(
+            question,
+            enrolled_course_ids(user),
+            limit=getattr(settings, 'AI_TUTOR_RETRIEVAL_TOP_K', 3)
+        )
+    except Exception as e:
+        logger.warning(f"Lesson retrieval failed: {str(e)}")
+        return None, []
+
+    if not results:
+        return None, []
+
+    best = results[0]
+    confident = (
+        len(set(tokenize(question))) >= 2
+        and best['coverage'] >= getattr(settings, 'AI_TUTOR_RETRIEVAL_MIN_COVERAGE', 0.85)
+        and best['score'] >= getattr(settings, 'AI_TUTOR_RETRIEVAL_MIN_SCORE', 5.0)
+    )
+    if confident:
+        chunk = best['chunk']
+        answer = (
+            f"Your course **{chunk.course_title}** covers this in the lesson **{chunk.lesson_title}**:\n\n"
+            f"{chunk.text}\n\n"
+            "Would you like me to explain any part of this lesson in more detail?"
+        )
+        return answer, []
+
+    # Only passages that share a fair part of the question are worth their prompt tokens
+    min_coverage = getattr(settings, 'AI_TUTOR_RETRIEVAL_CONTEXT_COVERAGE', 0.3)
+    return None, [format_snippet(result['chunk']) for result in results if result['coverage'] >= min_coverage]
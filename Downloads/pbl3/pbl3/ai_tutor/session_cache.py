@@ -0,0 +1,200 @@
+"""
+Hot conversation history cache for AI Tutor sessions.
+The last AI_TUTOR_HISTORY_CACHE_MESSAGES messages of each session are kept in the
+shared Django cache and in a small in-process LRU, and are updated on write by
+AiTutorSession.add_message, so building a prompt needs no MongoDB read.
+
+Every write bumps a per-session version number in the shared cache and stores
+the history under a key containing that version. A worker trusts its local copy
+only while its version matches the shared one, so workers never serve each
+other's stale history; any gap (eviction, a concurrent write) is a cache miss
+that re-primes from MongoDB.
+
+With a per-process cache backend (no REDIS_URL) workers can not see each
+other's versions, so the cache is bypassed and history is read from MongoDB;
+warn_if_bypassed() logs a warning about it at startup when DEBUG is off.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache import cache_is_shared
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# In-process LRU of session_id -> (version, messages)
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _version_key(session_id):
+    return f"ai_tutor:history:{session_id}:version"
+
+
+def _data_key(session_id, version):
+    return f"ai_tutor:history:{session_id}:v{version}"
+
+
+def max_messages():
+    """Number of recent messages cached per session."""
+    return getattr(settings, 'AI_TUTOR_HISTORY_CACHE_MESSAGES', 10)
+
+
+def _timeout():
+    return getattr(settings, 'AI_TUTOR_HISTORY_CACHE_TIMEOUT', 60 * 60 * 2)
+
+
+def _remember(session_id, version, messages):
+    """Store a history in the in-process LRU, evicting the least recently used session."""
+    with _local_lock:
+        _local[session_id] = (version, messages)
+        _local.move_to_end(session_id)
+        while len(_local) > getattr(settings, 'AI_TUTOR_HISTORY_LRU_SIZE', 1000):
+            _local.popitem(last=False)
+
+
+def _recall(session_id, version):
+    """History from the in-process LRU, if it is at `version`."""
+    with _local_lock:
+        entry = _local.get(session_id)
+        if entry is None or entry[0] != version:
+            return None
+        _local.move_to_end(session_id)
+        return entry[1]
+
+
+def warn_if_bypassed():
+    """Log a warning when the history cache is off because the cache backend is per-process."""
+    if cache_is_shared() or settings.DEBUG:
+        return False
+    logger.warning(
+        "AI Tutor history cache is disabled: the default cache is per-process, so every prompt "
+        "reads its history from MongoDB. Set REDIS_URL to enable it."
+    )
+    return True
+
+
+def _bump_version(session_id):
+    """
+    Atomically advance a session's version.
+    A version key that was evicted restarts from the clock, never from a number
+    that older, still cached history keys may carry.
+    """
+    key = _version_key(session_id)
+    cache.add(key, int(time.time() * 1000), _timeout())
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, _timeout())
+        return version
+
+
+def to_cached_message(message):
+    """Reduce a session message document to the fields needed for prompts."""
+    timestamp = message.get('timestamp')
+    return {
+        'id': message.get('id'),
+        'sender': message.get('sender'),
+        'content': message.get('content', ''),
+        'timestamp': timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp,
+    }
+
+
+def get_history(session_id):
+    """
+    Cached recent messages of a session, oldest first.
+
+    Returns:
+        list: Cached messages, or None on a miss
+    """
+    if not cache_is_shared():
+        return None
+    try:
+        version = cache.get(_version_key(session_id))
+        if version is None:
+            return None
+
+        messages = _recall(session_id, version)
+        if messages is None:
+            messages = cache.get(_data_key(session_id, version))
+            if messages is None:
+                return None
+            _remember(session_id, version, messages)
+        return list(messages)
+    except Exception as e:
+        logger.warning(f"Could not read cached history for session {session_id}: {str(e)}")
+        return None
+
+
+def current_version(session_id):
+    """The session's current history version, created if it has none."""
+    key = _version_key(session_id)
+    cache.add(key, int(time.time() * 1000), _timeout())
+    return cache.get(key)
+
+
+def prime(session_id, messages, version):
+    """
+    Cache a history read from MongoDB.
+
+    Args:
+        session_id: ID of the session
+        messages (list): Recent messages, oldest first
+        version (int): Version read with current_version() BEFORE reading MongoDB,
+            so a history newer than the read is never overwritten
+    """
+    if not cache_is_shared():
+        return
+    try:
+        messages = [to_cached_message(message) for message in messages][-max_messages():]
+        if cache.add(_data_key(session_id, version), messages, _timeout()):
+            _remember(session_id, version, messages)
+    except Exception as e:
+        logger.warning(f"Could not cache history for session {session_id}: {str(e)}")
+
+
+def append(session_id, message):
+    """
+    Write-through: add a message that was just stored in MongoDB.
+
+    The new history is built from the previous version only; if that version is
+    not cached the new one is left uncached, and the next read re-primes from MongoDB.
+    """
+    if not cache_is_shared():
+        return
+    try:
+        version = _bump_version(session_id)
+        previous = _recall(session_id, version - 1)
+        if previous is None:
+            previous = cache.get(_data_key(session_id, version - 1))
+        if previous is None:
+            return
+
+        message = to_cached_message(message)
+        # A prime that raced this write may already contain the message
+        if message['id'] and any(cached['id'] == message['id'] for cached in previous):
+            messages = list(previous)
+        else:
+            messages = (list(previous) + [message])[-max_messages():]
+
+        cache.set(_data_key(session_id, version), messages, _timeout())
+        _remember(session_id, version, messages)
+    except Exception as e:
+        logger.warning(f"Could not update cached history for session {session_id}: {str(e)}")
+
+
+def invalidate(session_id):
+    """Drop a session's cached history on every worker."""
+    try:
+        _bump_version(session_id)
+        with _local_lock:
+            _local.pop(session_id, None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached history for session {session_id}: {str(e)}")
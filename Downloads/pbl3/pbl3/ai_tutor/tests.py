@@ -1,3 +1,263 @@
-from django.test import TestCase
+import os
+import time
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import session_cache
+from .batch_service import CLAIM_PREFIX, BatchGenerationQueue, enqueue_concept_explanation
+from .judge_service import (
+    JUDGE_AVAILABLE, JudgeUnavailable, get_judge_pool, judge_enabled, judge_submission, run_test_case
+)
+from .models import GenerationJob, PracticeProblem, ProblemAttempt
+from .prefetch_service import _prefetch, budget_remaining, get_prefetched, reply_digest
+
+SLEEPER = (
+    "import signal, time\n"
+    "signal.signal(signal.SIGALRM, signal.SIG_IGN)\n"
+    "def solve(x):\n"
+    "    time.sleep(8)\n"
+    "    return x\n"
+)
+
+
+def make_problem(**kwargs):
+    defaults = {
+        'title': 'Double',
+        'description': 'Return twice the input.',
+        'topic': 'python',
+        'function_name': 'solve',
+        'test_cases': [{'input': [2], 'expected': 4}, {'input': [5], 'expected': 10}],
+        'time_limit_ms': 500,
+    }
+    defaults.update(kwargs)
+    return PracticeProblem(**defaults)
+
+
+class JudgeIsolationTests(SimpleTestCase):
+    @override_settings(AI_TUTOR_JUDGE_UID=None, AI_TUTOR_JUDGE_ISOLATED=False)
+    def test_refuses_to_run_without_isolation(self):
+        self.assertFalse(judge_enabled())
+        with self.assertRaises(JudgeUnavailable):
+            judge_submission(make_problem(), "def solve(x):\n    return 2 * x\n", use_cache=False)
+
+    @override_settings(AI_TUTOR_JUDGE_UID=os.getuid(), AI_TUTOR_JUDGE_ISOLATED=False)
+    def test_web_user_uid_is_not_isolation(self):
+        self.assertFalse(judge_enabled())
+
+    @override_settings(AI_TUTOR_JUDGE_UID=65534, AI_TUTOR_JUDGE_ISOLATED=False)
+    def test_sandbox_uid_needs_a_root_web_process(self):
+        with mock.patch('os.getuid', return_value=1000), mock.patch('os.geteuid', return_value=1000):
+            self.assertFalse(judge_enabled())
+        with mock.patch('os.getuid', return_value=0), mock.patch('os.geteuid', return_value=0):
+            self.assertTrue(judge_enabled())
+
+
+@unittest.skipUnless(JUDGE_AVAILABLE, "the judge needs fork() and rlimits")
+class RunTestCaseTests(SimpleTestCase):
+    def test_correct_solution(self):
+        result = run_test_case("def solve(x):\n    return 2 * x\n", 'solve', [3], 1000, 128)
+        self.assertTrue(result['ok'])
+        self.assertEqual(result['actual'], 6)
+
+    def test_busy_loop_hits_cpu_limit(self):
+        result = run_test_case("def solve(x):\n    while True:\n        pass\n", 'solve', [1], 500, 128)
+        self.assertFalse(result['ok'])
+        self.assertEqual(result['error'], 'Time limit exceeded')
+
+    def test_sandbox_sees_only_its_result_pipe(self):
+        source = (
+            "import os\n"
+            "def solve(x):\n"
+            "    fds = []\n"
+            "    for fd in range(3, 4096):\n"
+            "        try:\n"
+            "            os.fstat(fd)\n"
+            "            fds.append(fd)\n"
+            "        except OSError:\n"
+            "            pass\n"
+            "    return [fds, sorted(os.environ)]\n"
+        )
+        # Descriptors the judge's caller holds must not reach the solution
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-secret'}):
+            result = run_test_case(source, 'solve', [1], 1000, 128)
+        self.assertTrue(result['ok'], result)
+        self.assertEqual(result['actual'], [[3], []])
+
+    def test_blocking_solution_is_killed_at_wall_deadline(self):
+        started = time.monotonic()
+        result = run_test_case(SLEEPER, 'solve', [1], 500, 128)
+        self.assertFalse(result['ok'])
+        self.assertEqual(result['error'], 'Time limit exceeded')
+        # 2x the limit plus the grace period, far below the 8 s the solution asked for
+        self.assertLess(time.monotonic() - started, 3)
+
+
+@unittest.skipUnless(JUDGE_AVAILABLE, "the judge needs fork() and rlimits")
+@override_settings(AI_TUTOR_JUDGE_ISOLATED=True, AI_TUTOR_JUDGE_WORKERS=2)
+class JudgeSubmissionTests(SimpleTestCase):
+    def test_blocking_submission_does_not_hold_the_pool(self):
+        started = time.monotonic()
+        report = judge_submission(make_problem(), SLEEPER, use_cache=False)
+        self.assertFalse(report['passed'])
+        self.assertLess(time.monotonic() - started, 5)
+
+        report = judge_submission(make_problem(), "def solve(x):\n    return 2 * x\n", use_cache=False)
+        self.assertTrue(report['passed'])
+
+    def test_pool_is_rebuilt_after_a_worker_dies(self):
+        with self.assertRaises(BrokenProcessPool):
+            get_judge_pool().submit(os._exit, 1).result()
+        report = judge_submission(make_problem(), "def solve(x):\n    return 2 * x\n", use_cache=False)
+        self.assertTrue(report['passed'])
+
+
+class SubmitSolutionViewTests(TestCase):
+    def test_anonymous_users_can_not_submit(self):
+        response = self.client.post(
+            reverse('ai_tutor:submit_solution'),
+            data={'problem_id': 1, 'solution': 'import os'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(AI_TUTOR_JUDGE_UID=None, AI_TUTOR_JUDGE_ISOLATED=False)
+    def test_unisolated_judge_is_unavailable(self):
+        user = get_user_model().objects.create_user('student', password='secret')
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('ai_tutor:submit_solution'),
+            data={'problem_id': 1, 'solution': 'import os'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 503)
+
+
+class SessionCacheTests(SimpleTestCase):
+    @override_settings(DEBUG=False)
+    def test_warns_when_the_cache_is_per_process(self):
+        with self.assertLogs('ai_tutor.session_cache', 'WARNING'):
+            self.assertTrue(session_cache.warn_if_bypassed())
+        with mock.patch.object(session_cache, 'cache_is_shared', return_value=True):
+            self.assertFalse(session_cache.warn_if_bypassed())
+
+
+class ProblemAttemptTests(TestCase):
+    def test_record_returns_current_counts(self):
+        user = get_user_model().objects.create_user('student')
+        problem = make_problem()
+        problem.save()
+        for passed in (False, True, True):
+            attempt = ProblemAttempt.record(user, problem, passed)
+        self.assertEqual((attempt.attempts, attempt.solved), (3, True))
+        problem.refresh_from_db()
+        self.assertEqual((problem.attempt_count, problem.solve_count), (1, 1))
+
+
+@override_settings(AI_TUTOR_INVENTORY_BUCKETS=[('python', 'beginner')])
+class NextProblemViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('student', password='secret')
+
+    def test_requires_login_and_post(self):
+        url = reverse('ai_tutor:next_problem')
+        self.assertEqual(self.client.post(url, {'topic': 'python'}).status_code, 302)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url, {'topic': 'python'}).status_code, 405)
+
+    def test_unknown_bucket_queues_nothing(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('ai_tutor:next_problem'), {'topic': 'anything at all', 'difficulty': 'beginner'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GenerationJob.objects.exists())
+
+    def test_claims_a_ready_problem(self):
+        problem = make_problem(inventory_state='ready', source='generated')
+        problem.save()
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('ai_tutor:next_problem'), {'topic': 'python', 'difficulty': 'beginner'})
+        self.assertEqual(response.json()['problem']['id'], problem.pk)
+        problem.refresh_from_db()
+        self.assertEqual((problem.inventory_state, problem.claimed_by), ('claimed', self.user))
+
+
+@override_settings(AI_TUTOR_PREFETCH_DAILY_TOKENS=4500, AI_TUTOR_PREFETCH_TOKEN_RESERVE=2000)
+class PrefetchTests(SimpleTestCase):
+    FIRST = "Loops repeat code. Would you like to learn about while loops?"
+    SECOND = "Functions group code. Would you like to learn about arguments?"
+
+    def setUp(self):
+        cache.clear()
+
+    def prefetch(self, reply, tokens=100):
+        from . import prefetch_service
+        prefetch_service._pending += 1
+        with mock.patch.object(prefetch_service, '_generate', return_value=(f"answer to {reply}", tokens)), \
+                mock.patch.object(prefetch_service, 'OpenAITutor'):
+            _prefetch('s1', reply_digest(reply), reply.split('. ')[-1], 'python', [], None)
+
+    def test_serves_the_answer_prefetched_for_the_latest_reply(self):
+        cache.set('ai_tutor:prefetch:latest:s1', reply_digest(self.FIRST))
+        self.prefetch(self.FIRST)
+        self.assertEqual(get_prefetched('s1', 'yes please', 'python'), f"answer to {self.FIRST}")
+        self.assertIsNone(get_prefetched('s1', 'yes please', 'python'))
+
+    def test_late_prefetch_for_an_earlier_reply_is_not_served(self):
+        cache.set('ai_tutor:prefetch:latest:s1', reply_digest(self.SECOND))
+        self.prefetch(self.FIRST)
+        self.assertIsNone(get_prefetched('s1', 'yes please', 'python'))
+
+    def test_prefetches_reserve_from_the_budget(self):
+        cache.set('ai_tutor:prefetch:latest:s1', reply_digest(self.FIRST))
+        self.prefetch(self.FIRST, tokens=1500)
+        self.prefetch(self.FIRST, tokens=1500)
+        self.assertEqual(budget_remaining(), 1500)
+        # A third reservation would overrun the budget, so the model is not called
+        self.prefetch(self.FIRST, tokens=1500)
+        self.assertEqual(budget_remaining(), 1500)
+
+
+class RecordingBackend:
+    """Batch backend that records which jobs were already claimed when a batch was uploaded."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.claimed = None
+
+    def submit(self, requests):
+        self.claimed = list(GenerationJob.objects.values_list('status', 'batch_id'))
+        if self.fail:
+            raise ConnectionError("upload failed")
+        return 'batch_1'
+
+
+class BatchSubmissionTests(TestCase):
+    def setUp(self):
+        enqueue_concept_explanation('Recursion')
+        enqueue_concept_explanation('Closures')
+
+    def test_jobs_are_claimed_before_the_upload(self):
+        backend = RecordingBackend()
+        self.assertEqual(BatchGenerationQueue(backend=backend).submit_pending(), 2)
+        self.assertTrue(all(
+            status == 'submitted' and batch_id.startswith(CLAIM_PREFIX) for status, batch_id in backend.claimed
+        ))
+        self.assertEqual(set(GenerationJob.objects.values_list('status', 'batch_id')), {('submitted', 'batch_1')})
+
+    def test_failed_upload_returns_jobs_to_the_queue(self):
+        BatchGenerationQueue(backend=RecordingBackend(fail=True)).submit_pending()
+        self.assertEqual(set(GenerationJob.objects.values_list('status', 'batch_id')), {('pending', '')})
+
+    @override_settings(AI_TUTOR_BATCH_CLAIM_TIMEOUT=0)
+    def test_interrupted_claims_are_released(self):
+        GenerationJob.objects.update(status='submitted', batch_id=f"{CLAIM_PREFIX}dead")
+        self.assertEqual(BatchGenerationQueue.release_stale_claims(), 2)
+        self.assertEqual(GenerationJob.objects.filter(status='pending').count(), 2)
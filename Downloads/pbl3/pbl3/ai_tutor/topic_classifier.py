@@ -0,0 +1,310 @@
+"""
+Local topic classifier for AI Tutor questions.
+A linear model over hashed word and character n-grams, trained from the user
+messages of tutor sessions whose topic the student set, tags questions that
+arrive without a topic. The topic is then used for the system prompt, the
+response caches and usage telemetry.
+
+Hashing keeps the model stateless apart from its weights, so a prediction is
+a few dozen weight-row lookups and costs microseconds.
+"""
+
+import logging
+import math
+import os
+import pickle
+import random
+import re
+import time
+import zlib
+from collections import Counter
+
+# Try to import scikit-learn, handle gracefully if not available
+try:
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from sklearn.linear_model import SGDClassifier
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+from django.conf import settings
+from django.utils import timezone
+
+from utils.mongodb import is_mongo_available
+from .mongo_models import AiTutorSession
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\b\w\w+\b")
+
+# Loaded model with lazy initialization, reloaded when the file changes
+_model = None
+_model_mtime = None
+
+
+def _model_path():
+    return getattr(settings, 'AI_TUTOR_CLASSIFIER_PATH', os.path.join(settings.BASE_DIR, 'var', 'topic_classifier.pkl'))
+
+
+def normalize_topic(topic):
+    """Canonical form of a student-entered topic label."""
+    return ' '.join((topic or '').split()).title()
+
+
+class TopicClassifier:
+    """
+    Hashed word (1-2 gram) and character (3-4 gram) features with a linear model.
+    scikit-learn fits the weights; predictions score the handful of non-zero
+    features directly against a contiguous weight matrix, skipping the
+    per-call validation overhead of the estimator API.
+    """
+
+    N_FEATURES = 2 ** 18
+
+    def __init__(self, classifier=None, metrics=None):
+        self.classifier = classifier or SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=30, tol=None, random_state=0)
+        self.metrics = metrics or {}
+        self._prepare()
+
+    def _prepare(self):
+        """Lay the fitted weights out as (feature, class) for fast row lookups."""
+        if hasattr(self.classifier, 'coef_'):
+            self.weights = np.ascontiguousarray(self.classifier.coef_.T)
+            self.intercept = self.classifier.intercept_
+            self.classes = [str(label) for label in self.classifier.classes_]
+        else:
+            self.weights = self.intercept = self.classes = None
+
+    @classmethod
+    def _hashed(cls, grams, offset):
+        """L2-normalised hashed counts of n-grams, in the feature block starting at offset."""
+        counts = Counter(zlib.crc32(gram.encode('utf-8')) % cls.N_FEATURES + offset for gram in grams)
+        norm = math.sqrt(sum(count * count for count in counts.values())) or 1.0
+        return {index: count / norm for index, count in counts.items()}
+
+    @classmethod
+    def features(cls, text):
+        """Sparse feature vector of a text as {index: value}."""
+        words = WORD_PATTERN.findall(text.lower())
+        word_grams = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        char_grams = []
+        for word in words:
+            padded = f" {word} "
+            for size in (3, 4):
+                char_grams.extend(padded[start:start + size] for start in range(len(padded) - size + 1))
+        return {**cls._hashed(word_grams, 0), **cls._hashed(char_grams, cls.N_FEATURES)}
+
+    @classmethod
+    def matrix(cls, texts):
+        """Feature matrix for training."""
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            for column, value in cls.features(text).items():
+                rows.append(row)
+                columns.append(column)
+                values.append(value)
+        return csr_matrix((values, (rows, columns)), shape=(len(texts), 2 * cls.N_FEATURES))
+
+    def fit(self, texts, labels):
+        self.classifier.fit(self.matrix(texts), labels)
+        self._prepare()
+        return self
+
+    def predict(self, text):
+        """Return (topic, probability) for one question."""
+        features = self.features(text)
+        indices = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+        values = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+        scores = values @ self.weights[indices] + self.intercept
+
+        # One-vs-rest logistic scores, normalised as SGDClassifier.predict_proba does
+        probabilities = 1.0 / (1.0 + np.exp(-scores))
+        if len(self.classes) == 2:
+            probabilities = np.array([1.0 - probabilities[0], probabilities[0]])
+        else:
+            probabilities = probabilities / (probabilities.sum() or 1.0)
+        best = int(np.argmax(probabilities))
+        return self.classes[best], float(probabilities[best])
+
+    def __getstate__(self):
+        return {'classifier': self.classifier, 'metrics': self.metrics}
+
+    def __setstate__(self, state):
+        self.__init__(state['classifier'], state['metrics'])
+
+
+def load_training_data(min_examples=None):
+    """
+    Collect (question, topic) pairs from tutor sessions with a student-set topic.
+
+    Topics with fewer than min_examples questions are left out.
+
+    Returns:
+        tuple: (texts, labels)
+    """
+    min_examples = min_examples or getattr(settings, 'AI_TUTOR_CLASSIFIER_MIN_EXAMPLES', 20)
+    if not is_mongo_available():
+        return [], []
+    collection = AiTutorSession.get_collection()
+    if collection is None:
+        return [], []
+
+    texts, labels = [], []
+    sessions = collection.find(
+        {'topic': {'$nin': [None, '']}},
+        projection={'topic': 1, 'messages.content': 1, 'messages.sender': 1}
+    )
+    for session in sessions:
+        topic = normalize_topic(session.get('topic'))
+        for message in session.get('messages', []):
+            if message.get('sender') == 'user' and message.get('content'):
+                texts.append(message['content'])
+                labels.append(topic)
+
+    counts = Counter(labels)
+    keep = [index for index, label in enumerate(labels) if counts[label] >= min_examples]
+    return [texts[index] for index in keep], [labels[index] for index in keep]
+
+
+def _split(texts, labels, test_size, seed=0):
+    """Stratified train/test split."""
+    by_label = {}
+    for text, label in zip(texts, labels):
+        by_label.setdefault(label, []).append(text)
+
+    rng = random.Random(seed)
+    train, test = [], []
+    for label, examples in by_label.items():
+        rng.shuffle(examples)
+        cut = max(1, int(len(examples) * test_size))
+        test.extend((text, label) for text in examples[:cut])
+        train.extend((text, label) for text in examples[cut:])
+    return train, test
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))] if ordered else 0
+
+
+def evaluate(model, test):
+    """Accuracy and single-question latency of a model on held-out examples."""
+    correct, latencies_us = 0, []
+    per_topic = Counter()
+    per_topic_correct = Counter()
+    for text, label in test:
+        started = time.perf_counter()
+        predicted, _ = model.predict(text)
+        latencies_us.append((time.perf_counter() - started) * 1_000_000)
+        per_topic[label] += 1
+        if predicted == label:
+            correct += 1
+            per_topic_correct[label] += 1
+
+    return {
+        'accuracy': round(correct / len(test), 4) if test else 0,
+        'per_topic_accuracy': {
+            label: round(per_topic_correct[label] / count, 4) for label, count in sorted(per_topic.items())
+        },
+        'latency_p50_us': round(_percentile(latencies_us, 50), 1),
+        'latency_p99_us': round(_percentile(latencies_us, 99), 1),
+    }
+
+
+def train(test_size=0.2, min_examples=None, save=True):
+    """
+    Train a classifier from stored sessions, report on a held-out split and save it.
+
+    The saved model is refitted on all examples after evaluation.
+
+    Returns:
+        dict: Report with example counts, topics, accuracy and latency
+
+    Raises:
+        RuntimeError: If scikit-learn is missing or there is too little data
+    """
+    if not SKLEARN_AVAILABLE:
+        raise RuntimeError("scikit-learn is not installed")
+
+    texts, labels = load_training_data(min_examples)
+    topics = sorted(set(labels))
+    if len(topics) < 2:
+        raise RuntimeError("At least two topics with enough questions are needed to train")
+
+    train_set, test_set = _split(texts, labels, test_size)
+    model = TopicClassifier().fit([text for text, _ in train_set], [label for _, label in train_set])
+    report = {
+        'examples': len(texts),
+        'train_examples': len(train_set),
+        'test_examples': len(test_set),
+        'topics': topics,
+        **evaluate(model, test_set),
+    }
+
+    model = TopicClassifier(metrics={**report, 'trained_at': timezone.now().isoformat()}).fit(texts, labels)
+    if save:
+        path = _model_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as output:
+            pickle.dump(model, output)
+        # Atomic replace, so workers never load a half-written file
+        os.replace(temporary, path)
+    return report
+
+
+def get_classifier():
+    """
+    Get the trained classifier, loading it on first use and again whenever the
+    model file is replaced by a retraining run.
+
+    Returns:
+        TopicClassifier or None: None when scikit-learn or a trained model is missing
+    """
+    global _model, _model_mtime
+
+    if not SKLEARN_AVAILABLE:
+        return None
+
+    path = _model_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    if _model is None or mtime != _model_mtime:
+        try:
+            with open(path, 'rb') as model_file:
+                _model = pickle.load(model_file)
+            _model_mtime = mtime
+            logger.info(f"Loaded topic classifier trained at {_model.metrics.get('trained_at')}")
+        except Exception as e:
+            logger.error(f"Error loading topic classifier: {str(e)}")
+            return None
+
+    return _model
+
+
+def classify_topic(message):
+    """
+    Tag a question with a topic.
+
+    Returns:
+        str: The predicted topic, or '' when there is no model or it is not
+            confident enough (AI_TUTOR_CLASSIFIER_MIN_CONFIDENCE)
+    """
+    model = get_classifier()
+    if model is None or not message:
+        return ''
+
+    try:
+        topic, probability = model.predict(message)
+    except Exception as e:
+        logger.warning(f"Topic classification failed: {str(e)}")
+        return ''
+
+    if probability < getattr(settings, 'AI_TUTOR_CLASSIFIER_MIN_CONFIDENCE', 0.6):
+        return ''
+    return topic
@@ -7,12 +7,17 @@ urlpatterns = [
     # AI Tutor main views
     path('', views.AiTutorHomeView.as_view(), name='home'),
     path('chat/', views.AiTutorChatView.as_view(), name='chat'),
-    path('chat/<int:session_id>/', views.AiTutorChatView.as_view(), name='chat_session'),
+    path('chat/<str:session_id>/', views.AiTutorChatView.as_view(), name='chat_session'),
+    path('sessions/', views.SessionHistoryView.as_view(), name='session_history'),
     
     # Explanations and concept clarification
     path('explain/', views.ExplainConceptView.as_view(), name='explain_concept'),
     
     # Problem solving and practice
     path('practice/', views.PracticeProblemsView.as_view(), name='practice_problems'),
+    path('practice/next/', views.NextProblemView.as_view(), name='next_problem'),
     path('practice/submit/', views.SubmitSolutionView.as_view(), name='submit_solution'),
+    
+    # Usage telemetry
+    path('stats/usage/', views.UsageStatsView.as_view(), name='usage_stats'),
 ]
@@ -0,0 +1,201 @@
+"""
+Usage telemetry for the AI Tutor.
+Every tutor call appends a compact TutorUsageRecord (tokens, latency, path, topic
+and user). Records are rolled up per day and topic into TutorUsageRollup rows
+with a latency histogram, so percentiles and cost can be reported cheaply.
+"""
+
+import bisect
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TutorUsageRecord, TutorUsageRollup
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 8000, 13000, 20000, 30000]
+
+PERCENTILES = (50, 90, 99)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimate the cost in USD of a call from its token counts, priced by settings.OPENAI_PRICING."""
+    # Models without a price (e.g. the local fallback engine) cost nothing
+    pricing = getattr(settings, 'OPENAI_PRICING', {})
+    prompt_price, completion_price = pricing.get(model, (0, 0))
+    cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+    return Decimal(str(round(cost, 6)))
+
+
+def record_usage(path, latency_ms, topic=None, user_id=None, model='', prompt_tokens=0, completion_tokens=0):
+    """
+    Append a usage record for one tutor call. Never raises.
+
+    Args:
+        path (str): 'upstream', 'cache', 'retrieval' or 'fallback'
+        latency_ms (int): Time spent producing the answer
+        topic (str, optional): Conversation topic
+        user_id (int, optional): ID of the user who asked
+        model (str, optional): Model that produced the answer
+        prompt_tokens (int): Prompt tokens billed upstream
+        completion_tokens (int): Completion tokens billed upstream
+    """
+    try:
+        TutorUsageRecord.objects.create(
+            user_id=user_id,
+            topic=(topic or '')[:100],
+            path=path,
+            model=model or '',
+            prompt_tokens=prompt_tokens or 0,
+            completion_tokens=completion_tokens or 0,
+            latency_ms=max(int(latency_ms), 0),
+            cost_usd=estimate_cost(model, prompt_tokens or 0, completion_tokens or 0)
+        )
+    except Exception as e:
+        logger.warning(f"Could not record tutor usage: {str(e)}")
+
+
+def _empty_histogram():
+    return [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+
+def _empty_rollup():
+    return {
+        'calls': 0,
+        'upstream_calls': 0,
+        'cache_hits': 0,
+        'retrieval_answers': 0,
+        'fallback_calls': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'cost_usd': Decimal('0'),
+        'latency_total_ms': 0,
+        'latency_histogram': _empty_histogram(),
+    }
+
+
+def _histogram_percentile(histogram, percentile):
+    """Estimate a percentile (upper bucket bound, in ms) from a latency histogram."""
+    total = sum(histogram)
+    if not total:
+        return 0
+    rank = percentile / 100 * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            if index < len(LATENCY_BUCKETS_MS):
+                return LATENCY_BUCKETS_MS[index]
+            return LATENCY_BUCKETS_MS[-1]
+    return LATENCY_BUCKETS_MS[-1]
+
+
+def _aggregate(records):
+    """Fold usage record values into a rollup dict keyed by topic."""
+    rollups = {}
+    for record in records:
+        rollup = rollups.setdefault(record['topic'], _empty_rollup())
+        rollup['calls'] += 1
+        if record['path'] == 'upstream':
+            rollup['upstream_calls'] += 1
+        elif record['path'] == 'cache':
+            rollup['cache_hits'] += 1
+        elif record['path'] == 'retrieval':
+            rollup['retrieval_answers'] += 1
+        else:
+            rollup['fallback_calls'] += 1
+        rollup['prompt_tokens'] += record['prompt_tokens']
+        rollup['completion_tokens'] += record['completion_tokens']
+        rollup['cost_usd'] += record['cost_usd']
+        rollup['latency_total_ms'] += record['latency_ms']
+        rollup['latency_histogram'][bisect.bisect_left(LATENCY_BUCKETS_MS, record['latency_ms'])] += 1
+    return rollups
+
+
+def _records_for_day(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return TutorUsageRecord.objects.filter(
+        created_at__gte=start,
+        created_at__lt=start + timedelta(days=1)
+    ).values('topic', 'path', 'prompt_tokens', 'completion_tokens', 'cost_usd', 'latency_ms').iterator()
+
+
+def rollup_day(day):
+    """
+    (Re)build the TutorUsageRollup rows for one day.
+
+    Returns:
+        int: Number of topic rollups written
+    """
+    rollups = _aggregate(_records_for_day(day))
+    with transaction.atomic():
+        TutorUsageRollup.objects.filter(day=day).exclude(topic__in=list(rollups)).delete()
+        for topic, values in rollups.items():
+            TutorUsageRollup.objects.update_or_create(day=day, topic=topic, defaults=values)
+    return len(rollups)
+
+
+def _summarise(rollup):
+    """Turn rollup values into the shape returned by the stats endpoint."""
+    calls = rollup['calls']
+    summary = {
+        'calls': calls,
+        'upstream_calls': rollup['upstream_calls'],
+        'cache_hits': rollup['cache_hits'],
+        'fallback_calls': rollup['fallback_calls'],
+        'cache_hit_rate': round(rollup['cache_hits'] / calls, 4) if calls else 0,
+        'retrieval_answers': rollup['retrieval_answers'],
+        'prompt_tokens': rollup['prompt_tokens'],
+        'completion_tokens': rollup['completion_tokens'],
+        'cost_usd': float(rollup['cost_usd']),
+        'latency_avg_ms': round(rollup['latency_total_ms'] / calls) if calls else 0,
+    }
+    for percentile in PERCENTILES:
+        summary[f'latency_p{percentile}_ms'] = _histogram_percentile(rollup['latency_histogram'], percentile)
+    return summary
+
+
+def _merge(target, rollup):
+    for field in ('calls', 'upstream_calls', 'cache_hits', 'retrieval_answers', 'fallback_calls',
+                  'prompt_tokens', 'completion_tokens', 'cost_usd', 'latency_total_ms'):
+        target[field] += rollup[field]
+    target['latency_histogram'] = [a + b for a, b in zip(target['latency_histogram'], rollup['latency_histogram'])]
+
+
+def usage_stats(days=7):
+    """
+    Usage statistics per day and per topic over the last `days` days.
+
+    Closed days are read from TutorUsageRollup; today is aggregated live from records.
+
+    Returns:
+        dict: {'days': {...}, 'topics': {...}, 'total': {...}}
+    """
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+
+    per_day = {}
+    for rollup in TutorUsageRollup.objects.filter(day__gte=first_day, day__lt=today).values():
+        per_day.setdefault(rollup['day'], {})[rollup['topic']] = rollup
+    per_day[today] = _aggregate(_records_for_day(today))
+
+    day_totals, topic_totals, total = {}, {}, _empty_rollup()
+    for day, topics in per_day.items():
+        day_total = day_totals.setdefault(day.isoformat(), _empty_rollup())
+        for topic, rollup in topics.items():
+            _merge(day_total, rollup)
+            _merge(topic_totals.setdefault(topic or 'general', _empty_rollup()), rollup)
+            _merge(total, rollup)
+
+    return {
+        'days': {day: _summarise(values) for day, values in sorted(day_totals.items())},
+        'topics': {topic: _summarise(values) for topic, values in sorted(topic_totals.items())},
+        'total': _summarise(total),
+    }
@@ -4,9 +4,12 @@ from django.http import JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.core.paginator import Paginator
+from django.db.models import F, FilteredRelation, Q
 import json
 import logging
 import os
+import time
 from datetime import datetime
 
 # Import MongoDB models
@@ -14,6 +17,27 @@ from .mongo_models import AiTutorSession, LearningActivity, UserLearningPattern
 
 # Import OpenAI service
 from .openai_service import OpenAITutor
+from .providers import get_router
+
+# Deferred (batched) generation for non-interactive content
+from .batch_service import enqueue_concept_explanation
+from .models import SimpleConcept, PracticeProblem, ProblemAttempt
+
+# Practice problem judge
+from .judge_service import JudgeUnavailable, judge_enabled, judge_submission
+from .inventory_service import claim_problem
+
+# Usage telemetry
+from .usage_service import record_usage, usage_stats
+
+# Speculative follow-up prefetch
+from .prefetch_service import get_prefetched, prefetch_stats, schedule_follow_up
+
+# Local retrieval over lesson content
+from .retrieval_service import answer_from_lessons
+
+# Local topic classifier for questions without a topic
+from .topic_classifier import classify_topic
 
 logger = logging.getLogger(__name__)
 
@@ -82,6 +106,24 @@ class AiTutorHomeView(TemplateView):
         return context
 
 
+def format_session_summary(session):
+    """Format a session document for the chat sidebar"""
+    # Get the last message if available
+    last_message = ''
+    if session.get('messages') and len(session['messages']) > 0:
+        last_message = session['messages'][-1]['content']
+        if len(last_message) > 50:
+            last_message = last_message[:50] + '...'
+    
+    return {
+        'id': str(session['_id']),
+        'title': session.get('title', 'Untitled Session'),
+        'topic': session.get('topic') or '',
+        'last_message': last_message,
+        'timestamp': session.get('updated_at', datetime.now()).strftime('%Y-%m-%d %H:%M')
+    }
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class AiTutorChatView(LoginRequiredMixin, View):
     template_name = 'ai_tutor/chat.html'
@@ -93,30 +135,11 @@ class AiTutorChatView(LoginRequiredMixin, View):
             'session_id': kwargs.get('session_id', 'new'),
         }
         
-        # Get user's recent sessions from MongoDB
+        # Get the first page of the user's sessions from MongoDB; the sidebar loads more on scroll
         if request.user.is_authenticated:
-            # Get recent sessions from MongoDB
-            user_sessions = AiTutorSession.get_user_sessions(request.user.id, limit=5)
-            
-            # Format sessions for the UI
-            recent_sessions = []
-            for session in user_sessions:
-                # Get the last message if available
-                last_message = ''
-                if session.get('messages') and len(session['messages']) > 0:
-                    last_message = session['messages'][-1]['content']
-                    if len(last_message) > 50:
-                        last_message = last_message[:50] + '...'
-                
-                # Format session data
-                recent_sessions.append({
-                    'id': str(session['_id']),
-                    'title': session.get('title', 'Untitled Session'),
-                    'last_message': last_message,
-                    'timestamp': session.get('updated_at', datetime.now()).strftime('%Y-%m-%d %H:%M')
-                })
-            
-            context['recent_sessions'] = recent_sessions
+            user_sessions, next_cursor = AiTutorSession.get_user_sessions_page(request.user.id, limit=20)
+            context['recent_sessions'] = [format_session_summary(session) for session in user_sessions]
+            context['next_cursor'] = next_cursor
         else:
             # Provide empty list for non-authenticated users
             context['recent_sessions'] = []
@@ -242,16 +265,45 @@ class AiTutorChatView(LoginRequiredMixin, View):
             except Exception as e:
                 logger.warning(f"Could not get conversation history: {str(e)}")
             
-            # Generate response using OpenAI - this should never fail with the new resilient implementation
-            openai_tutor = OpenAITutor()
-            logger.info(f"Processing request for user {request.user.id}, topic: {topic}")
+            # Questions without a topic are tagged by the local classifier; the inferred topic
+            # routes this request only and is not stored on the session
+            effective_topic = topic or classify_topic(user_message)
             
-            # Get the response - our implementation guarantees this won't throw exceptions
-            response_content = openai_tutor.get_response(
-                message=user_message,
-                topic=topic,
-                conversation_history=conversation_history
-            )
+            # Serve a speculatively prefetched answer when the student took the suggested follow-up
+            started = time.perf_counter()
+            context_snippets = []
+            response_content = get_prefetched(session_id, user_message, effective_topic)
+            if response_content is not None:
+                record_usage('cache', (time.perf_counter() - started) * 1000, topic=effective_topic, user_id=request.user.id)
+            else:
+                # Answer from the student's course material, or pass the best passages as context
+                response_content, context_snippets = answer_from_lessons(user_message, request.user)
+                if response_content is not None:
+                    record_usage('retrieval', (time.perf_counter() - started) * 1000, topic=effective_topic, user_id=request.user.id)
+            
+            if response_content is None:
+                # Generate response using OpenAI - this should never fail with the new resilient implementation
+                openai_tutor = OpenAITutor()
+                logger.info(f"Processing request for user {request.user.id}, topic: {effective_topic}")
+                
+                # Get the response - our implementation guarantees this won't throw exceptions
+                response_content = openai_tutor.get_response(
+                    message=user_message,
+                    topic=effective_topic,
+                    conversation_history=conversation_history,
+                    user_id=request.user.id,
+                    context_snippets=context_snippets
+                )
+            
+            # Start answering the follow-up this reply suggests, in the background
+            if not session_id.startswith('temp_'):
+                schedule_follow_up(
+                    session_id,
+                    response_content,
+                    topic=effective_topic,
+                    conversation_history=conversation_history + [{'role': 'user', 'content': user_message}],
+                    user_id=request.user.id
+                )
             
             # Log the successful response
             logger.info(f"Generated response for user {request.user.id}, length: {len(response_content)}")
@@ -465,11 +517,22 @@ class ExplainConceptView(TemplateView):
         concept = self.request.GET.get('concept', None)
         
         if concept:
-            # In a real implementation, fetch the concept details from a database
-            # For demo, we'll hard-code a sample concept
+            # Serve a generated explanation if one exists, otherwise queue one for the
+            # batch worker instead of blocking the page on a synchronous model call
+            stored_concept = SimpleConcept.objects.filter(title__iexact=concept).first()
+            if stored_concept:
+                description = stored_concept.content
+            else:
+                try:
+                    enqueue_concept_explanation(concept)
+                except Exception as e:
+                    logger.warning(f"Could not queue concept explanation: {str(e)}")
+                description = 'A detailed explanation of this concept is being prepared. Check back shortly.'
+            
             context['concept'] = {
                 'title': concept,
-                'description': 'This is a detailed explanation of the concept...',
+                'description': description,
+                'is_pending': stored_concept is None,
                 'examples': [
                     {
                         'title': 'Basic Example',
@@ -492,22 +555,93 @@ class ExplainConceptView(TemplateView):
 
 class PracticeProblemsView(TemplateView):
     template_name = 'ai_tutor/practice_problems.html'
+    paginate_by = 12
+    
+    SORT_ORDERS = {
+        'recent': ['-created_at'],
+        'popular': ['-attempt_count'],
+        'difficulty': ['difficulty', 'title'],
+    }
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # In a real implementation, fetch problems from a database with filtering
-        # Sample data for demonstration
         topic_filter = self.request.GET.get('topic', None)
         difficulty = self.request.GET.get('difficulty', None)
+        tag = self.request.GET.get('tag', None)
+        sort = self.request.GET.get('sort', 'difficulty')
+        if sort not in self.SORT_ORDERS:
+            sort = 'difficulty'
+        
+        # Filtering, ordering and paging all happen in the database on indexed columns
+        # Unclaimed inventory problems are held back for NextProblemView
+        problems = PracticeProblem.objects.exclude(inventory_state='ready').defer('test_cases', 'starter_code', 'hint')
+        if topic_filter:
+            problems = problems.filter(topic=topic_filter)
+        if difficulty:
+            problems = problems.filter(difficulty=difficulty)
+        if tag:
+            problems = problems.filter(tags__slug=tag)
+        
+        # Join the user's solved/attempted state in the same query
+        if self.request.user.is_authenticated:
+            problems = problems.annotate(
+                user_attempt=FilteredRelation('attempts', condition=Q(attempts__user=self.request.user))
+            ).annotate(
+                user_attempts=F('user_attempt__attempts'),
+                user_solved=F('user_attempt__solved')
+            )
         
-        # For demo purposes, we'll ignore the filters and return all problems
-        # In production, this would apply the filters to a database query
+        problems = problems.order_by(*self.SORT_ORDERS[sort]).prefetch_related('tags')
+        
+        paginator = Paginator(problems, self.paginate_by)
+        page_obj = paginator.get_page(self.request.GET.get('page'))
+        
+        context['problems'] = page_obj.object_list
+        context['page_obj'] = page_obj
+        context['topics'] = (
+            PracticeProblem.objects.order_by('topic').values_list('topic', flat=True).distinct()
+        )
+        context['difficulties'] = PracticeProblem.DIFFICULTY_CHOICES
+        context['current_topic'] = topic_filter
+        context['current_difficulty'] = difficulty
+        context['current_tag'] = tag
+        context['current_sort'] = sort
         
         return context
 
 
-class SubmitSolutionView(View):
+class NextProblemView(LoginRequiredMixin, View):
+    """Claim a fresh, pre-generated practice problem from the inventory"""
+    
+    def post(self, request, *args, **kwargs):
+        topic = request.POST.get('topic', '').strip()
+        difficulty = request.POST.get('difficulty', 'beginner')
+        try:
+            problem = claim_problem(request.user, topic, difficulty)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Unknown topic or difficulty'}, status=400)
+        if problem is None:
+            return JsonResponse({
+                'status': 'pending',
+                'message': 'New problems for this topic are being prepared. Please try again shortly.'
+            }, status=202)
+        
+        return JsonResponse({
+            'status': 'success',
+            'problem': {
+                'id': problem.id,
+                'title': problem.title,
+                'description': problem.description,
+                'topic': problem.topic,
+                'difficulty': problem.difficulty,
+                'starter_code': problem.starter_code,
+                'hint': problem.hint,
+            }
+        })
+
+
+class SubmitSolutionView(LoginRequiredMixin, View):
     """Handle solution submissions for practice problems"""
     
     def post(self, request, *args, **kwargs):
@@ -516,35 +650,41 @@ class SubmitSolutionView(View):
             problem_id = data.get('problem_id')
             solution = data.get('solution')
             
-            # In a real implementation, this would:
-            # 1. Validate the solution (maybe run tests against it)
-            # 2. Save the submission to a database
-            # 3. Return feedback
+            if not solution or not isinstance(solution, str):
+                return JsonResponse({'status': 'error', 'message': 'No solution submitted'}, status=400)
+            
+            if not judge_enabled():
+                return JsonResponse({'status': 'error', 'message': 'Code judging is not available on this server'}, status=503)
             
-            # Demo implementation with static response
-            is_correct = bool(random.getrandbits(1))  # Random result for demo
+            problem = PracticeProblem.objects.filter(pk=problem_id).first()
+            if problem is None:
+                return JsonResponse({'status': 'error', 'message': 'Problem not found'}, status=404)
             
-            if is_correct:
+            # Run the solution against the stored test cases in the judge pool
+            try:
+                report = judge_submission(problem, solution)
+            except JudgeUnavailable as e:
+                return JsonResponse({'status': 'error', 'message': str(e)}, status=503)
+            ProblemAttempt.record(request.user, problem, report['passed'])
+            details = {
+                'test_cases': report['test_cases'],
+                'time_ms': report['time_ms'],
+                'memory_kb': report['memory_kb'],
+                'cached': report['cached'],
+            }
+            
+            if report['passed']:
                 feedback = {
                     'status': 'correct',
                     'message': 'Great job! Your solution is correct.',
-                    'details': {
-                        'time_complexity': 'O(n)',
-                        'space_complexity': 'O(n)',
-                        'suggested_improvements': 'Consider using a more efficient algorithm for larger inputs.'
-                    }
+                    'details': details
                 }
             else:
+                details['hint'] = problem.hint or 'Think about edge cases, such as empty inputs or special characters.'
                 feedback = {
                     'status': 'incorrect',
                     'message': 'Your solution doesn\'t pass all test cases.',
-                    'details': {
-                        'test_cases': [
-                            {'input': 'test input 1', 'expected': 'expected output 1', 'actual': 'your output 1', 'passed': True},
-                            {'input': 'test input 2', 'expected': 'expected output 2', 'actual': 'your output 2', 'passed': False}
-                        ],
-                        'hint': 'Think about edge cases, such as empty inputs or special characters.'
-                    }
+                    'details': details
                 }
             
             return JsonResponse({
@@ -556,3 +696,50 @@ class SubmitSolutionView(View):
             return JsonResponse({'status': 'error', 'message': 'Invalid JSON'}, status=400)
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+class SessionHistoryView(LoginRequiredMixin, View):
+    """Page through the user's tutor sessions, newest first, with optional title/topic search"""
+    
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'limit must be an integer'}, status=400)
+        
+        try:
+            sessions, next_cursor = AiTutorSession.get_user_sessions_page(
+                request.user.id,
+                cursor=request.GET.get('cursor') or None,
+                limit=limit,
+                search=request.GET.get('q', '').strip() or None
+            )
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+        
+        return JsonResponse({
+            'status': 'success',
+            'sessions': [format_session_summary(session) for session in sessions],
+            'next_cursor': next_cursor
+        })
+
+
+class UsageStatsView(LoginRequiredMixin, View):
+    """Report AI Tutor usage (calls, tokens, cost, latency percentiles) per day and topic"""
+    
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            return JsonResponse({'status': 'error', 'message': 'Staff access required'}, status=403)
+        
+        try:
+            days = min(max(int(request.GET.get('days', 7)), 1), 90)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'days must be an integer'}, status=400)
+        
+        return JsonResponse({
+            'status': 'success',
+            'days': days,
+            'stats': usage_stats(days),
+            'prefetch': prefetch_stats(min(days, 7)),
+            'providers': get_router().health_report()
+        })
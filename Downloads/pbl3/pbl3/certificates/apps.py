@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CertificatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'certificates'
+
+    def ready(self):
+        from utils.images import register_image_field
+        from .models import CertificateTemplate
+
+        register_image_field(CertificateTemplate, 'background_image')
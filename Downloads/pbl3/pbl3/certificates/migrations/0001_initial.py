@@ -0,0 +1,127 @@
+# Generated by Django 5.2 on 2026-10-18 23:23
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockchainRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('data_hash', models.CharField(help_text='SHA-256 hash of the data', max_length=64)),
+                ('blockchain_txid', models.CharField(blank=True, help_text='Blockchain transaction ID', max_length=100)),
+                ('blockchain_network', models.CharField(default='ethereum_testnet', max_length=50)),
+                ('data_type', models.CharField(default='certificate', max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('failed', 'Failed'), ('revoked', 'Revoked')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('revoked_at', models.DateTimeField(blank=True, null=True)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('retry_count', models.PositiveSmallIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CertificateTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('background_image', models.ImageField(blank=True, null=True, upload_to='certificate_templates/')),
+                ('logo', models.ImageField(blank=True, null=True, upload_to='certificate_logos/')),
+                ('primary_color', models.CharField(default='#000000', help_text='Hex color code', max_length=7)),
+                ('secondary_color', models.CharField(default='#4A90E2', help_text='Hex color code', max_length=7)),
+                ('font', models.CharField(default='Montserrat', max_length=50)),
+                ('title', models.CharField(default='Certificate of Completion', max_length=200)),
+                ('subtitle', models.CharField(blank=True, max_length=200)),
+                ('body_text', models.TextField(help_text='Use {name}, {course}, {date}, etc. as placeholders')),
+                ('signature_1_image', models.ImageField(blank=True, null=True, upload_to='certificate_signatures/')),
+                ('signature_1_name', models.CharField(blank=True, max_length=100)),
+                ('signature_1_title', models.CharField(blank=True, max_length=100)),
+                ('signature_2_image', models.ImageField(blank=True, null=True, upload_to='certificate_signatures/')),
+                ('signature_2_name', models.CharField(blank=True, max_length=100)),
+                ('signature_2_title', models.CharField(blank=True, max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('certificate_type', models.CharField(choices=[('course', 'Course Completion'), ('program', 'Program Completion'), ('skill', 'Skill Certification'), ('achievement', 'Special Achievement')], default='course', max_length=20)),
+            ],
+            options={
+                'ordering': ['-is_active', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Certificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('certificate_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('program', models.CharField(blank=True, help_text='For program certificates', max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('issue_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expiry_date', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('issued', 'Issued'), ('revoked', 'Revoked'), ('expired', 'Expired')], default='draft', max_length=10)),
+                ('pdf_file', models.FileField(blank=True, null=True, upload_to='certificates/')),
+                ('image_file', models.ImageField(blank=True, null=True, upload_to='certificates/')),
+                ('verification_code', models.CharField(blank=True, help_text='Unique verification code', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('revocation_reason', models.TextField(blank=True)),
+                ('blockchain_record', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='certificate', to='certificates.blockchainrecord')),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='courses.course')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificates', to=settings.AUTH_USER_MODEL)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='certificates.certificatetemplate')),
+            ],
+            options={
+                'ordering': ['-issue_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CertificateShare',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('linkedin', 'LinkedIn'), ('twitter', 'Twitter'), ('facebook', 'Facebook'), ('email', 'Email'), ('direct', 'Direct Link'), ('other', 'Other')], max_length=20)),
+                ('shared_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient_email', models.EmailField(blank=True, max_length=254)),
+                ('custom_message', models.TextField(blank=True)),
+                ('certificate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shares', to='certificates.certificate')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-shared_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CertificateVerification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verification_time', models.DateTimeField(auto_now_add=True)),
+                ('verification_code', models.CharField(max_length=64)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.TextField(blank=True)),
+                ('is_valid', models.BooleanField()),
+                ('blockchain_verified', models.BooleanField(default=False)),
+                ('verification_method', models.CharField(default='web', max_length=50)),
+                ('certificate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verifications', to='certificates.certificate')),
+            ],
+            options={
+                'ordering': ['-verification_time'],
+            },
+        ),
+    ]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+
+    def ready(self):
+        from utils.images import register_image_field
+        from .models import ChatAttachment
+
+        register_image_field(ChatAttachment, 'file', condition=lambda attachment: attachment.media_type == 'image')
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+    
+    def ready(self):
+        # Connect the receivers that keep stored statistics, indexes and caches up to date
+        from . import facets, outline, progress, related, search, stats, taxonomy  # noqa: F401
+
+        from utils.images import register_image_field
+        from .models import Course
+
+        register_image_field(Course, 'thumbnail')
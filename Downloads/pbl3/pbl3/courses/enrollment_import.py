@@ -0,0 +1,233 @@
+"""
+Bulk enrollment of student rosters into a course.
+Institutions onboard whole cohorts at once: a roster (CSV or JSON) of usernames
+or email addresses is resolved to users in batches, and enrollments are created
+with bulk_create(ignore_conflicts=True) in one transaction per batch, honouring
+the course's enrollment limit. Every roster row gets a result status.
+
+The limit counts active and completed enrollments: a dropped enrollment frees
+its seat, and reactivating it takes a seat like a new enrollment does.
+enroll_student() applies the same rules to a single student enrolling
+themselves.
+
+Row statuses:
+    enrolled          new enrollment created
+    reactivated       a dropped enrollment was made active again
+    already_enrolled  the student already has an active or completed enrollment
+    unknown_user      no user with that username or email
+    duplicate         the student appears earlier in the roster
+    invalid           the row has no username or email
+    limit_reached     the course's enrollment limit is full
+"""
+
+import csv
+import io
+import json
+import logging
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import Course, Enrollment, Lesson
+from .stats import adjust_course_stats
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def parse_roster(data, format=None):
+    """
+    Parse a roster into identifiers (usernames or email addresses).
+
+    CSV rosters need a 'username' or 'email' column (a file with a single
+    unnamed column is read as identifiers). JSON rosters are a list of strings
+    or of objects with 'username' / 'email', optionally under a 'students' key.
+
+    Args:
+        data (str or bytes): Roster contents
+        format (str, optional): 'csv' or 'json'; detected when omitted
+
+    Returns:
+        list: Identifier strings in roster order ('' for rows without one)
+
+    Raises:
+        ValueError: If the roster cannot be parsed
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    format = format or ('json' if data.lstrip()[:1] in ('[', '{') else 'csv')
+
+    if format == 'json':
+        try:
+            rows = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON roster: {str(e)}")
+        if isinstance(rows, dict):
+            rows = rows.get('students', [])
+        if not isinstance(rows, list):
+            raise ValueError("A JSON roster must be a list of students")
+        return [
+            str(row.get('username') or row.get('email') or '').strip() if isinstance(row, dict) else str(row).strip()
+            for row in rows
+        ]
+
+    if format != 'csv':
+        raise ValueError(f"Unsupported roster format: {format}")
+
+    reader = csv.reader(io.StringIO(data))
+    rows = [row for row in reader if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if 'username' in header or 'email' in header:
+        columns = [header.index(name) for name in ('username', 'email') if name in header]
+        return [
+            next((row[column].strip() for column in columns if column < len(row) and row[column].strip()), '')
+            for row in rows[1:]
+        ]
+    if len(header) == 1:
+        return [row[0].strip() for row in rows]
+    raise ValueError("A CSV roster needs a 'username' or 'email' column")
+
+
+def _resolve_users(identifiers):
+    """Map identifiers to user IDs, querying usernames and emails in one batch each."""
+    User = get_user_model()
+    emails = {identifier.lower() for identifier in identifiers if '@' in identifier}
+    usernames = {identifier for identifier in identifiers if '@' not in identifier}
+
+    resolved = {}
+    if usernames:
+        resolved.update(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+    if emails:
+        # Emails match case-insensitively; an address shared by several accounts resolves to one of them
+        rows = User.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails).order_by('id')
+        for email, user_id in rows.values_list('email_lower', 'id'):
+            resolved.setdefault(email, user_id)
+    return {identifier: resolved.get(identifier.lower() if '@' in identifier else identifier) for identifier in identifiers}
+
+
+def _import_batch(course_id, rows, seen, total_lessons):
+    """
+    Enroll one batch of (row number, identifier) pairs in a single transaction.
+
+    Returns:
+        list: Result dicts for the batch
+    """
+    results = []
+    user_ids = _resolve_users({identifier for _, identifier in rows if identifier})
+
+    candidates = []
+    for number, identifier in rows:
+        user_id = user_ids.get(identifier) if identifier else None
+        if not identifier:
+            status = 'invalid'
+        elif user_id is None:
+            status = 'unknown_user'
+        elif user_id in seen:
+            status = 'duplicate'
+        else:
+            seen.add(user_id)
+            candidates.append((number, identifier, user_id))
+            continue
+        results.append({'row': number, 'identifier': identifier, 'status': status})
+
+    return results + _enroll(course_id, candidates, total_lessons)
+
+
+def _enroll(course_id, candidates, total_lessons):
+    """
+    Enroll (row number, identifier, user ID) candidates in a single transaction,
+    within the course's enrollment limit.
+
+    Returns:
+        list: Result dicts for the candidates
+    """
+    results = []
+    with transaction.atomic():
+        # Locking the course serialises concurrent imports and enrollments against its enrollment limit
+        course = Course.objects.select_for_update().only('id', 'enrollment_limit').get(pk=course_id)
+        existing = dict(
+            Enrollment.objects.filter(course_id=course_id, student_id__in=[user_id for _, _, user_id in candidates])
+            .values_list('student_id', 'status')
+        )
+        remaining = None
+        if course.enrollment_limit is not None:
+            taken = Enrollment.objects.filter(course_id=course_id).exclude(status='dropped').count()
+            remaining = max(0, course.enrollment_limit - taken)
+
+        new, reactivate = [], []
+        for number, identifier, user_id in candidates:
+            if user_id in existing and existing[user_id] != 'dropped':
+                status = 'already_enrolled'
+            elif remaining is not None and len(new) + len(reactivate) >= remaining:
+                status = 'limit_reached'
+            elif user_id in existing:
+                status = 'reactivated'
+                reactivate.append(user_id)
+            else:
+                status = 'enrolled'
+                new.append(Enrollment(course_id=course_id, student_id=user_id, total_lessons=total_lessons))
+            results.append({'row': number, 'identifier': identifier, 'status': status})
+
+        if reactivate:
+            Enrollment.objects.filter(course_id=course_id, student_id__in=reactivate).update(status='active')
+        if new:
+            # bulk_create skips the signals that keep the course statistics, so count the rows
+            # it inserted. Enrollments of these students saved concurrently elsewhere (e.g. in the
+            # admin) were counted by their own signal and are already in the count taken before.
+            students = Enrollment.objects.filter(
+                course_id=course_id, student_id__in=[enrollment.student_id for enrollment in new]
+            )
+            before = students.count()
+            Enrollment.objects.bulk_create(new, batch_size=BATCH_SIZE, ignore_conflicts=True)
+            adjust_course_stats(course_id, enrollment_count=students.count() - before)
+
+    return results
+
+
+def enroll_student(course, user):
+    """
+    Enroll one student in a course, or reactivate their dropped enrollment.
+
+    Returns:
+        str: 'enrolled', 'reactivated', 'already_enrolled' or 'limit_reached'
+    """
+    total_lessons = Lesson.objects.filter(module__course=course).count()
+    return _enroll(course.pk, [(1, user.get_username(), user.pk)], total_lessons)[0]['status']
+
+
+def import_roster(course, identifiers, dry_run=False):
+    """
+    Enroll a roster of students in a course.
+
+    Args:
+        course (Course): The course
+        identifiers (list): Usernames or email addresses, one per roster row
+        dry_run (bool): Resolve and validate without enrolling anyone
+
+    Returns:
+        dict: {'summary': {status: count}, 'results': [{'row', 'identifier', 'status'}]}
+    """
+    numbered = list(enumerate(identifiers, start=1))
+    total_lessons = Lesson.objects.filter(module__course=course).count()
+
+    results, seen = [], set()
+    for start in range(0, len(numbered), BATCH_SIZE):
+        batch = numbered[start:start + BATCH_SIZE]
+        if dry_run:
+            # Run the real import so limits and conflicts are checked, then roll it back
+            with transaction.atomic():
+                results.extend(_import_batch(course.pk, batch, seen, total_lessons))
+                transaction.set_rollback(True)
+        else:
+            results.extend(_import_batch(course.pk, batch, seen, total_lessons))
+
+    results.sort(key=lambda result: result['row'])
+    summary = Counter(result['status'] for result in results)
+    logger.info(f"Roster import into course {course.pk}: {dict(summary)}{' (dry run)' if dry_run else ''}")
+    return {'summary': dict(summary), 'results': results}
@@ -0,0 +1,262 @@
+"""
+Faceted counts for the course catalog.
+Each category, tag and difficulty keeps a bitmap of the published courses it
+applies to, stored as a Python int with bit N set for course ID N. Counts for
+every facet value under the active filters are bitwise ANDs and popcounts, so
+the whole sidebar is computed in one pass over the bitmaps without a query per
+facet value.
+
+Bitmaps live in process memory. Every course change bumps a version number in
+the shared cache and records the changed course under that version; a worker
+that is behind replays the recorded changes (one query for all of them) and
+falls back to a full rebuild only when part of the log has been evicted.
+With a per-process cache backend the log only holds this process's changes, so
+the index is also rebuilt once it is COURSES_FACETS_LOCAL_MAX_AGE seconds old,
+which bounds how long changes made by other processes stay invisible.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from utils.cache import cache_is_shared
+
+from .models import Course
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+FACETS = ('category', 'tag', 'difficulty')
+
+VERSION_KEY = 'courses:facets:version'
+LOG_TIMEOUT = 60 * 60 * 24
+
+# A worker further behind than this rebuilds rather than replaying the log
+MAX_REPLAY = 200
+
+# Index with lazy initialization
+_index = None
+_index_lock = threading.Lock()
+
+
+def _change_key(version):
+    return f"courses:facets:change:{version}"
+
+
+def to_bitmap(course_ids):
+    """Bitmap of a collection of course IDs."""
+    bitmap = 0
+    for course_id in course_ids:
+        bitmap |= 1 << course_id
+    return bitmap
+
+
+class FacetIndex:
+    """Published-course bitmaps per facet value, with each course's memberships for incremental updates."""
+
+    def __init__(self, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.published = 0
+        self.bitmaps = {facet: {} for facet in FACETS}
+        # course_id -> {'category': {id}, 'tag': {ids}, 'difficulty': {id}}
+        self.memberships = {}
+
+    def _remove(self, course_id):
+        memberships = self.memberships.pop(course_id, None)
+        if memberships is None:
+            return
+        mask = ~(1 << course_id)
+        self.published &= mask
+        for facet, values in memberships.items():
+            for value in values:
+                self.bitmaps[facet][value] &= mask
+
+    def _add(self, course_id, memberships):
+        bit = 1 << course_id
+        self.published |= bit
+        for facet, values in memberships.items():
+            for value in values:
+                self.bitmaps[facet][value] = self.bitmaps[facet].get(value, 0) | bit
+        self.memberships[course_id] = memberships
+
+    def load(self, course_ids=None):
+        """
+        Read the facets of published courses from the database: all of them, or
+        only `course_ids`, replacing what the index held for those courses.
+        """
+        courses = Course.objects.all()
+        links = Course.tags.through.objects.filter(course__status='published')
+        if course_ids is not None:
+            courses = courses.filter(pk__in=course_ids)
+            links = links.filter(course_id__in=course_ids)
+            for course_id in course_ids:
+                self._remove(course_id)
+
+        found = {}
+        for course_id, category_id, difficulty_id in (
+            courses.filter(status='published').values_list('id', 'category_id', 'difficulty_id')
+        ):
+            found[course_id] = {
+                'category': {category_id} if category_id else set(),
+                'tag': set(),
+                'difficulty': {difficulty_id} if difficulty_id else set(),
+            }
+        for course_id, tag_id in links.values_list('course_id', 'tag_id'):
+            if course_id in found:
+                found[course_id]['tag'].add(tag_id)
+
+        for course_id, memberships in found.items():
+            self._add(course_id, memberships)
+        return self
+
+    def counts(self, category=None, tag=None, difficulty=None, within=None):
+        """
+        Course counts for every facet value under the active filters.
+
+        A facet's own filter is left out when counting its values, so the sidebar
+        shows what selecting another value of that facet would return.
+
+        Args:
+            category, tag, difficulty (int, optional): IDs of the active filters
+            within (int, optional): Bitmap of courses to count within, e.g. search matches
+
+        Returns:
+            dict: {'total': int, 'category': {id: count}, 'tag': {...}, 'difficulty': {...}}
+        """
+        base = self.published if within is None else self.published & within
+        active = {'category': category, 'tag': tag, 'difficulty': difficulty}
+        filters = {
+            facet: self.bitmaps[facet].get(value, 0)
+            for facet, value in active.items() if value is not None
+        }
+
+        result = {}
+        for facet in FACETS:
+            scope = base
+            for other, bitmap in filters.items():
+                if other != facet:
+                    scope &= bitmap
+            result[facet] = {
+                value: (bitmap & scope).bit_count()
+                for value, bitmap in self.bitmaps[facet].items()
+            }
+
+        selected = base
+        for bitmap in filters.values():
+            selected &= bitmap
+        result['total'] = selected.bit_count()
+        return result
+
+
+def _shared_version():
+    """The current index version, created if the cache has none."""
+    cache.add(VERSION_KEY, int(time.time() * 1000), None)
+    return cache.get(VERSION_KEY)
+
+
+def _rebuild():
+    # Read the version before the database, so later changes are replayed, not missed
+    version = _shared_version()
+    index = FacetIndex(version).load()
+    logger.info(f"Built catalog facet index at version {version} with {len(index.memberships)} course(s)")
+    return index
+
+
+def get_index():
+    """
+    Get this worker's facet index, brought up to date with changes made by
+    any worker.
+
+    Returns:
+        FacetIndex: The current index
+    """
+    global _index
+
+    with _index_lock:
+        version = _shared_version()
+        expired = False
+        if _index is not None and not cache_is_shared():
+            # Other processes' changes are not in this process's log
+            max_age = getattr(settings, 'COURSES_FACETS_LOCAL_MAX_AGE', 60)
+            expired = time.monotonic() - _index.built_at > max_age
+        if _index is None or expired or version is None or version < _index.version or version - _index.version > MAX_REPLAY:
+            _index = _rebuild()
+        elif version > _index.version:
+            keys = [_change_key(number) for number in range(_index.version + 1, version + 1)]
+            changes = cache.get_many(keys)
+            if len(changes) < len(keys):
+                _index = _rebuild()
+            else:
+                _index.load(set(changes.values()))
+                _index.version = version
+        return _index
+
+
+def facet_counts(category=None, tag=None, difficulty=None, within=None):
+    """
+    Catalog facet counts under the active filters (see FacetIndex.counts).
+
+    Args:
+        within (iterable, optional): IDs of the courses to count within
+    """
+    return get_index().counts(
+        category=category,
+        tag=tag,
+        difficulty=difficulty,
+        within=None if within is None else to_bitmap(within)
+    )
+
+
+def record_change(course_id):
+    """Log a changed course under a new version, for every worker to replay."""
+    try:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            # The version was evicted between add() and incr(): force rebuilds
+            cache.set(VERSION_KEY, int(time.time() * 1000), None)
+            return
+        cache.set(_change_key(version), course_id, LOG_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Could not record facet change of course {course_id}: {str(e)}")
+
+
+def _on_commit(course_id):
+    # Other workers replay from the database, so only log committed changes
+    transaction.on_commit(lambda: record_change(course_id))
+
+
+@receiver(post_save, sender=Course)
+def update_saved_course(sender, instance, **kwargs):
+    """A saved course may have changed status, category or difficulty."""
+    _on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def update_deleted_course(sender, instance, **kwargs):
+    """Drop a deleted course from every bitmap."""
+    _on_commit(instance.pk)
+
+
+@receiver(m2m_changed, sender=Course.tags.through)
+def update_retagged_course(sender, instance, action, reverse, pk_set, **kwargs):
+    """Move retagged courses between tag bitmaps."""
+    if reverse and action == 'pre_clear':
+        instance._facets_cleared = list(instance.courses.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _on_commit(instance.pk)
+        return
+    course_ids = getattr(instance, '_facets_cleared', []) if action == 'post_clear' else pk_set or []
+    for course_id in course_ids:
+        _on_commit(course_id)
@@ -0,0 +1,218 @@
+"""
+Lesson time tracking from client heartbeats.
+Lesson pages send batched beacons of (lesson, seconds) while a lesson is open.
+Accepted seconds are coalesced per (enrollment, lesson) in this process and
+added to LessonProgress.time_spent by flush_heartbeats() with one UPDATE per
+chunk of counters, at most every COURSES_HEARTBEAT_FLUSH_INTERVAL seconds, so
+a heartbeat costs one read and no write on the request path.
+Clients report their own seconds, so accepted time is also clamped to the wall
+time that has passed since the last accepted beacon for the same enrollment and
+lesson, however often batches arrive. That clock is kept in the cache, and so is
+shared by all workers when the cache is.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import Enrollment, LessonProgress
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Counters written by one UPDATE statement
+FLUSH_CHUNK_SIZE = 200
+
+# How long a lesson clock is kept after it was started
+CLOCK_TIMEOUT = 60 * 60
+
+# Coalesced time: (enrollment_id, lesson_id) -> pending seconds
+_pending = {}
+_pending_lock = threading.Lock()
+_flush_timer = None
+
+
+def parse_beacons(payload):
+    """
+    Validate a heartbeat payload.
+
+    Args:
+        payload (dict or list): {'beacons': [{'lesson': id, 'seconds': n}, ...]} or the bare list
+
+    Returns:
+        dict: lesson ID -> seconds, summed over the batch and capped at
+            COURSES_HEARTBEAT_MAX_SECONDS per lesson
+
+    Raises:
+        ValueError: If the payload is malformed
+    """
+    beacons = payload.get('beacons') if isinstance(payload, dict) else payload
+    if not isinstance(beacons, list):
+        raise ValueError("Expected a list of beacons")
+
+    max_seconds = getattr(settings, 'COURSES_HEARTBEAT_MAX_SECONDS', 300)
+    seconds_by_lesson = {}
+    for beacon in beacons:
+        try:
+            lesson_id, seconds = int(beacon['lesson']), int(beacon['seconds'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Each beacon needs an integer 'lesson' and 'seconds'")
+        if seconds > 0:
+            seconds_by_lesson[lesson_id] = seconds_by_lesson.get(lesson_id, 0) + seconds
+    # A batch can not account for more time than the client could have spent since the last one
+    return {lesson_id: min(seconds, max_seconds) for lesson_id, seconds in seconds_by_lesson.items()}
+
+
+def _clock_key(enrollment_id, lesson_id):
+    return f"courses:heartbeat:clock:{enrollment_id}:{lesson_id}"
+
+
+def _clamp_to_wall_time(enrollment_id, lesson_id, seconds):
+    """
+    Accept at most the wall time elapsed since the last accepted beacon.
+
+    The clock holds the time up to which seconds have been accepted. Accepting a
+    beacon advances it with one atomic incr, and whatever would move it past now is
+    given back, so concurrent batches can not both claim the same stretch of time.
+    A new clock starts COURSES_HEARTBEAT_MAX_SECONDS in the past, allowing the first batch.
+
+    Returns:
+        int: Seconds accepted
+    """
+    now = int(time.time())
+    max_seconds = getattr(settings, 'COURSES_HEARTBEAT_MAX_SECONDS', 300)
+    key = _clock_key(enrollment_id, lesson_id)
+    cache.add(key, now - max_seconds, CLOCK_TIMEOUT)
+    try:
+        through = cache.incr(key, seconds)
+    except ValueError:
+        through = now - max_seconds + seconds
+        cache.set(key, through, CLOCK_TIMEOUT)
+    if through - seconds < now - max_seconds:
+        # Time not claimed while the lesson was idle is not banked for later batches
+        through = cache.incr(key, now - max_seconds - (through - seconds))
+
+    if through > now:
+        refund = min(through - now, seconds)
+        cache.decr(key, refund)
+        return seconds - refund
+    return seconds
+
+
+def record_heartbeats(user, seconds_by_lesson):
+    """
+    Buffer time spent by a student on lessons of courses they are enrolled in.
+
+    Args:
+        user (User): The student
+        seconds_by_lesson (dict): Lesson ID -> seconds, as returned by parse_beacons()
+
+    Returns:
+        int: Number of lessons the time was accepted for
+    """
+    global _flush_timer
+
+    if not seconds_by_lesson:
+        return 0
+
+    # Lessons outside the student's active enrollments are ignored
+    rows = Enrollment.objects.filter(
+        student=user, course__modules__lessons__id__in=list(seconds_by_lesson)
+    ).exclude(status='dropped').values_list('id', 'course__modules__lessons__id')
+
+    seconds_by_key = {}
+    for enrollment_id, lesson_id in rows:
+        seconds = _clamp_to_wall_time(enrollment_id, lesson_id, seconds_by_lesson[lesson_id])
+        if seconds > 0:
+            seconds_by_key[(enrollment_id, lesson_id)] = seconds
+
+    accepted = len(seconds_by_key)
+    with _pending_lock:
+        for key, seconds in seconds_by_key.items():
+            _pending[key] = _pending.get(key, 0) + seconds
+
+        flush_now = len(_pending) >= getattr(settings, 'COURSES_HEARTBEAT_MAX_PENDING', 1000)
+        if _pending and not flush_now and _flush_timer is None:
+            _flush_timer = threading.Timer(
+                getattr(settings, 'COURSES_HEARTBEAT_FLUSH_INTERVAL', 30),
+                _flush_in_background
+            )
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+    if flush_now:
+        flush_heartbeats()
+    return accepted
+
+
+def _write(counters):
+    """Add buffered seconds to LessonProgress rows, creating missing rows first."""
+    now = timezone.now()
+    with transaction.atomic():
+        LessonProgress.objects.bulk_create(
+            [LessonProgress(enrollment_id=enrollment_id, lesson_id=lesson_id) for enrollment_id, lesson_id in counters],
+            ignore_conflicts=True
+        )
+        # One statement per chunk; F() keeps increments from other workers intact
+        match = Q()
+        for enrollment_id, lesson_id in counters:
+            match |= Q(enrollment_id=enrollment_id, lesson_id=lesson_id)
+        delta = Case(
+            *[
+                When(enrollment_id=enrollment_id, lesson_id=lesson_id, then=Value(seconds))
+                for (enrollment_id, lesson_id), seconds in counters.items()
+            ],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        LessonProgress.objects.filter(match).update(time_spent=F('time_spent') + delta, last_accessed=now)
+
+
+def flush_heartbeats():
+    """
+    Write all buffered lesson time.
+
+    Returns:
+        int: Number of (enrollment, lesson) counters written
+    """
+    global _flush_timer
+
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+
+    if not pending:
+        return 0
+
+    items = list(pending.items())
+    written = 0
+    for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+        chunk = dict(items[start:start + FLUSH_CHUNK_SIZE])
+        try:
+            _write(chunk)
+            written += len(chunk)
+        except Exception as e:
+            logger.error(f"Error flushing {len(chunk)} lesson time counters: {str(e)}")
+    return written
+
+
+def _flush_in_background():
+    try:
+        flush_heartbeats()
+    finally:
+        # The timer thread has its own database connection - do not leak it
+        connections.close_all()
+
+
+# Write time still buffered when the process exits
+atexit.register(flush_heartbeats)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.recommendations import build_similarities
+
+
+class Command(BaseCommand):
+    help = "Recompute co-enrollment similarities between courses for recommendations."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help="Similar courses stored per course")
+        parser.add_argument('--min-common', type=int, default=None, help="Shared students needed for a pair to count")
+
+    def handle(self, *args, **options):
+        try:
+            stored = build_similarities(top_k=options['top_k'], min_common=options['min_common'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} course similarities"))
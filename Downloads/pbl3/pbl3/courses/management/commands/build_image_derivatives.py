@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.images import PILLOW_AVAILABLE, generate_derivatives, get_manifest, registered_image_fields
+
+
+class Command(BaseCommand):
+    help = "Render responsive derivatives of existing course thumbnails, badge icons and other registered images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Re-render images that already have derivatives")
+
+    def handle(self, *args, **options):
+        if not PILLOW_AVAILABLE:
+            raise CommandError("Pillow is required to render image derivatives")
+
+        for model, field_name, condition in registered_image_fields():
+            rendered = failed = 0
+            for instance in model.objects.exclude(**{field_name: ''}).exclude(**{f"{field_name}__isnull": True}).iterator():
+                field_file = getattr(instance, field_name)
+                if condition is not None and not condition(instance):
+                    continue
+                if not options['force'] and get_manifest(field_file) is not None:
+                    continue
+                if generate_derivatives(field_file, wait=True):
+                    rendered += 1
+                else:
+                    failed += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.label}.{field_name}: rendered {rendered} image(s), {failed} failed"
+            ))
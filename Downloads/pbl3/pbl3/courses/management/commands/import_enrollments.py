@@ -0,0 +1,48 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.enrollment_import import import_roster, parse_roster
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Enroll a roster of students (CSV or JSON of usernames / emails) in a course."
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_slug', help="Slug of the course")
+        parser.add_argument('roster', help="Path to the CSV or JSON roster")
+        parser.add_argument('--format', choices=['csv', 'json'], help="Roster format (default: from the file extension)")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would happen without enrolling anyone")
+        parser.add_argument('--report', help="Write the per-row results to this CSV file")
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(slug=options['course_slug'])
+        except Course.DoesNotExist:
+            raise CommandError(f"No course with slug '{options['course_slug']}'")
+
+        path = options['roster']
+        format = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+        try:
+            with open(path, 'rb') as roster:
+                identifiers = parse_roster(roster.read(), format)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not read roster {path}: {str(e)}")
+
+        report = import_roster(course, identifiers, dry_run=options['dry_run'])
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as output:
+                writer = csv.DictWriter(output, fieldnames=['row', 'identifier', 'status'])
+                writer.writeheader()
+                writer.writerows(report['results'])
+        else:
+            for result in report['results']:
+                if result['status'] not in ('enrolled', 'already_enrolled'):
+                    self.stdout.write(f"Row {result['row']} ({result['identifier'] or 'empty'}): {result['status']}")
+
+        summary = ', '.join(f"{count} {status}" for status, count in sorted(report['summary'].items())) or 'empty roster'
+        prefix = "Dry run of " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{os.path.basename(path)} into '{course.title}': {summary}"))
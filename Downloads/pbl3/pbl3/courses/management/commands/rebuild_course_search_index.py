@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.search import prepare_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the course catalog."
+
+    def handle(self, *args, **options):
+        backend = prepare_index()
+        if backend is None:
+            self.stdout.write(self.style.WARNING("Full-text search is not available on this database; using icontains"))
+            return
+        indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} course(s) with {backend}"))
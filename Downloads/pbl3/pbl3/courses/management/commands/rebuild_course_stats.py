@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from courses.progress import rebuild_progress_counters
+from courses.stats import rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored rating, enrollment and completion counts of every course, and enrollment progress counters."
+
+    def handle(self, *args, **options):
+        corrected = rebuild_course_stats()
+        self.stdout.write(self.style.SUCCESS(f"Corrected statistics of {corrected} course(s)"))
+        updated = rebuild_progress_counters()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed progress counters of {updated} enrollment(s)"))
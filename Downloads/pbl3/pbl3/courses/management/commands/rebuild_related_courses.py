@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.related import rebuild_related_courses
+
+
+class Command(BaseCommand):
+    help = "Recompute the content-based related courses of every published course."
+
+    def handle(self, *args, **options):
+        try:
+            indexed = rebuild_related_courses()
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Indexed related courses of {indexed} course(s)"))
@@ -0,0 +1,185 @@
+# Generated by Django 5.2 on 2026-10-18 23:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Difficulty',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20)),
+                ('level', models.PositiveSmallIntegerField(unique=True)),
+            ],
+            options={
+                'verbose_name': 'Difficulty',
+                'verbose_name_plural': 'Difficulties',
+                'ordering': ['level'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Lesson',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('content', models.TextField()),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('type', models.CharField(choices=[('video', 'Video'), ('text', 'Text'), ('quiz', 'Quiz'), ('assignment', 'Assignment')], default='text', max_length=20)),
+                ('video_url', models.URLField(blank=True, null=True)),
+                ('video_duration', models.PositiveIntegerField(blank=True, help_text='Duration in seconds', null=True)),
+                ('assignment_due_date', models.DateTimeField(blank=True, null=True)),
+                ('assignment_points', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed', models.BooleanField(default=False)),
+                ('last_accessed', models.DateTimeField(auto_now=True)),
+                ('time_spent', models.PositiveIntegerField(default=0, help_text='Time spent in seconds')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Module',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('order', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('icon', models.CharField(blank=True, help_text='Font Awesome icon class', max_length=50)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='courses.category')),
+            ],
+            options={
+                'verbose_name': 'Category',
+                'verbose_name_plural': 'Categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=200, unique=True)),
+                ('overview', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published'), ('archived', 'Archived')], default='draft', max_length=10)),
+                ('description', models.TextField()),
+                ('learning_outcomes', models.TextField(help_text='What students will learn from this course')),
+                ('prerequisites', models.TextField(blank=True, help_text='Required skills or courses')),
+                ('thumbnail', models.ImageField(blank=True, upload_to='courses/thumbnails/')),
+                ('featured_video', models.URLField(blank=True, help_text='YouTube or Vimeo URL for course intro')),
+                ('duration_hours', models.PositiveSmallIntegerField(default=0, help_text='Estimated hours to complete')),
+                ('is_free', models.BooleanField(default=False)),
+                ('price', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('discount_price', models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True)),
+                ('enrollment_limit', models.PositiveIntegerField(blank=True, null=True)),
+                ('experience_points', models.PositiveIntegerField(default=100)),
+                ('language', models.CharField(choices=[('en', 'English'), ('hi', 'Hindi'), ('kn', 'Kannada')], default='en', max_length=5)),
+                ('certificate_available', models.BooleanField(default=True)),
+                ('course_code', models.CharField(blank=True, max_length=10, null=True, unique=True)),
+                ('rating_sum', models.PositiveIntegerField(default=0, editable=False)),
+                ('rating_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('enrollment_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('completed_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='courses', to='courses.category')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='courses_created', to=settings.AUTH_USER_MODEL)),
+                ('difficulty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='courses.difficulty')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('file', models.FileField(blank=True, null=True, upload_to='course_resources/')),
+                ('url', models.URLField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resources', to='courses.course')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField(choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5)])),
+                ('comment', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='courses.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('enrollment', 'Co-enrollment'), ('content', 'Content')], max_length=20)),
+                ('score', models.FloatField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='courses.course')),
+                ('similar_course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+            ],
+            options={
+                'ordering': ['course', 'kind', '-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrolled_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('completed', 'Completed'), ('dropped', 'Dropped')], default='active', max_length=10)),
+                ('completed', models.BooleanField(default=False)),
+                ('progress_percent', models.PositiveSmallIntegerField(default=0)),
+                ('completed_lessons', models.PositiveIntegerField(default=0, editable=False)),
+                ('total_lessons', models.PositiveIntegerField(default=0, editable=False)),
+                ('certificate_issued', models.BooleanField(default=False)),
+                ('certificate_issued_date', models.DateTimeField(blank=True, null=True)),
+                ('certificate_blockchain_id', models.CharField(blank=True, max_length=255)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='courses.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
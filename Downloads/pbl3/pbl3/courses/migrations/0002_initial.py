@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-18 23:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('quizzes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='quiz',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='quizzes.quiz'),
+        ),
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='enrollment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_progress', to='courses.enrollment'),
+        ),
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='lesson',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.lesson'),
+        ),
+        migrations.AddField(
+            model_name='module',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='modules', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='module',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='courses.module'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='courses', to='courses.tag'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='coursereview',
+            unique_together={('course', 'user')},
+        ),
+        migrations.AddIndex(
+            model_name='coursesimilarity',
+            index=models.Index(fields=['kind', 'course', '-score'], name='courses_cou_kind_a87820_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='coursesimilarity',
+            unique_together={('course', 'similar_course', 'kind')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='enrollment',
+            unique_together={('course', 'student')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='lessonprogress',
+            unique_together={('enrollment', 'lesson')},
+        ),
+    ]
@@ -5,6 +5,20 @@ from django.utils import timezone
 from django.urls import reverse
 import uuid
 
+def _exclude_from_save(instance, fields, kwargs):
+    """
+    Leave `fields` out of a plain save() of an existing row, by passing the other
+    loaded fields as update_fields. Explicit update_fields and inserts are untouched.
+    """
+    if instance._state.adding or kwargs.get('update_fields') is not None or kwargs.get('force_insert'):
+        return
+    deferred = instance.get_deferred_fields()
+    kwargs['update_fields'] = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in fields and field.attname not in deferred
+    ]
+
+
 class Category(models.Model):
     """Category model for organizing courses by subject."""
     name = models.CharField(max_length=100)
@@ -93,6 +107,13 @@ class Course(models.Model):
     # Course code for enrollment
     course_code = models.CharField(max_length=10, unique=True, blank=True, null=True)
     
+    # Denormalised statistics, kept up to date by courses.stats
+    STAT_FIELDS = ('rating_sum', 'rating_count', 'enrollment_count', 'completed_count')
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_count = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-created']
         
@@ -105,6 +126,8 @@ class Course(models.Model):
     def save(self, *args, **kwargs):
         if not self.course_code:
             self.course_code = self.generate_course_code()
+        # The statistics are maintained with F() updates; a full save must not write back stale copies
+        _exclude_from_save(self, self.STAT_FIELDS, kwargs)
         super().save(*args, **kwargs)
     
     def generate_course_code(self):
@@ -113,27 +136,47 @@ class Course(models.Model):
     
     @property
     def rating(self):
-        """Calculate the average rating for this course."""
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
+        """Average rating for this course."""
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
         return 0
     
     @property
     def total_students(self):
-        """Get the total number of enrolled students."""
-        return self.enrollments.count()
+        """Total number of enrolled students."""
+        return self.enrollment_count
     
     @property
     def completion_rate(self):
-        """Calculate the percentage of students who completed the course."""
-        total = self.enrollments.count()
-        if total:
-            completed = self.enrollments.filter(completed=True).count()
-            return (completed / total) * 100
+        """Percentage of students who completed the course."""
+        if self.enrollment_count:
+            return (self.completed_count / self.enrollment_count) * 100
         return 0
 
 
+class CourseSimilarity(models.Model):
+    """Precomputed similarity between two courses, used for recommendations."""
+    KIND_CHOICES = [
+        ('enrollment', _('Co-enrollment')),
+        ('content', _('Content')),
+    ]
+    
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='similarities')
+    similar_course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    score = models.FloatField()
+    
+    class Meta:
+        unique_together = ['course', 'similar_course', 'kind']
+        ordering = ['course', 'kind', '-score']
+        indexes = [
+            models.Index(fields=['kind', 'course', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.course_id} ~ {self.similar_course_id} ({self.kind}: {self.score:.3f})"
+
+
 class Module(models.Model):
     """Module within a course."""
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='modules')
@@ -207,6 +250,20 @@ class CourseReview(models.Model):
         return f"{self.user.username} - {self.course.title} - {self.rating}"
 
 
+class CourseWishlist(models.Model):
+    """Courses a user has saved to enroll in later."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='wishlisted_by')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_wishlist')
+    added_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['course', 'user']
+        ordering = ['-added_at']
+        
+    def __str__(self):
+        return f"{self.user.username} - {self.course.title}"
+
+
 class Enrollment(models.Model):
     """Track student enrollments in courses."""
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
@@ -223,8 +280,11 @@ class Enrollment(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
     
     # Course progress
+    COUNTER_FIELDS = ('completed_lessons', 'total_lessons', 'progress_percent')
     completed = models.BooleanField(default=False)
     progress_percent = models.PositiveSmallIntegerField(default=0)
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False)
+    total_lessons = models.PositiveIntegerField(default=0, editable=False)
     
     # Certificate related
     certificate_issued = models.BooleanField(default=False)
@@ -237,6 +297,13 @@ class Enrollment(models.Model):
     def __str__(self):
         return f"{self.student.username} enrolled in {self.course.title}"
     
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.total_lessons:
+            self.total_lessons = Lesson.objects.filter(module__course_id=self.course_id).count()
+        # The counters are maintained with F() updates by courses.progress
+        _exclude_from_save(self, self.COUNTER_FIELDS, kwargs)
+        super().save(*args, **kwargs)
+    
     def issue_certificate(self):
         """Issue a certificate after course completion."""
         if self.completed and not self.certificate_issued:
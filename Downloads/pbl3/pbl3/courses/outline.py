@@ -0,0 +1,178 @@
+"""
+Cached course outlines for lesson navigation.
+A course outline is the course's modules and a flat, ordered array of its
+lessons across all modules, with each lesson's position indexed by ID. The
+previous and next lesson are the neighbouring array entries, so navigation,
+breadcrumbs and the lesson sidebar come from a single cache read.
+
+Outlines are cached under a per-course version that is bumped whenever the
+course, one of its modules or one of its lessons is saved or deleted. With a
+per-process cache backend that bump would not reach other workers, so outlines
+are built from the database on every request instead.
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.cache import cache_is_shared
+
+from .models import Course, Lesson, Module
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(course_id):
+    return f"courses:outline:{course_id}:version"
+
+
+def _data_key(course_id, version):
+    return f"courses:outline:{course_id}:v{version}"
+
+
+class CourseOutline:
+    """
+    Ordered modules and lessons of a course.
+
+    Attributes:
+        course (dict): 'id', 'title' and 'slug' of the course
+        modules (list): Dicts with 'id', 'title', 'order' and 'lessons' (list of lesson dicts)
+        lessons (list): Lesson dicts in course order, each with 'id', 'title', 'type',
+            'module_id', 'module_title' and 'position'
+    """
+
+    def __init__(self, course, modules, lessons):
+        self.course = course
+        self.modules = modules
+        self.lessons = lessons
+        self.positions = {lesson['id']: lesson['position'] for lesson in lessons}
+
+    @classmethod
+    def build(cls, course_id):
+        """Read a course's outline from the database (three queries)."""
+        course = Course.objects.filter(pk=course_id).values('id', 'title', 'slug').first()
+        modules = [
+            {**module, 'lessons': []}
+            for module in Module.objects.filter(course_id=course_id).order_by('order', 'id').values('id', 'title', 'order')
+        ]
+        by_id = {module['id']: module for module in modules}
+
+        lessons = []
+        rows = Lesson.objects.filter(module__course_id=course_id).order_by(
+            'module__order', 'module_id', 'order', 'id'
+        ).values_list('id', 'title', 'type', 'module_id')
+        for lesson_id, title, lesson_type, module_id in rows:
+            lesson = {
+                'id': lesson_id,
+                'title': title,
+                'type': lesson_type,
+                'module_id': module_id,
+                'module_title': by_id[module_id]['title'],
+                'position': len(lessons),
+            }
+            lessons.append(lesson)
+            by_id[module_id]['lessons'].append(lesson)
+
+        return cls(course, modules, lessons)
+
+    def lesson(self, lesson_id):
+        """The outline entry of a lesson, or None."""
+        position = self.positions.get(lesson_id)
+        return None if position is None else self.lessons[position]
+
+    def previous(self, lesson_id):
+        """The lesson before this one in the course, or None."""
+        position = self.positions.get(lesson_id)
+        return self.lessons[position - 1] if position else None
+
+    def next(self, lesson_id):
+        """The lesson after this one in the course, or None."""
+        position = self.positions.get(lesson_id)
+        if position is None or position + 1 >= len(self.lessons):
+            return None
+        return self.lessons[position + 1]
+
+    def __getstate__(self):
+        return {'course': self.course, 'modules': self.modules, 'lessons': self.lessons}
+
+    def __setstate__(self, state):
+        self.__init__(state['course'], state['modules'], state['lessons'])
+
+
+def get_outline(course_id):
+    """
+    Get a course's outline, building it on a cache miss.
+
+    Returns:
+        CourseOutline: The current outline
+    """
+    if not cache_is_shared():
+        return CourseOutline.build(course_id)
+
+    version_key = _version_key(course_id)
+    cache.add(version_key, int(time.time() * 1000), None)
+    version = cache.get(version_key)
+
+    outline = cache.get(_data_key(course_id, version)) if version is not None else None
+    if outline is None:
+        # The version was read first, so an outline built from pre-change rows is never used after the change
+        outline = CourseOutline.build(course_id)
+        if version is not None:
+            cache.add(_data_key(course_id, version), outline, CACHE_TIMEOUT)
+    return outline
+
+
+def invalidate_outline(course_id):
+    """Make every worker rebuild a course's outline."""
+    if course_id is None:
+        return
+    key = _version_key(course_id)
+    try:
+        cache.add(key, int(time.time() * 1000), None)
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate outline of course {course_id}: {str(e)}")
+
+
+def _invalidate_on_commit(*course_ids):
+    for course_id in set(course_ids):
+        transaction.on_commit(lambda course_id=course_id: invalidate_outline(course_id))
+
+
+def _course_of_module(module_id):
+    return Module.objects.filter(pk=module_id).values_list('course_id', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_outline(sender, instance, **kwargs):
+    """The outline carries the course title and slug."""
+    _invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def invalidate_module_outline(sender, instance, **kwargs):
+    """A module was added, renamed, reordered or removed."""
+    _invalidate_on_commit(instance.course_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_outline(sender, instance, **kwargs):
+    """A lesson was added, renamed, reordered, moved or removed."""
+    course_ids = [_course_of_module(instance.module_id)]
+    # Set by courses.progress before the save when the lesson changed module
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if previous_module_id and previous_module_id != instance.module_id:
+        course_ids.append(_course_of_module(previous_module_id))
+    _invalidate_on_commit(*course_ids)
@@ -0,0 +1,295 @@
+"""
+Course progress for students.
+ProgressService computes per-lesson, per-module and per-course completion for
+one student across any number of courses in a fixed number of queries: the
+student's enrollments, lesson totals per module and completed lessons per module
+as grouped aggregates, plus the student's LessonProgress rows when lesson-level
+detail is needed.
+
+Each Enrollment also stores completed_lessons / total_lessons counters, from
+which progress_percent is derived. They are adjusted with F() expressions when
+a lesson is completed or a lesson is added to or removed from the course, so
+completing a lesson - and noticing that it completed the course - takes a
+constant number of queries however large the course is.
+"""
+
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Least
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Enrollment, Lesson, LessonProgress, Module
+from .stats import adjust_course_stats
+
+PERCENT = Case(
+    When(total_lessons=0, then=Value(0)),
+    default=Least(Value(100), F('completed_lessons') * 100 / F('total_lessons'))
+)
+
+
+def _percent(completed, total):
+    return int((completed / total) * 100) if total else 0
+
+
+class ProgressService:
+    """Completion figures of one student's courses."""
+
+    def __init__(self, user):
+        self.user = user
+
+    def summarize(self, courses, lessons=False):
+        """
+        Progress of the student in each of the given courses.
+
+        Runs three queries, or four with lessons=True, however many courses,
+        modules and lessons there are.
+
+        Args:
+            courses (iterable): Course instances or IDs
+            lessons (bool): Also return the LessonProgress row of every lesson started
+
+        Returns:
+            dict: course_id -> {
+                'enrollment_id': int or None,
+                'total_lessons': int,
+                'completed_lessons': int,
+                'percent': int,
+                'completed': bool - the enrollment is marked completed or every lesson is done,
+                'modules': {module_id: {'total_lessons', 'completed_lessons', 'percent'}},
+                'lessons': {lesson_id: LessonProgress} (with lessons=True),
+            }
+        """
+        course_ids = [getattr(course, 'pk', course) for course in courses]
+        summaries = {
+            course_id: {
+                'enrollment_id': None,
+                'total_lessons': 0,
+                'completed_lessons': 0,
+                'percent': 0,
+                'completed': False,
+                'modules': {},
+                'lessons': {},
+            }
+            for course_id in course_ids
+        }
+        if not course_ids or not getattr(self.user, 'is_authenticated', False):
+            return summaries
+
+        enrollments = {
+            enrollment_id: (course_id, completed)
+            for enrollment_id, course_id, completed in Enrollment.objects.filter(
+                student=self.user, course_id__in=course_ids
+            ).values_list('id', 'course_id', 'completed')
+        }
+        for enrollment_id, (course_id, completed) in enrollments.items():
+            summaries[course_id]['enrollment_id'] = enrollment_id
+            summaries[course_id]['completed'] = completed
+
+        totals = Lesson.objects.filter(module__course_id__in=course_ids).values(
+            'module_id', 'module__course_id'
+        ).annotate(lessons=Count('id')).order_by()
+        for row in totals:
+            summary = summaries[row['module__course_id']]
+            summary['modules'][row['module_id']] = {
+                'total_lessons': row['lessons'],
+                'completed_lessons': 0,
+                'percent': 0,
+            }
+            summary['total_lessons'] += row['lessons']
+
+        if enrollments:
+            done = LessonProgress.objects.filter(enrollment_id__in=enrollments, completed=True).values(
+                'enrollment_id', 'lesson__module_id'
+            ).annotate(lessons=Count('id')).order_by()
+            for row in done:
+                summary = summaries[enrollments[row['enrollment_id']][0]]
+                module = summary['modules'].get(row['lesson__module_id'])
+                if module is None:
+                    continue
+                module['completed_lessons'] = row['lessons']
+                summary['completed_lessons'] += row['lessons']
+
+            if lessons:
+                rows = LessonProgress.objects.filter(enrollment_id__in=enrollments).in_bulk()
+                for progress in rows.values():
+                    summaries[enrollments[progress.enrollment_id][0]]['lessons'][progress.lesson_id] = progress
+
+        for summary in summaries.values():
+            for module in summary['modules'].values():
+                module['percent'] = _percent(module['completed_lessons'], module['total_lessons'])
+            summary['percent'] = _percent(summary['completed_lessons'], summary['total_lessons'])
+            if summary['total_lessons'] and summary['completed_lessons'] >= summary['total_lessons']:
+                summary['completed'] = True
+
+        return summaries
+
+    def course_progress(self, course, lessons=False):
+        """Progress of the student in one course (see summarize)."""
+        return self.summarize([course], lessons=lessons)[getattr(course, 'pk', course)]
+
+
+def adjust_completed_lessons(enrollment_id, delta):
+    """
+    Add delta to an enrollment's completed lesson count and mark the enrollment
+    completed when it reaches the course's lesson count.
+
+    Returns:
+        bool: True if this change completed the course
+    """
+    enrollments = Enrollment.objects.filter(pk=enrollment_id)
+    if delta < 0:
+        enrollments = enrollments.filter(completed_lessons__gte=-delta)
+    enrollments.update(completed_lessons=F('completed_lessons') + delta)
+    enrollments = Enrollment.objects.filter(pk=enrollment_id)
+    enrollments.update(progress_percent=PERCENT)
+    if delta <= 0:
+        return False
+
+    # Conditional update, so only one concurrent request sees the course completed
+    finished = Enrollment.objects.filter(
+        pk=enrollment_id,
+        completed=False,
+        total_lessons__gt=0,
+        completed_lessons__gte=F('total_lessons')
+    )
+    if not finished.update(completed=True, status='completed'):
+        return False
+    adjust_course_stats(Enrollment.objects.filter(pk=enrollment_id).values_list('course_id', flat=True).first(), completed_count=1)
+    return True
+
+
+def adjust_total_lessons(course_id, delta):
+    """Add delta to the lesson count of every enrollment in a course."""
+    enrollments = Enrollment.objects.filter(course_id=course_id)
+    if delta < 0:
+        enrollments = enrollments.filter(total_lessons__gte=-delta)
+    if enrollments.update(total_lessons=F('total_lessons') + delta):
+        Enrollment.objects.filter(course_id=course_id).update(progress_percent=PERCENT)
+
+
+def complete_lesson(enrollment, lesson):
+    """
+    Mark a lesson completed for an enrollment.
+
+    Returns:
+        bool: True if this completed the course
+    """
+    progress, created = LessonProgress.objects.get_or_create(
+        enrollment=enrollment,
+        lesson=lesson,
+        defaults={'completed': True}
+    )
+    if created:
+        return getattr(progress, 'completed_course', False)
+
+    # Only the request whose UPDATE flips the row counts the lesson
+    flipped = LessonProgress.objects.filter(pk=progress.pk, completed=False).update(
+        completed=True, last_accessed=timezone.now()
+    )
+    return bool(flipped) and adjust_completed_lessons(enrollment.pk, 1)
+
+
+def complete_course(enrollment):
+    """
+    Mark an enrollment's course completed, whatever its lessons.
+
+    Returns:
+        bool: True if this completed the course, False if it already was
+    """
+    # Conditional update, so only one concurrent request counts the completion
+    if not Enrollment.objects.filter(pk=enrollment.pk, completed=False).update(completed=True, status='completed'):
+        return False
+    adjust_course_stats(enrollment.course_id, completed_count=1)
+    return True
+
+
+@receiver(pre_save, sender=LessonProgress)
+def claim_completion_change(sender, instance, update_fields=None, **kwargs):
+    """
+    Flip a saved lesson's completion with a conditional UPDATE before the save,
+    so of several concurrent saves only the one that changes the row counts it.
+    """
+    instance._completion_delta = 0
+    if instance._state.adding:
+        # The unique (enrollment, lesson) constraint lets only one insert through
+        instance._completion_delta = int(instance.completed)
+    elif update_fields is None or 'completed' in update_fields:
+        changed = LessonProgress.objects.filter(pk=instance.pk, completed=not instance.completed).update(
+            completed=instance.completed
+        )
+        if changed:
+            instance._completion_delta = 1 if instance.completed else -1
+
+
+@receiver(post_save, sender=LessonProgress)
+def count_completed_lesson(sender, instance, **kwargs):
+    """Count a lesson completed (or un-completed) on its enrollment."""
+    delta = getattr(instance, '_completion_delta', 0)
+    if delta > 0:
+        instance.completed_course = adjust_completed_lessons(instance.enrollment_id, 1)
+    elif delta < 0:
+        adjust_completed_lessons(instance.enrollment_id, -1)
+
+
+@receiver(post_delete, sender=LessonProgress)
+def uncount_deleted_lesson_progress(sender, instance, **kwargs):
+    """Remove a deleted completion from its enrollment."""
+    if instance.completed:
+        adjust_completed_lessons(instance.enrollment_id, -1)
+
+
+def _course_of_module(module_id):
+    return Module.objects.filter(pk=module_id).values_list('course_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_module(sender, instance, **kwargs):
+    """Note the module a lesson was in, in case it is moved to another course."""
+    instance._previous_module_id = None
+    if not instance._state.adding:
+        instance._previous_module_id = Lesson.objects.filter(pk=instance.pk).values_list('module_id', flat=True).first()
+
+
+@receiver(post_save, sender=Lesson)
+def count_saved_lesson(sender, instance, created, **kwargs):
+    """Count a new lesson in its course's enrollments, or move a lesson between courses."""
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if created:
+        adjust_total_lessons(_course_of_module(instance.module_id), 1)
+    elif previous_module_id and previous_module_id != instance.module_id:
+        previous_course_id = _course_of_module(previous_module_id)
+        course_id = _course_of_module(instance.module_id)
+        if previous_course_id != course_id:
+            adjust_total_lessons(previous_course_id, -1)
+            adjust_total_lessons(course_id, 1)
+
+
+@receiver(post_delete, sender=Lesson)
+def uncount_deleted_lesson(sender, instance, **kwargs):
+    """Remove a deleted lesson from its course's enrollments."""
+    course_id = _course_of_module(instance.module_id)
+    if course_id is not None:
+        adjust_total_lessons(course_id, -1)
+
+
+def rebuild_progress_counters():
+    """
+    Recompute every enrollment's lesson counters and progress_percent.
+
+    Returns:
+        int: Number of enrollments updated
+    """
+    lesson_counts = Lesson.objects.filter(module__course_id=OuterRef('course_id')).order_by().values(
+        'module__course_id'
+    ).annotate(lessons=Count('id')).values('lessons')
+    completed_counts = LessonProgress.objects.filter(enrollment_id=OuterRef('pk'), completed=True).order_by().values(
+        'enrollment_id'
+    ).annotate(lessons=Count('id')).values('lessons')
+
+    updated = Enrollment.objects.update(
+        total_lessons=Coalesce(Subquery(lesson_counts), 0),
+        completed_lessons=Coalesce(Subquery(completed_counts), 0)
+    )
+    Enrollment.objects.update(progress_percent=PERCENT)
+    return updated
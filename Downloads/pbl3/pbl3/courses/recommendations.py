@@ -0,0 +1,172 @@
+"""
+Course recommendations from co-enrollment.
+An offline job (build_course_recommendations) builds a sparse course x student
+enrollment matrix and stores, for every course, its top-k most similar courses
+by cosine similarity of their student sets in CourseSimilarity. Recommending
+then reads the similarity rows of the student's own courses and sums them per
+candidate in memory. Students with no enrollments, or whose courses have no
+similar courses yet, get a cached list of the most popular courses.
+"""
+
+import logging
+from collections import defaultdict
+
+# Try to import NumPy / SciPy, handle gracefully if not available
+try:
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, When
+
+from .models import Course, CourseSimilarity, Enrollment
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+POPULAR_CACHE_KEY = 'courses:recommendations:popular'
+
+# Courses multiplied against the whole matrix at once while building
+BLOCK_SIZE = 1000
+
+
+def _top_k(row_ids, row_scores, k):
+    """Indices of the k highest scores, best first."""
+    if len(row_scores) > k:
+        keep = np.argpartition(-row_scores, k)[:k]
+        row_ids, row_scores = row_ids[keep], row_scores[keep]
+    order = np.argsort(-row_scores, kind='stable')
+    return row_ids[order], row_scores[order]
+
+
+def build_similarities(top_k=None, min_common=None):
+    """
+    Recompute co-enrollment similarities between all courses.
+
+    Similarity is the cosine of two courses' student sets: shared students over
+    the geometric mean of their enrollment counts. Pairs with fewer than
+    min_common shared students are left out as noise.
+
+    Returns:
+        int: Number of similarity rows stored
+
+    Raises:
+        RuntimeError: If NumPy / SciPy are not installed
+    """
+    if not SCIPY_AVAILABLE:
+        raise RuntimeError("NumPy and SciPy are required to build course recommendations")
+
+    top_k = top_k or getattr(settings, 'COURSES_SIMILAR_TOP_K', 20)
+    min_common = min_common or getattr(settings, 'COURSES_SIMILAR_MIN_COMMON', 2)
+
+    pairs = list(
+        Enrollment.objects.exclude(status='dropped').values_list('course_id', 'student_id').distinct()
+    )
+    if not pairs:
+        with transaction.atomic():
+            CourseSimilarity.objects.filter(kind='enrollment').delete()
+        return 0
+
+    course_ids, course_index = np.unique(np.array([course for course, _ in pairs]), return_inverse=True)
+    _, student_index = np.unique(np.array([student for _, student in pairs]), return_inverse=True)
+    matrix = csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (course_index, student_index)),
+        shape=(len(course_ids), student_index.max() + 1)
+    )
+    sizes = np.asarray(matrix.sum(axis=1)).ravel()
+    transposed = matrix.T.tocsr()
+
+    rows = []
+    for start in range(0, matrix.shape[0], BLOCK_SIZE):
+        # Shared-student counts of a block of courses against every course
+        common = (matrix[start:start + BLOCK_SIZE] @ transposed).tocsr()
+        for offset in range(common.shape[0]):
+            position = start + offset
+            indices = common.indices[common.indptr[offset]:common.indptr[offset + 1]]
+            data = common.data[common.indptr[offset]:common.indptr[offset + 1]]
+            keep = (indices != position) & (data >= min_common)
+            neighbours, counts = indices[keep], data[keep]
+            if not len(neighbours):
+                continue
+            scores = counts / np.sqrt(sizes[position] * sizes[neighbours])
+            neighbours, scores = _top_k(neighbours, scores, top_k)
+            rows.extend(
+                CourseSimilarity(
+                    course_id=int(course_ids[position]),
+                    similar_course_id=int(course_ids[neighbour]),
+                    kind='enrollment',
+                    score=round(float(score), 6)
+                )
+                for neighbour, score in zip(neighbours, scores)
+            )
+
+    with transaction.atomic():
+        CourseSimilarity.objects.filter(kind='enrollment').delete()
+        CourseSimilarity.objects.bulk_create(rows, batch_size=1000)
+
+    logger.info(f"Stored {len(rows)} co-enrollment similarities for {matrix.shape[0]} course(s)")
+    return len(rows)
+
+
+def popular_course_ids(limit=100):
+    """IDs of the most enrolled published courses, cached."""
+    course_ids = cache.get(POPULAR_CACHE_KEY)
+    if course_ids is None:
+        course_ids = list(
+            Course.objects.filter(status='published')
+            .order_by('-enrollment_count', '-created')
+            .values_list('id', flat=True)[:limit]
+        )
+        cache.set(POPULAR_CACHE_KEY, course_ids, getattr(settings, 'COURSES_POPULAR_CACHE_TIMEOUT', 60 * 60))
+    return course_ids
+
+
+def recommend_course_ids(user, limit=50):
+    """
+    Rank courses for a student from the courses they are enrolled in.
+
+    Returns:
+        list: Course IDs, best first, excluding the student's own courses
+    """
+    enrolled = set()
+    if getattr(user, 'is_authenticated', False):
+        enrolled = set(Enrollment.objects.filter(student=user).values_list('course_id', flat=True))
+
+    scores = defaultdict(float)
+    if enrolled:
+        similar = CourseSimilarity.objects.filter(kind='enrollment', course_id__in=enrolled).values_list(
+            'similar_course_id', 'score'
+        )
+        for course_id, score in similar:
+            if course_id not in enrolled:
+                scores[course_id] += score
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    if len(ranked) < limit:
+        # Cold start, or too few neighbours: fill up with popular courses
+        seen = enrolled | set(ranked)
+        ranked.extend(course_id for course_id in popular_course_ids() if course_id not in seen)
+    return ranked[:limit]
+
+
+def recommended_courses(user, limit=50):
+    """
+    Published courses recommended for a student, best first.
+
+    Returns:
+        QuerySet: Courses ordered by recommendation rank
+    """
+    ranked_ids = recommend_course_ids(user, limit)
+    if not ranked_ids:
+        return Course.objects.none()
+
+    rank = Case(
+        *[When(pk=course_id, then=position) for position, course_id in enumerate(ranked_ids)],
+        output_field=IntegerField()
+    )
+    return Course.objects.filter(pk__in=ranked_ids, status='published').order_by(rank)
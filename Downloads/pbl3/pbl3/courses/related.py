@@ -0,0 +1,322 @@
+"""
+Content-based related courses for the course detail page.
+Published courses are compared by TF-IDF vectors of their title, overview,
+learning outcomes and tags, and each course's top-N most similar courses are
+stored in CourseSimilarity (kind 'content'), so the detail page reads a
+precomputed list.
+
+When a course is saved or deleted only the affected rows are rewritten: the
+course's own list, and the lists it enters, leaves or moves within. Term
+weights of untouched lists follow corpus changes at the next full rebuild
+(rebuild_related_courses). Updates vectorise the whole catalog, so they run in a
+background worker after the transaction commits, and saves that leave the
+compared fields and tags alone do not queue one.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Try to import scikit-learn, handle gracefully if not available
+try:
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, Count, IntegerField, Min, When
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Course, CourseSimilarity
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+KIND = 'content'
+
+# Course fields the compared text and the published corpus are built from
+INDEXED_FIELDS = ('title', 'overview', 'learning_outcomes', 'status')
+
+# Background updater with lazy initialization
+_executor = None
+# Courses waiting for an update: course ID -> courses whose lists contained it
+_queued = {}
+_queued_lock = threading.Lock()
+
+
+def _top_n():
+    return getattr(settings, 'COURSES_RELATED_TOP_N', 8)
+
+
+def _corpus():
+    """
+    Course IDs and document texts of all published courses.
+    Titles and tags are repeated to weigh them above the longer text fields.
+    """
+    courses = list(
+        Course.objects.filter(status='published').order_by('id').values_list(
+            'id', 'title', 'overview', 'learning_outcomes'
+        )
+    )
+    tags = {}
+    for course_id, name in Course.tags.through.objects.filter(course__status='published').values_list(
+        'course_id', 'tag__name'
+    ):
+        tags.setdefault(course_id, []).append(name)
+
+    ids, documents = [], []
+    for course_id, title, overview, outcomes in courses:
+        tag_text = ' '.join(tags.get(course_id, []))
+        ids.append(course_id)
+        documents.append(f"{title} {title} {tag_text} {tag_text} {overview} {outcomes}")
+    return ids, documents
+
+
+def _vectorize(documents):
+    """L2-normalised TF-IDF matrix of the documents."""
+    vectorizer = TfidfVectorizer(
+        stop_words='english',
+        sublinear_tf=True,
+        ngram_range=(1, 2),
+        max_features=50000,
+        dtype=np.float32
+    )
+    return vectorizer.fit_transform(documents)
+
+
+def _rows_for(matrix, ids, positions):
+    """CourseSimilarity rows of the top-N related courses of the courses at `positions`."""
+    top_n = _top_n()
+    similarities = (matrix[positions] @ matrix.T).toarray()
+    rows = []
+    for offset, position in enumerate(positions):
+        scores = similarities[offset]
+        scores[position] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-scores[candidates], top_n)[:top_n]]
+        for candidate in candidates[np.argsort(-scores[candidates], kind='stable')]:
+            rows.append(CourseSimilarity(
+                course_id=ids[position],
+                similar_course_id=ids[candidate],
+                kind=KIND,
+                score=round(float(scores[candidate]), 6)
+            ))
+    return rows
+
+
+def _store(course_ids, rows):
+    """Replace the related-course lists of the given courses."""
+    with transaction.atomic():
+        CourseSimilarity.objects.filter(kind=KIND, course_id__in=course_ids).delete()
+        CourseSimilarity.objects.bulk_create(rows, batch_size=1000)
+
+
+def rebuild_related_courses():
+    """
+    Recompute the related courses of every published course.
+
+    Returns:
+        int: Number of courses indexed
+
+    Raises:
+        RuntimeError: If scikit-learn is not installed
+    """
+    if not SKLEARN_AVAILABLE:
+        raise RuntimeError("scikit-learn is required to build related courses")
+
+    ids, documents = _corpus()
+    if len(ids) < 2:
+        with transaction.atomic():
+            CourseSimilarity.objects.filter(kind=KIND).delete()
+        return len(ids)
+
+    matrix = _vectorize(documents)
+    rows = []
+    for start in range(0, len(ids), 500):
+        rows.extend(_rows_for(matrix, ids, list(range(start, min(start + 500, len(ids))))))
+    with transaction.atomic():
+        CourseSimilarity.objects.filter(kind=KIND).delete()
+        CourseSimilarity.objects.bulk_create(rows, batch_size=1000)
+
+    logger.info(f"Stored related courses of {len(ids)} course(s)")
+    return len(ids)
+
+
+def update_related_courses(course_id, listing=()):
+    """
+    Bring the stored lists up to date after one course changed.
+
+    Rewrites the course's own list, the lists that contained it, and the lists
+    of courses it is now similar enough to enter.
+
+    Args:
+        course_id (int): The changed course
+        listing (iterable): Courses whose lists contained it, when those rows are
+            already gone (a deleted course's rows are removed by the cascade)
+    """
+    if not SKLEARN_AVAILABLE:
+        return
+
+    ids, documents = _corpus()
+    listing = set(listing) | set(
+        CourseSimilarity.objects.filter(kind=KIND, similar_course_id=course_id).values_list('course_id', flat=True)
+    )
+    if course_id not in ids or len(ids) < 2:
+        # Unpublished or deleted: drop its list and refill the lists it was in
+        CourseSimilarity.objects.filter(kind=KIND, course_id=course_id).delete()
+        if len(ids) >= 2 and listing:
+            matrix = _vectorize(documents)
+            positions = [index for index, other in enumerate(ids) if other in listing]
+            _store(listing, _rows_for(matrix, ids, positions))
+        return
+
+    matrix = _vectorize(documents)
+    position = ids.index(course_id)
+    scores = (matrix @ matrix[position].T).toarray().ravel()
+
+    # Lists the course would now enter: it beats their weakest entry, or they are not full
+    top_n = _top_n()
+    weakest = {
+        row['course_id']: (row['weakest'], row['count'])
+        for row in CourseSimilarity.objects.filter(kind=KIND).values('course_id').annotate(
+            weakest=Min('score'), count=Count('id')
+        ).order_by()
+    }
+    affected = {course_id} | listing
+    for index, other in enumerate(ids):
+        if other == course_id or scores[index] <= 0:
+            continue
+        floor, count = weakest.get(other, (0, 0))
+        if count < top_n or scores[index] > floor:
+            affected.add(other)
+
+    positions = [index for index, other in enumerate(ids) if other in affected]
+    _store(affected, _rows_for(matrix, ids, positions))
+
+
+def get_related_executor():
+    """
+    Get the related-course update pool, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: The shared single-worker pool
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related-courses')
+
+    return _executor
+
+
+def _run_queued(course_id):
+    """Update one queued course, with every change queued for it since the last update."""
+    with _queued_lock:
+        listing = _queued.pop(course_id, None)
+    if listing is None:
+        return
+    try:
+        update_related_courses(course_id, listing)
+    except Exception as e:
+        logger.error(f"Error updating related courses of course {course_id}: {str(e)}")
+    finally:
+        # The worker thread keeps its own database connection - do not leak it
+        connections.close_all()
+
+
+def _update_on_commit(course_id, listing=()):
+    """Queue an update of a course's lists once the current transaction commits."""
+    def enqueue():
+        with _queued_lock:
+            queued = course_id in _queued
+            _queued.setdefault(course_id, set()).update(listing)
+        if queued:
+            return
+        try:
+            get_related_executor().submit(_run_queued, course_id)
+        except RuntimeError as e:
+            with _queued_lock:
+                _queued.pop(course_id, None)
+            logger.warning(f"Could not queue related courses update of course {course_id}: {str(e)}")
+    transaction.on_commit(enqueue)
+
+
+@receiver(pre_save, sender=Course)
+def remember_indexed_fields(sender, instance, update_fields=None, **kwargs):
+    """Note the compared fields before a save, so saves that leave them alone are skipped."""
+    fields = [field for field in INDEXED_FIELDS if field not in instance.get_deferred_fields()]
+    if instance._state.adding or instance.pk is None:
+        instance._related_previous = None
+    elif update_fields is not None and not set(fields) & set(update_fields):
+        instance._related_previous = {field: getattr(instance, field) for field in fields}
+    else:
+        instance._related_previous = Course.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Course)
+def update_saved_course(sender, instance, created, **kwargs):
+    """Course text or status may have changed."""
+    previous = getattr(instance, '_related_previous', None)
+    if not created and previous is not None and all(
+        getattr(instance, field) == value for field, value in previous.items()
+    ):
+        return
+    _update_on_commit(instance.pk)
+
+
+@receiver(pre_delete, sender=Course)
+def remember_listing_courses(sender, instance, **kwargs):
+    """Note which lists a course is in before the cascade removes them."""
+    instance._related_listing = list(
+        CourseSimilarity.objects.filter(kind=KIND, similar_course=instance).values_list('course_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Course)
+def update_deleted_course(sender, instance, **kwargs):
+    """Refill the lists a deleted course was in."""
+    _update_on_commit(instance.pk, getattr(instance, '_related_listing', ()))
+
+
+@receiver(m2m_changed, sender=Course.tags.through)
+def update_retagged_course(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tags are part of the compared text."""
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Adding tags the course already has, or removing ones it does not, changes nothing
+    if action != 'post_clear' and not pk_set:
+        return
+    _update_on_commit(instance.pk)
+
+
+def related_courses(course, limit=4):
+    """
+    Courses related to a course, most similar first.
+
+    Falls back to popular courses of the same category until the course has a
+    stored list.
+
+    Returns:
+        QuerySet: Published courses
+    """
+    related_ids = list(
+        CourseSimilarity.objects.filter(kind=KIND, course=course).order_by('-score')
+        .values_list('similar_course_id', flat=True)[:limit]
+    )
+    if not related_ids:
+        if course.category_id is None:
+            return Course.objects.none()
+        return Course.objects.filter(category_id=course.category_id, status='published').exclude(
+            pk=course.pk
+        ).order_by('-enrollment_count')[:limit]
+
+    rank = Case(
+        *[When(pk=course_id, then=position) for position, course_id in enumerate(related_ids)],
+        output_field=IntegerField()
+    )
+    return Course.objects.filter(pk__in=related_ids, status='published').order_by(rank)
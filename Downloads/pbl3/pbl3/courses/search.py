@@ -0,0 +1,387 @@
+"""
+Full-text search over the course catalog.
+Course titles, overviews, descriptions and tag names are indexed into an SQLite
+FTS5 table, or a tsvector column with a GIN index on PostgreSQL, and kept in
+sync by signals on Course and its tags. Searches are ranked (BM25 on SQLite,
+ts_rank_cd on PostgreSQL), match word prefixes so results appear while the
+student is still typing, and return highlighted snippets. On other databases,
+or an SQLite build without FTS5, search falls back to icontains filtering.
+
+The index tables are managed here rather than by migrations: they are created
+on first use and filled from the courses table when they are new. A table created
+inside a transaction is only taken as ready once that transaction commits.
+"""
+
+import html
+import logging
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils.safestring import mark_safe
+
+from .models import Course, Tag
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'courses_course_fts'
+TSVECTOR_TABLE = 'courses_course_search'
+
+# Column weights: title, tags, overview, description
+SQLITE_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+# Highlight markers, swapped for <mark> once the snippet is HTML-escaped
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Backend the index was prepared for in this process: 'fts5', 'tsvector' or None
+_backend = None
+_prepared = False
+_preparing = False
+# A table was created in a transaction that has not committed yet
+_awaiting_commit = False
+
+
+def _sqlite_has_fts5():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Some builds load FTS5 without reporting the compile option
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.courses_fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.courses_fts5_probe")
+            return True
+        except DatabaseError:
+            return False
+
+
+def _create_index():
+    """
+    Create the index table for the current database if it does not exist.
+
+    Returns:
+        bool: True if the table was created and still has to be filled
+    """
+    existing = set(connection.introspection.table_names())
+
+    if _backend == 'fts5':
+        if FTS_TABLE in existing:
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "title, tags, overview, description, tokenize='porter unicode61 remove_diacritics 2')"
+            )
+        return True
+
+    if _backend == 'tsvector':
+        if TSVECTOR_TABLE in existing:
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {TSVECTOR_TABLE} ("
+                f"course_id bigint PRIMARY KEY REFERENCES {Course._meta.db_table} (id) ON DELETE CASCADE, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX {TSVECTOR_TABLE}_document_gin ON {TSVECTOR_TABLE} USING GIN (document)")
+        return True
+
+    return False
+
+
+def _mark_prepared():
+    global _prepared, _awaiting_commit
+    _prepared = True
+    _awaiting_commit = False
+
+
+def prepare_index():
+    """
+    Pick the search backend for the current database and create its index table,
+    filling it on creation. Runs once per process, or until the transaction that
+    created the table commits, since a rollback takes the table with it.
+
+    Returns:
+        str: 'fts5', 'tsvector' or None (icontains fallback)
+    """
+    global _backend, _preparing, _awaiting_commit
+
+    # rebuild_index() calls back in here while the table is being filled
+    if _prepared or _preparing:
+        return _backend
+
+    _preparing = True
+    try:
+        if connection.vendor == 'sqlite' and _sqlite_has_fts5():
+            _backend = 'fts5'
+        elif connection.vendor == 'postgresql':
+            _backend = 'tsvector'
+        else:
+            _backend = None
+        created = _create_index()
+        if created:
+            rebuild_index()
+        if connection.in_atomic_block and (created or _awaiting_commit):
+            if created:
+                _awaiting_commit = True
+                transaction.on_commit(_mark_prepared)
+            return _backend
+    except DatabaseError as e:
+        logger.error(f"Course search index unavailable, falling back to icontains: {str(e)}")
+        _backend = None
+    finally:
+        _preparing = False
+
+    _mark_prepared()
+    return _backend
+
+
+def _document(course):
+    """Indexed text of a course: (title, tags, overview, description)."""
+    tags = ' '.join(tag.name for tag in course.tags.all()) if course.pk else ''
+    return course.title or '', tags, course.overview or '', course.description or ''
+
+
+def index_course(course):
+    """Add or replace a course in the search index."""
+    backend = prepare_index()
+    if backend is None:
+        return
+
+    title, tags, overview, description = _document(course)
+    with connection.cursor() as cursor:
+        if backend == 'fts5':
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [course.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, tags, overview, description) VALUES (%s, %s, %s, %s, %s)",
+                [course.pk, title, tags, overview, description]
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {TSVECTOR_TABLE} (course_id, document) VALUES (%s, "
+                "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B') || "
+                "setweight(to_tsvector('english', %s), 'C') || setweight(to_tsvector('english', %s), 'D')) "
+                "ON CONFLICT (course_id) DO UPDATE SET document = EXCLUDED.document",
+                [course.pk, title, tags, overview, description]
+            )
+
+
+def remove_course(course_id):
+    """Drop a course from the search index."""
+    backend = prepare_index()
+    if backend is None:
+        return
+
+    with connection.cursor() as cursor:
+        if backend == 'fts5':
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [course_id])
+        else:
+            cursor.execute(f"DELETE FROM {TSVECTOR_TABLE} WHERE course_id = %s", [course_id])
+
+
+def rebuild_index():
+    """
+    Reindex every course.
+
+    Returns:
+        int: Number of courses indexed
+    """
+    backend = prepare_index()
+    if backend is None:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE if backend == 'fts5' else TSVECTOR_TABLE}")
+
+    indexed = 0
+    for course in Course.objects.prefetch_related('tags').iterator(chunk_size=500):
+        index_course(course)
+        indexed += 1
+    return indexed
+
+
+@receiver(post_save, sender=Course)
+def reindex_saved_course(sender, instance, **kwargs):
+    """Keep the index in step with course edits. Never blocks the save."""
+    try:
+        with transaction.atomic():
+            index_course(instance)
+    except DatabaseError as e:
+        logger.error(f"Error indexing course {instance.pk}: {str(e)}")
+
+
+@receiver(post_delete, sender=Course)
+def unindex_deleted_course(sender, instance, **kwargs):
+    """Remove a deleted course from the index."""
+    try:
+        with transaction.atomic():
+            remove_course(instance.pk)
+    except DatabaseError as e:
+        logger.error(f"Error removing course {instance.pk} from the index: {str(e)}")
+
+
+@receiver(m2m_changed, sender=Course.tags.through)
+def reindex_retagged_course(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tag names are indexed with the course, so tag changes reindex it."""
+    if reverse and action == 'pre_clear':
+        # Once a tag is cleared there is no record of the courses it was on
+        instance._search_cleared = list(instance.courses.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        course_ids = getattr(instance, '_search_cleared', []) if action == 'post_clear' else pk_set or []
+        courses = Course.objects.filter(pk__in=course_ids)
+    else:
+        courses = [instance]
+    for course in courses:
+        reindex_saved_course(Course, course)
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag(sender, instance, created, **kwargs):
+    """Reindex the courses of a renamed tag."""
+    if not created:
+        for course in instance.courses.all():
+            reindex_saved_course(Course, course)
+
+
+def _sqlite_query(terms):
+    """FTS5 query matching every term as a prefix; terms are quoted so FTS5 syntax is inert."""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _postgres_query(terms):
+    """to_tsquery() input matching every term as a prefix."""
+    return ' & '.join(f"{term}:*" for term in terms)
+
+
+def _highlight(snippet):
+    """HTML-escape a snippet and turn its highlight markers into <mark> tags."""
+    escaped = html.escape(snippet or '')
+    return mark_safe(escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+
+
+def search(query, limit=200, within=None, snippets=True):
+    """
+    Search the catalog.
+
+    Args:
+        query (str): The student's search text
+        limit (int): Maximum number of results, or None for all of them
+        within (QuerySet, optional): Only rank these courses. Filters belong here
+            rather than on the results, which the limit has already cut short
+        snippets (bool): Build highlighted snippets; None is returned in their place otherwise
+
+    Returns:
+        list: (course_id, snippet) tuples, best match first, where snippet is
+            safe HTML with the matched words in <mark> tags; None when full-text
+            search is unavailable on this database
+    """
+    backend = prepare_index()
+    if backend is None:
+        return None
+
+    terms = [term.lower() for term in WORD_PATTERN.findall(query or '')][:12]
+    if not terms:
+        return []
+
+    restrict, restrict_params = '', []
+    if within is not None:
+        subquery, restrict_params = within.order_by().values('pk').query.get_compiler(connection=connection).as_sql()
+        restrict = f" AND {'rowid' if backend == 'fts5' else 's.course_id'} IN ({subquery})"
+    limit_clause, limit_params = (' LIMIT %s', [limit]) if limit is not None else ('', [])
+
+    snippet, snippet_params = 'NULL', []
+    with connection.cursor() as cursor:
+        if backend == 'fts5':
+            weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+            if snippets:
+                # Column -1 lets FTS5 take the snippet from the best matching column
+                snippet = f"snippet({FTS_TABLE}, -1, %s, %s, '…', 24)"
+                snippet_params = [HIGHLIGHT_START, HIGHLIGHT_END]
+            cursor.execute(
+                f"SELECT rowid, {snippet} "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{restrict} "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}){limit_clause}",
+                snippet_params + [_sqlite_query(terms)] + list(restrict_params) + limit_params
+            )
+        else:
+            if snippets:
+                snippet = "ts_headline('english', c.overview || ' ' || c.description, q, %s)"
+                snippet_params = [
+                    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=30, MinWords=12, MaxFragments=1"
+                ]
+            cursor.execute(
+                f"SELECT s.course_id, {snippet} "
+                f"FROM {TSVECTOR_TABLE} s JOIN {Course._meta.db_table} c ON c.id = s.course_id, "
+                "to_tsquery('english', %s) q "
+                f"WHERE s.document @@ q{restrict} ORDER BY ts_rank_cd(s.document, q) DESC{limit_clause}",
+                snippet_params + [_postgres_query(terms)] + list(restrict_params) + limit_params
+            )
+        rows = cursor.fetchall()
+
+    return [(course_id, _highlight(snippet)) for course_id, snippet in rows]
+
+
+def _search_or_none(query, **kwargs):
+    """search(), with database errors logged and reported as search being unavailable."""
+    try:
+        return search(query, **kwargs)
+    except DatabaseError as e:
+        logger.warning(f"Course search failed, falling back to icontains: {str(e)}")
+        return None
+
+
+def _icontains(queryset, query):
+    return queryset.filter(
+        Q(title__icontains=query) |
+        Q(overview__icontains=query) |
+        Q(description__icontains=query)
+    )
+
+
+def filter_queryset(queryset, query):
+    """
+    Restrict a course queryset to search matches, ordered by relevance.
+
+    Only courses in the queryset are ranked, so filter it before calling this;
+    apply it last, since later ordering would replace the relevance order.
+
+    Returns:
+        tuple: (queryset, snippets) - snippets maps course ID to highlighted
+            snippet HTML (empty on the icontains fallback)
+    """
+    results = _search_or_none(query, within=queryset)
+    if results is None:
+        return _icontains(queryset, query), {}
+
+    if not results:
+        return queryset.none(), {}
+
+    ranked_ids = [course_id for course_id, _ in results]
+    relevance = Case(
+        *[When(pk=course_id, then=position) for position, course_id in enumerate(ranked_ids)],
+        output_field=IntegerField()
+    )
+    return queryset.filter(pk__in=ranked_ids).order_by(relevance), dict(results)
+
+
+def matching_ids(queryset, query):
+    """
+    IDs of every course in a queryset that matches a search, without the result
+    limit or snippets, e.g. to count matches per facet.
+
+    Returns:
+        list: Course IDs
+    """
+    results = _search_or_none(query, limit=None, within=queryset, snippets=False)
+    if results is None:
+        return list(_icontains(queryset, query).values_list('pk', flat=True))
+    return [course_id for course_id, _ in results]
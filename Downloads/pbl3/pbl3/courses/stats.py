@@ -0,0 +1,130 @@
+"""
+Denormalised course statistics.
+Course.rating_sum / rating_count and Course.enrollment_count / completed_count
+are adjusted with F() expressions whenever a review or enrollment is created,
+changed or deleted, in the same transaction as the change, so course cards read
+ratings, student counts and completion rates without any queries.
+rebuild_course_stats() recomputes them from scratch to correct any drift.
+"""
+
+import logging
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Course, CourseReview, Enrollment
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = Course.STAT_FIELDS
+
+
+def adjust_course_stats(course_id, **deltas):
+    """
+    Atomically add deltas to a course's statistics.
+
+    Args:
+        course_id (int): ID of the course
+        **deltas: Amounts to add, keyed by statistic field name
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if course_id and changes:
+        Course.objects.filter(pk=course_id).update(**changes)
+
+
+def _previous_values(instance, fields, update_fields):
+    """
+    Stored values of `fields` before a save, or None for a new row.
+    Saves whose update_fields leave all of `fields` alone need no lookup.
+    """
+    if instance._state.adding or instance.pk is None:
+        return None
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return {field: getattr(instance, field) for field in fields}
+    return type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(pre_save, sender=CourseReview)
+def remember_review_rating(sender, instance, update_fields=None, **kwargs):
+    """Note the rating a review had before it is saved."""
+    instance._stats_previous = _previous_values(instance, ('course_id', 'rating'), update_fields)
+
+
+@receiver(post_save, sender=CourseReview)
+def count_saved_review(sender, instance, created, **kwargs):
+    """Add a new review's rating, or the change of an edited one."""
+    previous = getattr(instance, '_stats_previous', None)
+    if created or previous is None:
+        adjust_course_stats(instance.course_id, rating_sum=instance.rating, rating_count=1)
+    elif previous['course_id'] != instance.course_id:
+        adjust_course_stats(previous['course_id'], rating_sum=-previous['rating'], rating_count=-1)
+        adjust_course_stats(instance.course_id, rating_sum=instance.rating, rating_count=1)
+    else:
+        adjust_course_stats(instance.course_id, rating_sum=instance.rating - previous['rating'])
+
+
+@receiver(post_delete, sender=CourseReview)
+def count_deleted_review(sender, instance, **kwargs):
+    """Take a deleted review's rating out of the course rating."""
+    adjust_course_stats(instance.course_id, rating_sum=-instance.rating, rating_count=-1)
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_enrollment_state(sender, instance, update_fields=None, **kwargs):
+    """Note whether an enrollment was completed before it is saved."""
+    instance._stats_previous = _previous_values(instance, ('course_id', 'completed'), update_fields)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_saved_enrollment(sender, instance, created, **kwargs):
+    """Count a new enrollment, or a change in completion."""
+    previous = getattr(instance, '_stats_previous', None)
+    if created or previous is None:
+        adjust_course_stats(instance.course_id, enrollment_count=1, completed_count=int(instance.completed))
+    elif previous['course_id'] != instance.course_id:
+        adjust_course_stats(previous['course_id'], enrollment_count=-1, completed_count=-int(previous['completed']))
+        adjust_course_stats(instance.course_id, enrollment_count=1, completed_count=int(instance.completed))
+    else:
+        adjust_course_stats(instance.course_id, completed_count=int(instance.completed) - int(previous['completed']))
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_deleted_enrollment(sender, instance, **kwargs):
+    """Remove a deleted enrollment from the course counts."""
+    adjust_course_stats(instance.course_id, enrollment_count=-1, completed_count=-int(instance.completed))
+
+
+def rebuild_course_stats():
+    """
+    Recompute every course's statistics from its reviews and enrollments.
+    Changes made through queryset.update() or bulk_create() skip the model
+    signals, so this is the way to bring the counters back in line.
+
+    Returns:
+        int: Number of courses whose statistics were corrected
+    """
+    ratings = {
+        row['course_id']: (row['total'] or 0, row['count'])
+        for row in CourseReview.objects.values('course_id').annotate(total=Sum('rating'), count=Count('id'))
+    }
+    enrollments = {
+        row['course_id']: (row['count'], row['completed'])
+        for row in Enrollment.objects.values('course_id').annotate(
+            count=Count('id'), completed=Count('id', filter=Q(completed=True))
+        )
+    }
+
+    drifted = []
+    for course in Course.objects.only('id', *STAT_FIELDS).iterator():
+        actual = ratings.get(course.id, (0, 0)) + enrollments.get(course.id, (0, 0))
+        if tuple(getattr(course, field) for field in STAT_FIELDS) != actual:
+            for field, value in zip(STAT_FIELDS, actual):
+                setattr(course, field, value)
+            drifted.append(course)
+
+    Course.objects.bulk_update(drifted, STAT_FIELDS, batch_size=500)
+    if drifted:
+        logger.info(f"Corrected statistics of {len(drifted)} course(s)")
+    return len(drifted)
@@ -0,0 +1,121 @@
+"""
+Versioned cache of the catalog taxonomy: categories, tags and difficulties.
+Catalog pages list all three on every request. They are stored as tuples under
+a key containing a version number, both in the shared Django cache and in
+process memory; saving or deleting a category, tag or difficulty bumps the
+version, so every worker moves to fresh data on its next request and catalog
+pages make no taxonomy queries in between. With a per-process cache backend
+other workers would never see the bump, so the taxonomy is read from the
+database on every request instead.
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.cache import cache_is_shared
+
+from .models import Category, Difficulty, Tag
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'courses:taxonomy:version'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Cached fields of each model, in tuple order
+FIELDS = {
+    'categories': (Category, ('id', 'name', 'slug', 'description', 'icon', 'parent_id')),
+    'tags': (Tag, ('id', 'name', 'slug')),
+    'difficulties': (Difficulty, ('id', 'name', 'level')),
+}
+
+# This worker's copy: (version, rows)
+_local = None
+_local_lock = threading.Lock()
+
+
+def _data_key(version):
+    return f"courses:taxonomy:v{version}"
+
+
+def current_version():
+    """The taxonomy version, created if the cache has none."""
+    cache.add(VERSION_KEY, int(time.time() * 1000), None)
+    return cache.get(VERSION_KEY)
+
+
+def _load():
+    """Taxonomy rows from the database, as {name: [tuple, ...]}."""
+    return {
+        name: list(model.objects.values_list(*fields))
+        for name, (model, fields) in FIELDS.items()
+    }
+
+
+def _rows():
+    """Taxonomy rows at the current version, from process memory, the shared cache or the database."""
+    global _local
+
+    if not cache_is_shared():
+        return _load()
+
+    version = current_version()
+    with _local_lock:
+        if _local is not None and _local[0] == version:
+            return _local[1]
+
+    rows = cache.get(_data_key(version)) if version is not None else None
+    if rows is None:
+        # The version was read before the database, so a concurrent change leaves this entry unused
+        rows = _load()
+        if version is not None:
+            cache.add(_data_key(version), rows, CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local = (version, rows)
+    return rows
+
+
+def get_taxonomy():
+    """
+    Categories, tags and difficulties for catalog pages.
+
+    The objects are unsaved model instances built from the cached tuples, new
+    on every call, so views may annotate them (e.g. with counts) freely.
+
+    Returns:
+        dict: {'categories': [Category], 'tags': [Tag], 'difficulties': [Difficulty]}
+    """
+    rows = _rows()
+    return {
+        name: [model(**dict(zip(fields, row))) for row in rows[name]]
+        for name, (model, fields) in FIELDS.items()
+    }
+
+
+def bump_version():
+    """Move every worker to fresh taxonomy data."""
+    try:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), None)
+    except Exception as e:
+        logger.warning(f"Could not bump taxonomy cache version: {str(e)}")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Difficulty)
+@receiver(post_delete, sender=Difficulty)
+def invalidate_taxonomy(sender, **kwargs):
+    """Bump the version once the change is committed, so no worker caches pre-change rows under it."""
+    transaction.on_commit(bump_version)
@@ -1,3 +1,607 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import include, path
+from django.views.generic import ListView
+
+from utils.images import registered_image_fields
+from utils.pagination import KeysetPaginationMixin, decode_cursor, encode_cursor
+
+from . import facets, heartbeat, related, search
+from .enrollment_import import import_roster, parse_roster
+from .models import Category, Course, CourseReview, CourseWishlist, Difficulty, Enrollment, Lesson, LessonProgress, Module, Tag
+from .progress import complete_lesson
+from .views import (
+    CourseListByCategoryView, CourseListByDifficultyView, CourseListByTagView, CourseListView,
+    CourseDetailView, CourseProgressView, CourseReviewListView, ModuleDetailView, UserCourseListView
+)
+
+
+# The project does not route courses.urls yet, so view tests that resolve URLs mount it here
+urlpatterns = [path('courses/', include('courses.urls'))]
+
+
+def make_course(instructor, title='Python Basics', **kwargs):
+    return Course.objects.create(
+        title=title,
+        slug=title.lower().replace(' ', '-'),
+        overview='Overview',
+        description='Description',
+        learning_outcomes='Outcomes',
+        instructor=instructor,
+        status='published',
+        **kwargs
+    )
+
+
+class CourseStatsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.instructor = User.objects.create_user('instructor')
+        self.student = User.objects.create_user('student')
+        self.course = make_course(self.instructor)
+
+    def test_course_edit_keeps_concurrent_stat_updates(self):
+        stale = Course.objects.get(pk=self.course.pk)
+        Enrollment.objects.create(course=self.course, student=self.student)
+
+        stale.title = 'Python Basics, 2nd edition'
+        stale.save()
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.title, 'Python Basics, 2nd edition')
+        self.assertEqual(self.course.enrollment_count, 1)
+
+
+class LessonCompletionTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'))
+        module = Module.objects.create(course=self.course, title='Module 1', order=1)
+        self.lessons = [Lesson.objects.create(module=module, title=f"Lesson {i}", order=i) for i in range(2)]
+        self.enrollment = Enrollment.objects.create(course=self.course, student=User.objects.create_user('student'))
+
+    def counters(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment.completed_lessons, self.enrollment.total_lessons, self.enrollment.completed
+
+    def test_completing_a_lesson_twice_counts_once(self):
+        self.assertFalse(complete_lesson(self.enrollment, self.lessons[0]))
+        self.assertFalse(complete_lesson(self.enrollment, self.lessons[0]))
+        self.assertEqual(self.counters(), (1, 2, False))
+        self.assertTrue(complete_lesson(self.enrollment, self.lessons[1]))
+        self.assertEqual(self.counters(), (2, 2, True))
+
+    def test_concurrent_saves_of_the_same_completion_count_once(self):
+        LessonProgress.objects.create(enrollment=self.enrollment, lesson=self.lessons[0])
+        first, second = LessonProgress.objects.all(), LessonProgress.objects.all()
+        first, second = first[0], second[0]
+        for progress in (first, second):
+            progress.completed = True
+            progress.save()
+        self.assertEqual(self.counters(), (1, 2, False))
+
+        first.completed = False
+        first.save()
+        self.assertEqual(self.counters(), (0, 2, False))
+
+    def test_enrollment_save_keeps_counters(self):
+        stale = Enrollment.objects.get(pk=self.enrollment.pk)
+        complete_lesson(self.enrollment, self.lessons[0])
+        stale.certificate_blockchain_id = 'abc'
+        stale.save()
+        self.assertEqual(self.counters(), (1, 2, False))
+        self.assertEqual(self.enrollment.progress_percent, 50)
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'), enrollment_limit=3)
+        self.students = [User.objects.create_user(f"student{i}", email=f"student{i}@example.com") for i in range(4)]
+
+    def statuses(self, report):
+        return [result['status'] for result in report['results']]
+
+    def test_parse_csv_and_json_rosters(self):
+        self.assertEqual(parse_roster("username,name\nstudent0,A\n,B\nstudent1,C\n"), ['student0', '', 'student1'])
+        self.assertEqual(parse_roster('{"students": [{"email": "a@example.com"}, "b"]}'), ['a@example.com', 'b'])
+        with self.assertRaises(ValueError):
+            parse_roster('[1, 2', 'json')
+
+    def test_row_statuses_and_course_count(self):
+        Enrollment.objects.create(course=self.course, student=self.students[0], status='dropped')
+        report = import_roster(self.course, [
+            'student0', 'STUDENT1@example.com', 'student1', 'nobody', '', 'student2', 'student3',
+        ])
+        self.assertEqual(self.statuses(report), [
+            'reactivated', 'enrolled', 'duplicate', 'unknown_user', 'invalid', 'enrolled', 'limit_reached',
+        ])
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 3)
+        self.assertEqual(Enrollment.objects.filter(course=self.course, status='active').count(), 3)
+
+    def test_dry_run_enrolls_nobody(self):
+        report = import_roster(self.course, ['student0', 'student1'], dry_run=True)
+        self.assertEqual(report['summary'], {'enrolled': 2})
+        self.assertFalse(Enrollment.objects.exists())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+
+    def test_reactivation_takes_a_seat(self):
+        Enrollment.objects.create(course=self.course, student=self.students[0], status='dropped')
+        import_roster(self.course, ['student1', 'student2', 'student3'])
+        report = import_roster(self.course, ['student0'])
+        self.assertEqual(self.statuses(report), ['limit_reached'])
+
+        Enrollment.objects.filter(student=self.students[3]).update(status='dropped')
+        report = import_roster(self.course, ['student0'])
+        self.assertEqual(self.statuses(report), ['reactivated'])
+
+
+@override_settings(ROOT_URLCONF='courses.tests')
+class EnrollViewTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'), enrollment_limit=1)
+        self.students = [User.objects.create_user(f"student{i}") for i in range(2)]
+
+    def post(self, student, action):
+        self.client.force_login(student)
+        response = self.client.post(f"/courses/{self.course.slug}/{action}/")
+        self.assertRedirects(response, f"/courses/{self.course.slug}/", fetch_redirect_response=False)
+
+    def statuses(self):
+        return dict(Enrollment.objects.values_list('student__username', 'status'))
+
+    def test_enrollment_limit_counts_only_current_students(self):
+        self.post(self.students[0], 'enroll')
+        self.post(self.students[1], 'enroll')
+        self.assertEqual(self.statuses(), {'student0': 'active'})
+
+        self.post(self.students[0], 'unenroll')
+        self.post(self.students[1], 'enroll')
+        self.post(self.students[0], 'enroll')
+        self.assertEqual(self.statuses(), {'student0': 'dropped', 'student1': 'active'})
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 2)
+
+    def test_draft_courses_are_not_open(self):
+        Course.objects.filter(pk=self.course.pk).update(status='draft')
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.client.post(f"/courses/{self.course.slug}/enroll/").status_code, 404)
+
+
+@override_settings(ROOT_URLCONF='courses.tests')
+class WishlistViewTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'))
+        self.student = User.objects.create_user('student')
+        self.client.force_login(self.student)
+
+    def post(self, action):
+        response = self.client.post('/courses/wishlist/', {'action': action, 'course_id': self.course.pk})
+        self.assertRedirects(response, '/courses/wishlist/', fetch_redirect_response=False)
+
+    def test_enrolling_from_the_wishlist(self):
+        self.post('add')
+        self.post('add')
+        self.assertEqual(CourseWishlist.objects.filter(user=self.student).count(), 1)
+
+        self.post('enroll')
+        self.assertFalse(CourseWishlist.objects.exists())
+        self.assertEqual(Enrollment.objects.get(student=self.student).course, self.course)
+
+
+class HeartbeatTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'))
+        module = Module.objects.create(course=self.course, title='Module 1', order=1)
+        self.lesson = Lesson.objects.create(module=module, title='Lesson 1', order=1)
+        self.student = User.objects.create_user('student')
+        self.enrollment = Enrollment.objects.create(course=self.course, student=self.student)
+        cache.clear()
+
+    def beat(self, at, seconds):
+        with mock.patch.object(heartbeat.time, 'time', return_value=at):
+            heartbeat.record_heartbeats(self.student, heartbeat.parse_beacons([{'lesson': self.lesson.pk, 'seconds': seconds}]))
+        heartbeat.flush_heartbeats()
+        return LessonProgress.objects.get(enrollment=self.enrollment, lesson=self.lesson).time_spent
+
+    def test_batches_are_capped(self):
+        self.assertEqual(heartbeat.parse_beacons({'beacons': [{'lesson': 1, 'seconds': 200}] * 3}), {1: 300})
+        with self.assertRaises(ValueError):
+            heartbeat.parse_beacons([{'lesson': 'x'}])
+
+    def test_time_is_clamped_to_elapsed_wall_time(self):
+        self.assertEqual(self.beat(1000000, 300), 300)
+        # Rapid batches can not claim time that has not passed
+        self.assertEqual(self.beat(1000010, 300), 310)
+        self.assertEqual(self.beat(1000010, 300), 310)
+        self.assertEqual(self.beat(1000070, 60), 370)
+
+    def test_idle_time_is_not_banked(self):
+        self.beat(1000000, 30)
+        self.assertEqual(self.beat(1003000, 300), 330)
+        self.assertEqual(self.beat(1003000, 300), 330)
+
+    def test_lessons_outside_enrollments_are_ignored(self):
+        other = get_user_model().objects.create_user('other')
+        self.assertEqual(heartbeat.record_heartbeats(other, {self.lesson.pk: 60}), 0)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        instructor = get_user_model().objects.create_user('instructor')
+        self.category = Category.objects.create(name='Data', slug='data')
+        for i in range(3):
+            make_course(instructor, title=f"Python Course {i}")
+        self.target = make_course(instructor, title='Python for Data', category=self.category)
+
+    def test_filters_apply_before_the_result_limit(self):
+        if search.prepare_index() is None:
+            self.skipTest("full-text search is unavailable on this database")
+        in_category = Course.objects.filter(category=self.category)
+        results = search.search('python', limit=1, within=in_category)
+        self.assertEqual([course_id for course_id, _ in results], [self.target.pk])
+
+        queryset, snippets = search.filter_queryset(in_category, 'pyth')
+        self.assertEqual(list(queryset), [self.target])
+        self.assertIn('<mark>', snippets[self.target.pk])
+        self.assertEqual(len(search.matching_ids(Course.objects.all(), 'python')), 4)
+
+
+class CourseListViewTests(TestCase):
+    def setUp(self):
+        instructor = get_user_model().objects.create_user('instructor')
+        self.category = Category.objects.create(name='Data', slug='data')
+        self.basics = make_course(instructor, title='Python Basics')
+        self.data = make_course(instructor, title='Python for Data', category=self.category)
+        draft = make_course(instructor, title='Python Drafts', category=self.category)
+        draft.status = 'draft'
+        draft.save()
+        cache.clear()
+
+    def context(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = AnonymousUser()
+        return CourseListView.as_view()(request).context_data
+
+    def test_lists_published_courses_newest_first(self):
+        context = self.context()
+        self.assertEqual(list(context['courses']), [self.data, self.basics])
+        self.assertEqual(context['facet_counts']['total'], 2)
+        self.assertEqual([category.course_count for category in context['categories']], [1])
+
+    def test_category_filter(self):
+        context = self.context(category='data')
+        self.assertEqual(list(context['courses']), [self.data])
+        self.assertEqual(context['facet_counts']['total'], 1)
+
+    def test_taxonomy_listings_show_published_courses(self):
+        tag = Tag.objects.create(name='Pandas', slug='pandas')
+        difficulty = Difficulty.objects.create(name='Beginner', level=1)
+        for course in Course.objects.all():
+            course.tags.add(tag)
+        Course.objects.update(difficulty=difficulty)
+
+        for view_class, kwargs in (
+            (CourseListByCategoryView, {'category_slug': 'data'}),
+            (CourseListByTagView, {'tag_slug': 'pandas'}),
+            (CourseListByDifficultyView, {'difficulty_level': 1}),
+        ):
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            context = view_class.as_view()(request, **kwargs).context_data
+            expected = {self.data} if view_class is CourseListByCategoryView else {self.data, self.basics}
+            self.assertEqual(set(context['courses']), expected)
+        self.assertEqual(list(self.context(difficulty='1')['courses']), [self.data, self.basics])
+
+
+class CourseDetailViewTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'))
+        module = Module.objects.create(course=self.course, title='Module', order=0)
+        self.lessons = [Lesson.objects.create(module=module, title=f"Lesson {order}", order=order) for order in range(4)]
+        self.student = User.objects.create_user('student')
+        self.enrollment = Enrollment.objects.create(course=self.course, student=self.student)
+        complete_lesson(self.enrollment, self.lessons[0])
+        CourseReview.objects.create(course=self.course, user=self.student, rating=4)
+        cache.clear()
+
+    def context(self):
+        request = RequestFactory().get('/')
+        request.user = self.student
+        return CourseDetailView.as_view()(request, course_slug=self.course.slug).context_data
+
+    def test_enrolled_student_sees_progress_and_related_courses(self):
+        context = self.context()
+        self.assertTrue(context['is_enrolled'])
+        self.assertFalse(context['in_wishlist'])
+        self.assertEqual(context['course_progress']['percent'], 25)
+        self.assertEqual(context['avg_rating'], 4)
+        self.assertIn('related_courses', context)
+
+    def test_dropped_student_is_not_enrolled(self):
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(status='dropped')
+        context = self.context()
+        self.assertFalse(context['is_enrolled'])
+        self.assertNotIn('course_progress', context)
+
+
+@override_settings(ROOT_URLCONF='courses.tests')
+class CompletionViewTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'))
+        self.module = Module.objects.create(course=self.course, title='Module', order=0)
+        self.lessons = [Lesson.objects.create(module=self.module, title=f"Lesson {order}", order=order) for order in range(2)]
+        self.student = User.objects.create_user('student')
+        self.enrollment = Enrollment.objects.create(course=self.course, student=self.student)
+        self.client.force_login(self.student)
+        cache.clear()
+
+    def complete_lesson(self, lesson):
+        return self.client.post(f"/courses/{self.course.slug}/modules/{self.module.pk}/lessons/{lesson.pk}/")
+
+    def test_completing_every_lesson_completes_the_course(self):
+        for lesson in self.lessons:
+            self.assertEqual(self.complete_lesson(lesson).status_code, 200)
+        self.enrollment.refresh_from_db()
+        self.assertTrue(self.enrollment.completed)
+        self.assertEqual(self.enrollment.completed_lessons, 2)
+
+    def test_dropped_student_cannot_complete_lessons(self):
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(status='dropped')
+        self.assertEqual(self.complete_lesson(self.lessons[0]).status_code, 404)
+        self.assertFalse(LessonProgress.objects.exists())
+
+    def test_course_is_marked_completed_once(self):
+        for _ in range(2):
+            response = self.client.post(f"/courses/{self.course.slug}/complete/")
+            self.assertRedirects(response, f"/courses/{self.course.slug}/", fetch_redirect_response=False)
+        self.enrollment.refresh_from_db()
+        self.course.refresh_from_db()
+        self.assertEqual(self.enrollment.status, 'completed')
+        self.assertEqual(self.course.completed_count, 1)
+
+    def test_lesson_page_renders_with_progress(self):
+        complete_lesson(self.enrollment, self.lessons[0])
+        templates = [{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'OPTIONS': {
+                'loaders': [('django.template.loaders.locmem.Loader', {
+                    'courses/lesson_detail.html': (
+                        '{{ lesson.title }}|{{ next_lesson.title }}|{{ prev_lesson.title }}|{{ lesson_progress.completed }}'
+                    ),
+                })],
+            },
+        }]
+        with override_settings(TEMPLATES=templates):
+            response = self.client.get(f"/courses/{self.course.slug}/modules/{self.module.pk}/lessons/{self.lessons[0].pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode(), 'Lesson 0|Lesson 1||True')
+
+
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        instructor = get_user_model().objects.create_user('instructor')
+        self.category = Category.objects.create(name='Data', slug='data')
+        self.course = make_course(instructor, category=self.category)
+        cache.clear()
+
+    def test_per_process_index_is_kept_between_requests(self):
+        index = facets.get_index()
+        with self.assertNumQueries(0):
+            self.assertIs(facets.get_index(), index)
+
+        # Changes committed in this process are replayed from the local log
+        with mock.patch.object(related, 'update_related_courses'):
+            with self.captureOnCommitCallbacks(execute=True):
+                make_course(self.course.instructor, title='Data Science', category=self.category)
+            related.get_related_executor().submit(int).result()
+        self.assertIs(facets.get_index(), index)
+        self.assertEqual(facets.facet_counts()['category'], {self.category.pk: 2})
+
+        # Other processes' changes show up once the index expires
+        Course.objects.filter(pk=self.course.pk).update(status='draft')
+        with mock.patch('courses.facets.time.monotonic', return_value=index.built_at + 61):
+            self.assertIsNot(facets.get_index(), index)
+        self.assertEqual(facets.facet_counts()['category'], {self.category.pk: 1})
+
+
+class RelatedCoursesUpdateTests(TestCase):
+    def setUp(self):
+        self.course = make_course(get_user_model().objects.create_user('instructor'))
+        self.tag = Tag.objects.create(name='Python', slug='python')
+
+    def queued_updates(self, change):
+        with mock.patch.object(related, 'update_related_courses') as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            # The pool has a single worker, so this waits for the updates queued before it
+            related.get_related_executor().submit(int).result()
+        return [call.args[0] for call in update.call_args_list]
+
+    def test_saves_that_change_compared_fields_queue_an_update(self):
+        def retitle():
+            self.course.title = 'Advanced Python'
+            self.course.save()
+        self.assertEqual(self.queued_updates(retitle), [self.course.pk])
+        self.assertEqual(self.queued_updates(lambda: self.course.tags.add(self.tag)), [self.course.pk])
+
+    def test_saves_that_leave_compared_fields_alone_are_skipped(self):
+        self.assertEqual(self.queued_updates(self.course.save), [])
+        self.assertEqual(self.queued_updates(lambda: self.course.save(update_fields=['description'])), [])
+        self.course.tags.add(self.tag)
+        self.assertEqual(self.queued_updates(lambda: self.course.tags.add(self.tag)), [])
+
+    def test_updates_of_one_course_are_coalesced(self):
+        release = threading.Event()
+        with mock.patch.object(related, 'update_related_courses') as update:
+            # Hold the worker until both edits are queued
+            related.get_related_executor().submit(release.wait)
+            with self.captureOnCommitCallbacks(execute=True):
+                for title in ('Python 2', 'Python 3'):
+                    self.course.title = title
+                    self.course.save()
+            release.set()
+            related.get_related_executor().submit(int).result()
+        self.assertEqual(update.call_count, 1)
+
+
+class ProgressViewQueryTests(TestCase):
+    """Progress pages make a fixed number of queries however many modules, lessons and courses there are."""
+
+    def setUp(self):
+        User = get_user_model()
+        instructor = User.objects.create_user('instructor')
+        self.student = User.objects.create_user('student')
+        self.courses = []
+        for number in range(3):
+            course = make_course(instructor, title=f"Course {number}")
+            for module_order in range(3):
+                module = Module.objects.create(course=course, title=f"Module {module_order}", order=module_order)
+                for lesson_order in range(4):
+                    lesson = Lesson.objects.create(module=module, title=f"Lesson {lesson_order}", order=lesson_order)
+            enrollment = Enrollment.objects.create(course=course, student=self.student)
+            complete_lesson(enrollment, lesson)
+            self.courses.append(course)
+        cache.clear()
+
+    def context(self, view_class, **kwargs):
+        request = RequestFactory().get('/')
+        request.user = self.student
+        view = view_class()
+        view.setup(request, **kwargs)
+        if hasattr(view, 'get_object'):
+            view.object = view.get_object()
+            return view.get_context_data(object=view.object)
+        if hasattr(view, 'get_queryset'):
+            view.object_list = view.get_queryset()
+        return view.get_context_data(**kwargs)
+
+    def test_module_detail(self):
+        course = self.courses[0]
+        module = course.modules.order_by('order').last()
+        with self.assertNumQueries(8):
+            context = self.context(ModuleDetailView, course_slug=course.slug, module_id=module.pk)
+            lessons = list(context['lessons'])
+        self.assertEqual(len(lessons), 4)
+        self.assertTrue(context['lesson_progress'][lessons[-1].pk])
+
+    def test_course_progress(self):
+        with self.assertNumQueries(7):
+            context = self.context(CourseProgressView, course_slug=self.courses[0].slug)
+            modules = list(context['modules'])
+        self.assertEqual(len(modules), 3)
+        self.assertEqual(context['progress_percentage'], 8)
+
+    def test_user_course_list(self):
+        with self.assertNumQueries(6):
+            context = self.context(UserCourseListView)
+            enrollments = list(context['enrollments'])
+            list(context['inactive_enrollments'])
+        self.assertEqual(len(enrollments), 3)
+        self.assertEqual([enrollment.progress_percentage for enrollment in enrollments], [8, 8, 8])
+
+
+class KeysetCourseList(KeysetPaginationMixin, ListView):
+    model = Course
+    paginate_by = 2
+    keyset_ordering = ('-created', '-id')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        instructor = get_user_model().objects.create_user('instructor')
+        self.courses = [make_course(instructor, title=f"Course {number}") for number in range(5)]
+        # Two courses share a timestamp, so paging has to fall back to the id
+        Course.objects.filter(pk=self.courses[2].pk).update(created=self.courses[1].created)
+        self.expected = list(Course.objects.order_by('-created', '-id').values_list('pk', flat=True))
+        cache.clear()
+
+    def page(self, cursor=None):
+        view = KeysetCourseList()
+        view.setup(RequestFactory().get('/', {'cursor': cursor} if cursor else {}))
+        paginator, page, rows, is_paginated = view.paginate_queryset(view.get_queryset(), view.paginate_by)
+        return page, [course.pk for course in rows]
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor([1, 'a'], 'previous')), ('previous', [1, 'a']))
+        for malformed in ('not base64!', encode_cursor([1], 'sideways')):
+            with self.assertRaises(ValueError):
+                decode_cursor(malformed)
+
+    def test_pages_forward_and_back(self):
+        seen, cursor, pages = [], None, []
+        while True:
+            page, ids = self.page(cursor)
+            pages.append((page, ids))
+            seen.extend(ids)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertFalse(pages[0][0].has_previous())
+        self.assertEqual(pages[0][0].paginator.count, 5)
+
+        # Going back from the last page returns the middle page
+        self.assertEqual(self.page(pages[2][0].previous_cursor)[1], pages[1][1])
+
+    def test_invalid_cursor_is_not_found(self):
+        with self.assertRaises(Http404):
+            self.page(encode_cursor(['not a date', 1], 'next'))
+        with self.assertRaises(Http404):
+            self.page(encode_cursor([1], 'next'))
+
+
+class CourseReviewListViewTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.course = make_course(User.objects.create_user('instructor'))
+        for number in range(12):
+            CourseReview.objects.create(
+                course=self.course, user=User.objects.create_user(f"reviewer{number}"), rating=number % 5 + 1
+            )
+        self.student = User.objects.create_user('student')
+        Enrollment.objects.create(course=self.course, student=self.student)
+        cache.clear()
+
+    def context(self, cursor=None):
+        request = RequestFactory().get('/', {'cursor': cursor} if cursor else {})
+        request.user = self.student
+        return CourseReviewListView.as_view()(request, course_slug=self.course.slug).context_data
+
+    def test_follows_next_cursor_through_every_review(self):
+        first = self.context()
+        self.assertTrue(first['can_review'])
+        self.assertEqual(first['total_reviews'], 12)
+        self.assertEqual(len(first['reviews']), 10)
+
+        second = self.context(first['page_obj'].next_cursor)
+        self.assertFalse(second['page_obj'].has_next())
+        self.assertEqual(
+            [review.pk for review in list(first['reviews']) + list(second['reviews'])],
+            list(CourseReview.objects.order_by('-created', '-id').values_list('pk', flat=True))
+        )
+
+
+class ImageFieldRegistrationTests(TestCase):
+    def test_installed_apps_register_their_image_fields(self):
+        registered = {(model._meta.label, field) for model, field, _ in registered_image_fields()}
+        self.assertLessEqual({
+            ('courses.Course', 'thumbnail'),
+            ('gamification.Badge', 'icon'),
+            ('certificates.CertificateTemplate', 'background_image'),
+            ('chat.ChatAttachment', 'file'),
+        }, registered)
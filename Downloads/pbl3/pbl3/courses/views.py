@@ -1,24 +1,40 @@
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.urls import reverse_lazy, reverse
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg
 from django.http import JsonResponse, HttpResponseRedirect
 from django.contrib import messages
 
+from utils.pagination import KeysetPaginationMixin
+
+from . import enrollment_import, facets, heartbeat, search, taxonomy
 from .models import (
-    Course, Category, Tag, Difficulty, Module, Lesson, CourseReview, Enrollment,
-    CourseProgress, LessonProgress, CourseWishlist
+    Course, Category, Tag, Difficulty, Module, Lesson, CourseReview, CourseWishlist, Enrollment,
+    LessonProgress
 )
+from .outline import get_outline
+from .progress import ProgressService, complete_course, complete_lesson
+from .recommendations import recommended_courses
+from .related import related_courses
 
-class CourseListView(ListView):
+class CourseListView(KeysetPaginationMixin, ListView):
     model = Course
     template_name = 'courses/course_list.html'
     context_object_name = 'courses'
     paginate_by = 12
+    keyset_ordering = ('-created', '-id')
+    
+    def get_keyset_ordering(self):
+        # Search results are ranked by relevance, not by date
+        if self.request.GET.get('q'):
+            return None
+        return super().get_keyset_ordering()
     
     def get_queryset(self):
-        queryset = Course.objects.filter(is_published=True)
+        queryset = Course.objects.filter(status='published')
         
         # Apply filters if provided
         query = self.request.GET.get('q')
@@ -26,12 +42,11 @@ class CourseListView(ListView):
         tag = self.request.GET.get('tag')
         difficulty = self.request.GET.get('difficulty')
         
+        self.search_snippets = {}
+        self.matched_ids = None
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) | 
-                Q(overview__icontains=query) | 
-                Q(description__icontains=query)
-            )
+            # Facet counts cover every match, whichever facets are selected
+            self.matched_ids = search.matching_ids(queryset, query)
         
         if category:
             queryset = queryset.filter(category__slug=category)
@@ -39,17 +54,44 @@ class CourseListView(ListView):
         if tag:
             queryset = queryset.filter(tags__slug=tag)
             
-        if difficulty:
-            queryset = queryset.filter(difficulty__slug=difficulty)
+        if difficulty and difficulty.isdigit():
+            queryset = queryset.filter(difficulty__level=difficulty)
+            
+        if query:
+            # Ranked full-text search, most relevant first, among the filtered courses
+            queryset, self.search_snippets = search.filter_queryset(queryset.distinct(), query)
+            return queryset
             
-        return queryset.distinct().order_by('-created_at')
+        return queryset.distinct().order_by('-created')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
-        context['tags'] = Tag.objects.all()
-        context['difficulties'] = Difficulty.objects.all()
+        context.update(taxonomy.get_taxonomy())
+        
+        # Number of matching courses for each sidebar entry under the current filters
+        context['facet_counts'] = self.get_facet_counts(context)
+        
+        # Highlighted matches for each course on the page
+        context['search_query'] = self.request.GET.get('q', '')
+        for course in context['courses']:
+            course.search_snippet = self.search_snippets.get(course.pk, '')
         return context
+    
+    def get_facet_counts(self, context):
+        """Facet counts from the bitmap index, also set as course_count on each sidebar entry."""
+        def selected(objects, value, field='slug'):
+            return next((obj.pk for obj in objects if value and str(getattr(obj, field)) == value), None)
+        
+        counts = facets.facet_counts(
+            category=selected(context['categories'], self.request.GET.get('category')),
+            tag=selected(context['tags'], self.request.GET.get('tag')),
+            difficulty=selected(context['difficulties'], self.request.GET.get('difficulty'), field='level'),
+            within=self.matched_ids
+        )
+        for facet, objects in (('category', 'categories'), ('tag', 'tags'), ('difficulty', 'difficulties')):
+            for obj in context[objects]:
+                obj.course_count = counts[facet].get(obj.pk, 0)
+        return counts
 
 
 class CourseListByCategoryView(ListView):
@@ -60,13 +102,11 @@ class CourseListByCategoryView(ListView):
     
     def get_queryset(self):
         self.category = get_object_or_404(Category, slug=self.kwargs['category_slug'])
-        return Course.objects.filter(category=self.category, is_published=True)
+        return Course.objects.filter(category=self.category, status='published')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
-        context['tags'] = Tag.objects.all()
-        context['difficulties'] = Difficulty.objects.all()
+        context.update(taxonomy.get_taxonomy())
         context['current_category'] = self.category
         return context
 
@@ -79,13 +119,11 @@ class CourseListByTagView(ListView):
     
     def get_queryset(self):
         self.tag = get_object_or_404(Tag, slug=self.kwargs['tag_slug'])
-        return Course.objects.filter(tags=self.tag, is_published=True)
+        return Course.objects.filter(tags=self.tag, status='published')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
-        context['tags'] = Tag.objects.all()
-        context['difficulties'] = Difficulty.objects.all()
+        context.update(taxonomy.get_taxonomy())
         context['current_tag'] = self.tag
         return context
 
@@ -97,14 +135,13 @@ class CourseListByDifficultyView(ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        self.difficulty = get_object_or_404(Difficulty, slug=self.kwargs['difficulty_slug'])
-        return Course.objects.filter(difficulty=self.difficulty, is_published=True)
+        # Difficulties have no slug; they are addressed by level
+        self.difficulty = get_object_or_404(Difficulty, level=self.kwargs['difficulty_level'])
+        return Course.objects.filter(difficulty=self.difficulty, status='published')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
-        context['tags'] = Tag.objects.all()
-        context['difficulties'] = Difficulty.objects.all()
+        context.update(taxonomy.get_taxonomy())
         context['current_difficulty'] = self.difficulty
         return context
 
@@ -123,16 +160,15 @@ class CourseDetailView(DetailView):
         context['modules'] = Module.objects.filter(course=course).order_by('order')
         
         # Get course reviews
-        context['reviews'] = CourseReview.objects.filter(course=course).order_by('-created_at')
+        context['reviews'] = CourseReview.objects.filter(course=course).order_by('-created')
         context['avg_rating'] = context['reviews'].aggregate(Avg('rating'))['rating__avg'] or 0
         
         # Check if user is enrolled
         if self.request.user.is_authenticated:
             context['is_enrolled'] = Enrollment.objects.filter(
-                course=course, 
-                user=self.request.user,
-                is_active=True
-            ).exists()
+                course=course,
+                student=self.request.user
+            ).exclude(status='dropped').exists()
             
             # Check if course is in user's wishlist
             context['in_wishlist'] = CourseWishlist.objects.filter(
@@ -142,45 +178,32 @@ class CourseDetailView(DetailView):
             
             # Get user's course progress if enrolled
             if context['is_enrolled']:
-                try:
-                    context['course_progress'] = CourseProgress.objects.get(
-                        enrollment__course=course,
-                        enrollment__user=self.request.user
-                    )
-                except CourseProgress.DoesNotExist:
-                    context['course_progress'] = None
-        
-        # Get related courses
-        context['related_courses'] = Course.objects.filter(
-            Q(category=course.category) | Q(tags__in=course.tags.all())
-        ).exclude(id=course.id).distinct()[:4]
+                context['course_progress'] = ProgressService(self.request.user).course_progress(course)
+        
+        # Get related courses from the precomputed content similarity index
+        context['related_courses'] = related_courses(course)
         
         return context
 
 
+def enroll(request, course):
+    """Enroll the requesting student in a course, reporting the outcome as a message."""
+    # Same enrollment limit and reactivation rules as roster imports
+    status = enrollment_import.enroll_student(course, request.user)
+    if status == 'reactivated':
+        messages.success(request, f"Welcome back to '{course.title}'! Your enrollment has been reactivated.")
+    elif status == 'enrolled':
+        messages.success(request, f"You have successfully enrolled in '{course.title}'.")
+    elif status == 'limit_reached':
+        messages.error(request, f"'{course.title}' is full.")
+    else:
+        messages.info(request, f"You are already enrolled in '{course.title}'.")
+
+
 class CourseEnrollView(LoginRequiredMixin, View):
     def post(self, request, course_slug):
-        course = get_object_or_404(Course, slug=course_slug, is_published=True)
-        
-        # Check if already enrolled
-        enrollment, created = Enrollment.objects.get_or_create(
-            course=course,
-            user=request.user,
-            defaults={'is_active': True}
-        )
-        
-        if not created and not enrollment.is_active:
-            # Reactivate enrollment if it exists but is inactive
-            enrollment.is_active = True
-            enrollment.save()
-            messages.success(request, f"Welcome back to '{course.title}'! Your enrollment has been reactivated.")
-        elif created:
-            # Create initial course progress
-            CourseProgress.objects.create(enrollment=enrollment)
-            messages.success(request, f"You have successfully enrolled in '{course.title}'.")
-        else:
-            messages.info(request, f"You are already enrolled in '{course.title}'.")
-        
+        course = get_object_or_404(Course, slug=course_slug, status='published')
+        enroll(request, course)
         return HttpResponseRedirect(reverse('courses:course_detail', kwargs={'course_slug': course_slug}))
 
 
@@ -189,9 +212,10 @@ class CourseUnenrollView(LoginRequiredMixin, View):
         course = get_object_or_404(Course, slug=course_slug)
         
         try:
-            enrollment = Enrollment.objects.get(course=course, user=request.user, is_active=True)
-            enrollment.is_active = False
-            enrollment.save()
+            enrollment = Enrollment.objects.exclude(status='dropped').get(course=course, student=request.user)
+            # Dropping frees the seat under the course's enrollment limit
+            enrollment.status = 'dropped'
+            enrollment.save(update_fields=['status'])
             messages.success(request, f"You have been unenrolled from '{course.title}'.")
         except Enrollment.DoesNotExist:
             messages.error(request, "You are not enrolled in this course.")
@@ -199,6 +223,29 @@ class CourseUnenrollView(LoginRequiredMixin, View):
         return HttpResponseRedirect(reverse('courses:course_detail', kwargs={'course_slug': course_slug}))
 
 
+class CourseBulkEnrollView(LoginRequiredMixin, View):
+    """Enroll a roster of students (CSV or JSON, uploaded as 'roster' or sent as the body)."""
+
+    def post(self, request, course_slug):
+        course = get_object_or_404(Course, slug=course_slug)
+        if not (request.user.is_staff or course.instructor_id == request.user.id):
+            return JsonResponse({'success': False, 'message': 'Only the course instructor can enroll students.'}, status=403)
+
+        upload = request.FILES.get('roster')
+        data = upload.read() if upload else request.body
+        format = request.GET.get('format')
+        if format is None and upload:
+            format = 'json' if upload.name.lower().endswith('.json') else 'csv'
+
+        try:
+            identifiers = enrollment_import.parse_roster(data, format)
+        except (ValueError, UnicodeDecodeError) as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+        report = enrollment_import.import_roster(course, identifiers, dry_run=request.GET.get('dry_run') == '1')
+        return JsonResponse({'success': True, **report})
+
+
 class ModuleListView(LoginRequiredMixin, ListView):
     model = Module
     template_name = 'courses/module_list.html'
@@ -214,10 +261,9 @@ class ModuleListView(LoginRequiredMixin, ListView):
         
         # Check if user is enrolled
         context['is_enrolled'] = Enrollment.objects.filter(
-            course=self.course, 
-            user=self.request.user,
-            is_active=True
-        ).exists()
+            course=self.course,
+            student=self.request.user
+        ).exclude(status='dropped').exists()
         
         if not context['is_enrolled']:
             messages.warning(self.request, "You must be enrolled in this course to view its modules.")
@@ -241,21 +287,19 @@ class ModuleDetailView(LoginRequiredMixin, DetailView):
         context['lessons'] = Lesson.objects.filter(module=self.object).order_by('order')
         
         # Check if user is enrolled
-        enrollment = get_object_or_404(
-            Enrollment, 
-            course=self.course, 
-            user=self.request.user,
-            is_active=True
+        get_object_or_404(
+            Enrollment.objects.exclude(status='dropped'),
+            course=self.course,
+            student=self.request.user
         )
         
         # Get lesson progress for this module
         if self.request.user.is_authenticated:
+            progress = ProgressService(self.request.user).course_progress(self.course, lessons=True)
             context['lesson_progress'] = {
-                lesson.id: LessonProgress.objects.filter(
-                    lesson=lesson,
-                    course_progress__enrollment=enrollment
-                ).first() for lesson in context['lessons']
+                lesson.id: progress['lessons'].get(lesson.id) for lesson in context['lessons']
             }
+            context['module_progress'] = progress['modules'].get(self.object.id)
         
         return context
 
@@ -276,94 +320,49 @@ class LessonDetailView(LoginRequiredMixin, DetailView):
         context['course'] = self.course
         context['module'] = self.module
         
-        # Get next and previous lessons
-        lessons = list(Lesson.objects.filter(module=self.module).order_by('order'))
-        current_index = lessons.index(self.object)
-        
-        if current_index > 0:
-            context['prev_lesson'] = lessons[current_index - 1]
-        else:
-            # If this is the first lesson of the module, get the last lesson of the previous module
-            prev_modules = Module.objects.filter(
-                course=self.course, 
-                order__lt=self.module.order
-            ).order_by('-order')
-            
-            if prev_modules.exists():
-                prev_module = prev_modules.first()
-                prev_lessons = Lesson.objects.filter(module=prev_module).order_by('-order')
-                if prev_lessons.exists():
-                    context['prev_lesson'] = prev_lessons.first()
-                    context['prev_module'] = prev_module
-        
-        if current_index < len(lessons) - 1:
-            context['next_lesson'] = lessons[current_index + 1]
-        else:
-            # If this is the last lesson of the module, get the first lesson of the next module
-            next_modules = Module.objects.filter(
-                course=self.course, 
-                order__gt=self.module.order
-            ).order_by('order')
-            
-            if next_modules.exists():
-                next_module = next_modules.first()
-                next_lessons = Lesson.objects.filter(module=next_module).order_by('order')
-                if next_lessons.exists():
-                    context['next_lesson'] = next_lessons.first()
-                    context['next_module'] = next_module
-        
-        # Mark lesson as completed when viewed
+        # Navigation, breadcrumbs and sidebar from the cached course outline
+        outline = get_outline(self.course.id)
+        context['outline'] = outline
+        
+        prev_entry = outline.previous(self.object.id)
+        if prev_entry:
+            context['prev_lesson'] = Lesson(id=prev_entry['id'], title=prev_entry['title'], module_id=prev_entry['module_id'])
+            if prev_entry['module_id'] != self.module.id:
+                # The previous lesson is the last lesson of the previous module
+                context['prev_module'] = Module(id=prev_entry['module_id'], title=prev_entry['module_title'], course=self.course)
+        
+        next_entry = outline.next(self.object.id)
+        if next_entry:
+            context['next_lesson'] = Lesson(id=next_entry['id'], title=next_entry['title'], module_id=next_entry['module_id'])
+            if next_entry['module_id'] != self.module.id:
+                # The next lesson is the first lesson of the next module
+                context['next_module'] = Module(id=next_entry['module_id'], title=next_entry['module_title'], course=self.course)
+        
+        # Get the student's progress on this lesson; heartbeats create the row, viewing does not write
         if self.request.user.is_authenticated:
             enrollment = get_object_or_404(
-                Enrollment, 
-                course=self.course, 
-                user=self.request.user,
-                is_active=True
-            )
-            
-            course_progress, created = CourseProgress.objects.get_or_create(enrollment=enrollment)
-            
-            lesson_progress, created = LessonProgress.objects.get_or_create(
-                lesson=self.object,
-                course_progress=course_progress,
-                defaults={'is_completed': False}
+                Enrollment.objects.exclude(status='dropped'),
+                course=self.course,
+                student=self.request.user
             )
             
-            context['lesson_progress'] = lesson_progress
+            context['lesson_progress'] = LessonProgress.objects.filter(
+                enrollment=enrollment,
+                lesson=self.object
+            ).first()
         
         return context
     
     def post(self, request, *args, **kwargs):
         lesson = self.get_object()
         enrollment = get_object_or_404(
-            Enrollment, 
-            course=self.course, 
-            user=request.user,
-            is_active=True
+            Enrollment.objects.exclude(status='dropped'),
+            course=self.course,
+            student=request.user
         )
         
-        course_progress = get_object_or_404(CourseProgress, enrollment=enrollment)
-        
-        lesson_progress, created = LessonProgress.objects.get_or_create(
-            lesson=lesson,
-            course_progress=course_progress,
-            defaults={'is_completed': True}
-        )
-        
-        if not created:
-            lesson_progress.is_completed = True
-            lesson_progress.save()
-        
-        # Check if all lessons in the course are completed
-        total_lessons = Lesson.objects.filter(module__course=self.course).count()
-        completed_lessons = LessonProgress.objects.filter(
-            course_progress=course_progress,
-            is_completed=True
-        ).count()
-        
-        if total_lessons == completed_lessons:
-            course_progress.is_completed = True
-            course_progress.save()
+        # The enrollment's lesson counters tell whether this completed the course
+        if complete_lesson(enrollment, lesson):
             messages.success(request, f"Congratulations! You have completed the course '{self.course.title}'.")
         
         return JsonResponse({
@@ -372,6 +371,19 @@ class LessonDetailView(LoginRequiredMixin, DetailView):
         })
 
 
+class LessonHeartbeatView(LoginRequiredMixin, View):
+    """Accept a batch of lesson time beacons: {"beacons": [{"lesson": id, "seconds": n}, ...]}."""
+
+    def post(self, request):
+        try:
+            seconds_by_lesson = heartbeat.parse_beacons(json.loads(request.body or b'null'))
+        except (ValueError, UnicodeDecodeError) as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+        accepted = heartbeat.record_heartbeats(request.user, seconds_by_lesson)
+        return JsonResponse({'success': True, 'accepted': accepted})
+
+
 class CourseProgressView(LoginRequiredMixin, TemplateView):
     template_name = 'courses/course_progress.html'
     
@@ -380,45 +392,21 @@ class CourseProgressView(LoginRequiredMixin, TemplateView):
         course = get_object_or_404(Course, slug=self.kwargs['course_slug'])
         context['course'] = course
         
-        enrollment = get_object_or_404(
-            Enrollment, 
-            course=course, 
-            user=self.request.user,
-            is_active=True
+        context['enrollment'] = get_object_or_404(
+            Enrollment.objects.exclude(status='dropped'),
+            course=course,
+            student=self.request.user
         )
         
-        course_progress, created = CourseProgress.objects.get_or_create(enrollment=enrollment)
-        context['course_progress'] = course_progress
-        
         # Get all modules and lessons
         modules = Module.objects.filter(course=course).order_by('order')
         context['modules'] = modules
         
-        # Get lesson progress for each lesson
-        context['lesson_progress'] = {}
-        
-        for module in modules:
-            lessons = Lesson.objects.filter(module=module).order_by('order')
-            for lesson in lessons:
-                progress = LessonProgress.objects.filter(
-                    lesson=lesson,
-                    course_progress=course_progress
-                ).first()
-                
-                if progress:
-                    context['lesson_progress'][lesson.id] = progress
-        
-        # Calculate overall progress percentage
-        total_lessons = Lesson.objects.filter(module__course=course).count()
-        if total_lessons > 0:
-            completed_lessons = LessonProgress.objects.filter(
-                course_progress=course_progress,
-                is_completed=True
-            ).count()
-            
-            context['progress_percentage'] = int((completed_lessons / total_lessons) * 100)
-        else:
-            context['progress_percentage'] = 0
+        # Get lesson, module and overall progress
+        progress = ProgressService(self.request.user).course_progress(course, lessons=True)
+        context['lesson_progress'] = progress['lessons']
+        context['module_progress'] = progress['modules']
+        context['progress_percentage'] = progress['percent']
         
         return context
 
@@ -428,32 +416,32 @@ class CourseCompleteView(LoginRequiredMixin, View):
         course = get_object_or_404(Course, slug=course_slug)
         
         enrollment = get_object_or_404(
-            Enrollment, 
-            course=course, 
-            user=request.user,
-            is_active=True
+            Enrollment.objects.exclude(status='dropped'),
+            course=course,
+            student=request.user
         )
         
-        course_progress = get_object_or_404(CourseProgress, enrollment=enrollment)
-        course_progress.is_completed = True
-        course_progress.save()
-        
-        messages.success(request, f"Congratulations! You have completed the course '{course.title}'.")
+        # Counted once, however many times the course is marked completed
+        if complete_course(enrollment):
+            messages.success(request, f"Congratulations! You have completed the course '{course.title}'.")
+        else:
+            messages.info(request, f"You have already completed '{course.title}'.")
         
         # Trigger any completion hooks or certificate generation here
         
         return HttpResponseRedirect(reverse('courses:course_detail', kwargs={'course_slug': course_slug}))
 
 
-class CourseReviewListView(ListView):
+class CourseReviewListView(KeysetPaginationMixin, ListView):
     model = CourseReview
     template_name = 'courses/course_reviews.html'
     context_object_name = 'reviews'
     paginate_by = 10
+    keyset_ordering = ('-created', '-id')
     
     def get_queryset(self):
         self.course = get_object_or_404(Course, slug=self.kwargs['course_slug'])
-        return CourseReview.objects.filter(course=self.course).order_by('-created_at')
+        return CourseReview.objects.filter(course=self.course).order_by('-created')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -469,9 +457,8 @@ class CourseReviewListView(ListView):
             # Check if user is eligible to review (i.e., enrolled and has made progress)
             context['can_review'] = Enrollment.objects.filter(
                 course=self.course,
-                user=self.request.user,
-                is_active=True
-            ).exists()
+                student=self.request.user
+            ).exclude(status='dropped').exists()
         
         # Calculate rating distribution
         rating_distribution = {i: 0 for i in range(1, 6)}
@@ -501,11 +488,10 @@ class CourseReviewCreateView(LoginRequiredMixin, CreateView):
         course = get_object_or_404(Course, slug=self.kwargs['course_slug'])
         
         # Check if user is enrolled in the course
-        enrollment = get_object_or_404(
-            Enrollment, 
-            course=course, 
-            user=self.request.user,
-            is_active=True
+        get_object_or_404(
+            Enrollment.objects.exclude(status='dropped'),
+            course=course,
+            student=self.request.user
         )
         
         # Check if user has already reviewed this course
@@ -566,59 +552,46 @@ class CourseReviewDeleteView(LoginRequiredMixin, DeleteView):
         return reverse('courses:course_reviews', kwargs={'course_slug': self.kwargs['course_slug']})
 
 
-class UserCourseListView(LoginRequiredMixin, ListView):
+class UserCourseListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Enrollment
     template_name = 'courses/user_courses.html'
     context_object_name = 'enrollments'
     paginate_by = 10
+    keyset_ordering = ('-enrolled_at', '-id')
     
     def get_queryset(self):
         return Enrollment.objects.filter(
-            user=self.request.user,
-            is_active=True
-        ).order_by('-enrolled_at')
+            student=self.request.user
+        ).exclude(status='dropped').select_related('course').order_by('-enrolled_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Calculate progress for each enrollment
-        for enrollment in context['enrollments']:
-            try:
-                progress = CourseProgress.objects.get(enrollment=enrollment)
-                total_lessons = Lesson.objects.filter(module__course=enrollment.course).count()
-                
-                if total_lessons > 0:
-                    completed_lessons = LessonProgress.objects.filter(
-                        course_progress=progress,
-                        is_completed=True
-                    ).count()
-                    
-                    enrollment.progress_percentage = int((completed_lessons / total_lessons) * 100)
-                else:
-                    enrollment.progress_percentage = 0
-                    
-                enrollment.is_completed = progress.is_completed
-            except CourseProgress.DoesNotExist:
-                enrollment.progress_percentage = 0
-                enrollment.is_completed = False
+        # Calculate progress for all enrollments on the page at once
+        enrollments = list(context['enrollments'])
+        progress = ProgressService(self.request.user).summarize(
+            [enrollment.course_id for enrollment in enrollments]
+        )
+        for enrollment in enrollments:
+            enrollment.progress_percentage = progress[enrollment.course_id]['percent']
+            enrollment.is_completed = progress[enrollment.course_id]['completed']
         
         # Get inactive enrollments
         context['inactive_enrollments'] = Enrollment.objects.filter(
-            user=self.request.user,
-            is_active=False
-        ).order_by('-enrolled_at')
+            student=self.request.user,
+            status='dropped'
+        ).select_related('course').order_by('-enrolled_at')
         
         return context
 
 
 class UserWishlistView(LoginRequiredMixin, ListView):
-    model = CourseWishlist
     template_name = 'courses/user_wishlist.html'
     context_object_name = 'wishlist_items'
     paginate_by = 10
     
     def get_queryset(self):
-        return CourseWishlist.objects.filter(user=self.request.user).order_by('-added_at')
+        return CourseWishlist.objects.filter(user=self.request.user).select_related('course').order_by('-added_at')
     
     def post(self, request):
         action = request.POST.get('action')
@@ -627,13 +600,19 @@ class UserWishlistView(LoginRequiredMixin, ListView):
         if action and course_id:
             course = get_object_or_404(Course, id=course_id)
             
-            if action == 'remove':
+            if action == 'add':
+                CourseWishlist.objects.get_or_create(user=request.user, course=course)
+                
+                messages.success(request, f"'{course.title}' has been added to your wishlist.")
+            elif action == 'remove':
                 CourseWishlist.objects.filter(
                     user=request.user,
                     course=course
                 ).delete()
                 
                 messages.success(request, f"'{course.title}' has been removed from your wishlist.")
+            elif action == 'enroll' and course.status != 'published':
+                messages.error(request, f"'{course.title}' is not open for enrollment.")
             elif action == 'enroll':
                 # Remove from wishlist
                 CourseWishlist.objects.filter(
@@ -642,21 +621,7 @@ class UserWishlistView(LoginRequiredMixin, ListView):
                 ).delete()
                 
                 # Enroll in course
-                enrollment, created = Enrollment.objects.get_or_create(
-                    course=course,
-                    user=request.user,
-                    defaults={'is_active': True}
-                )
-                
-                if not created and not enrollment.is_active:
-                    enrollment.is_active = True
-                    enrollment.save()
-                    messages.success(request, f"Welcome back to '{course.title}'! Your enrollment has been reactivated.")
-                elif created:
-                    CourseProgress.objects.create(enrollment=enrollment)
-                    messages.success(request, f"You have successfully enrolled in '{course.title}'.")
-                else:
-                    messages.info(request, f"You are already enrolled in '{course.title}'.")
+                enroll(request, course)
         
         return HttpResponseRedirect(reverse('courses:wishlist'))
 
@@ -668,35 +633,5 @@ class RecommendedCoursesView(LoginRequiredMixin, ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        user = self.request.user
-        
-        # Get user's enrolled courses
-        enrolled_courses = Course.objects.filter(
-            enrollment__user=user,
-            enrollment__is_active=True
-        )
-        
-        # Get categories and tags from enrolled courses
-        categories = enrolled_courses.values_list('category', flat=True).distinct()
-        tags = enrolled_courses.values_list('tags', flat=True).distinct()
-        
-        # Get recommended courses based on categories and tags
-        recommended = Course.objects.filter(
-            Q(category__in=categories) | Q(tags__in=tags),
-            is_published=True
-        ).exclude(
-            id__in=enrolled_courses.values_list('id', flat=True)
-        ).distinct()
-        
-        # If user has no enrolled courses or no recommendations based on categories/tags,
-        # show popular courses based on enrollment count
-        if not recommended.exists():
-            recommended = Course.objects.filter(
-                is_published=True
-            ).exclude(
-                id__in=enrolled_courses.values_list('id', flat=True)
-            ).annotate(
-                enrollment_count=Count('enrollment')
-            ).order_by('-enrollment_count')
-        
-        return recommended
+        # Ranked from precomputed course similarities, popular courses for new students
+        return recommended_courses(self.request.user)
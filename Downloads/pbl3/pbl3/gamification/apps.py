@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class GamificationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gamification'
+
+    def ready(self):
+        from utils.images import register_image_field
+        from .models import Badge
+
+        register_image_field(Badge, 'icon')
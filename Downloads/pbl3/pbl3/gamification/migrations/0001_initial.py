@@ -0,0 +1,135 @@
+# Generated by Django 5.2 on 2026-10-18 23:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('courses', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Badge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('icon', models.ImageField(upload_to='badges/')),
+                ('category', models.CharField(choices=[('completion', 'Course Completion'), ('skill', 'Skill Mastery'), ('engagement', 'Platform Engagement'), ('social', 'Social Contribution'), ('special', 'Special Achievement')], max_length=20)),
+                ('rarity', models.CharField(choices=[('common', 'Common'), ('uncommon', 'Uncommon'), ('rare', 'Rare'), ('epic', 'Epic'), ('legendary', 'Legendary')], default='common', max_length=10)),
+                ('experience_points', models.PositiveIntegerField(default=0)),
+                ('is_hidden', models.BooleanField(default=False, help_text='Hidden badges are secret achievements')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['category', 'rarity'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Achievement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('requirement_type', models.CharField(help_text='Type of action required', max_length=50)),
+                ('requirement_value', models.PositiveIntegerField(help_text='Value to reach for the achievement')),
+                ('series_name', models.CharField(blank=True, max_length=100)),
+                ('tier', models.PositiveSmallIntegerField(default=1)),
+                ('show_progress', models.BooleanField(default=True)),
+                ('badge', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='achievement', to='gamification.badge')),
+            ],
+            options={
+                'ordering': ['series_name', 'tier'],
+                'unique_together': {('series_name', 'tier')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Leaderboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('leaderboard_type', models.CharField(choices=[('xp', 'Experience Points'), ('course_completions', 'Course Completions'), ('streak', 'Daily Streak'), ('badges', 'Badges Earned'), ('quiz_scores', 'Quiz Scores'), ('custom', 'Custom Score')], default='xp', max_length=20)),
+                ('timeframe', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly'), ('all_time', 'All Time')], default='weekly', max_length=10)),
+                ('is_global', models.BooleanField(default=True, help_text='If false, only for a specific course or group')),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('last_reset', models.DateTimeField(auto_now_add=True)),
+                ('next_reset', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='courses.course')),
+            ],
+            options={
+                'ordering': ['-is_featured', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PointTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(help_text='Positive for earned, negative for spent')),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('source', models.CharField(help_text='Where the points came from or went to', max_length=100)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('content_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='point_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Streak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_activity_date', models.DateField(default=django.utils.timezone.now)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='streak_record', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Streaks',
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('previous_score', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('previous_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('leaderboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='gamification.leaderboard')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score'],
+                'unique_together': {('leaderboard', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAchievementProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_value', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('completed', models.BooleanField(default=False)),
+                ('completion_date', models.DateTimeField(blank=True, null=True)),
+                ('achievement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gamification.achievement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='achievement_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'achievement')},
+            },
+        ),
+    ]
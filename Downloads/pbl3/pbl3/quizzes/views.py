@@ -7,6 +7,7 @@ from django.contrib import messages
 from django.db.models import Avg, Count, Q, Sum, Max
 
 from courses.models import Course, Module
+from utils.pagination import KeysetPaginationMixin
 from .models import (
     Quiz, Question, Answer, QuizAttempt, QuestionResponse,
     QuestionFeedback, PracticeSession, QuizTopic
@@ -465,11 +466,12 @@ class QuizResultsView(LoginRequiredMixin, DetailView):
         return context
 
 
-class UserQuizHistoryView(LoginRequiredMixin, ListView):
+class UserQuizHistoryView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = QuizAttempt
     template_name = 'quizzes/user_quiz_history.html'
     context_object_name = 'attempts'
     paginate_by = 10
+    keyset_ordering = ('-started_at', '-id')
     
     def get_queryset(self):
         return QuizAttempt.objects.filter(
@@ -480,20 +482,25 @@ class UserQuizHistoryView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Calculate overall statistics
-        context['total_attempts'] = context['attempts'].count()
-        context['passed_quizzes'] = context['attempts'].filter(is_passed=True).count()
+        # Calculate overall statistics over all attempts, not just this page, in one query
+        stats = self.object_list.aggregate(
+            total_attempts=Count('id'),
+            passed_quizzes=Count('id', filter=Q(is_passed=True)),
+            avg_score=Avg('score'),
+            unique_quizzes=Count('quiz', distinct=True)
+        )
+        context['total_attempts'] = stats['total_attempts']
+        context['passed_quizzes'] = stats['passed_quizzes']
         
         if context['total_attempts'] > 0:
             context['pass_rate'] = (context['passed_quizzes'] / context['total_attempts']) * 100
-            context['avg_score'] = context['attempts'].aggregate(Avg('score'))['score__avg']
+            context['avg_score'] = stats['avg_score']
         else:
             context['pass_rate'] = 0
             context['avg_score'] = 0
             
         # Group by quiz for unique quiz counts
-        unique_quizzes = context['attempts'].values('quiz').distinct().count()
-        context['unique_quizzes'] = unique_quizzes
+        context['unique_quizzes'] = stats['unique_quizzes']
         
         return context
 
@@ -15,6 +15,26 @@ SECRET_KEY = 'django-insecure-9d*1ivb^y$g%n2@o-p+wc=#f4p(b!=#%v_dg6^@)!t(&7gzjm=
 # Default development API key for testing purposes
 # IMPORTANT: In production, use environment variables instead
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'sk-demo-development-key-for-testing-only')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+
+# AI Tutor completion providers, tried in order of EWMA health (latency and error rate).
+# Any OpenAI-compatible server works, e.g. a small on-box model behind llama.cpp or Ollama:
+#   {'name': 'onbox', 'model': 'llama3.2:3b', 'base_url': 'http://127.0.0.1:11434/v1', 'timeout': 30}
+# When unset, a single OpenAI provider is built from OPENAI_API_KEY / OPENAI_MODEL.
+# The built-in response engine always remains the final, local fallback.
+AI_TUTOR_PROVIDERS = None
+AI_TUTOR_REQUEST_DEADLINE = 20  # seconds a chat request may spend across provider retries
+AI_TUTOR_PROVIDER_EWMA_ALPHA = 0.2
+AI_TUTOR_PROVIDER_ERROR_PENALTY = 10  # latency multiplier per unit of error rate
+AI_TUTOR_PROVIDER_COOLDOWN = 30  # seconds a mostly-failing provider is rested
+AI_TUTOR_PROVIDER_EXPLORE = 0.05  # share of requests that probe a non-best provider
+
+# USD per 1K tokens as (prompt, completion), used for AI Tutor usage cost reports
+OPENAI_PRICING = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-4o': (0.0025, 0.01),
+}
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -45,6 +65,11 @@ INSTALLED_APPS = [
     # Our custom apps
     'users.apps.UsersConfig',
     'ai_tutor.apps.AiTutorConfig',  # AI Tutor app
+    'courses.apps.CoursesConfig',
+    'quizzes.apps.QuizzesConfig',  # lessons link to quizzes, quizzes are tagged with course tags
+    'chat.apps.ChatConfig',
+    'certificates.apps.CertificatesConfig',
+    'gamification.apps.GamificationConfig',
 ]
 
 MIDDLEWARE = [
@@ -71,6 +96,9 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                'responsive_images': 'utils.templatetags.responsive_images',
+            },
         },
     },
 ]
@@ -135,8 +163,95 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Cache: shared Redis in production. Without REDIS_URL each process gets its own
+# local-memory cache, and the cross-worker caches (tutor history, taxonomy, course
+# outlines) fall back to the database. Catalog facets are kept per process and
+# rebuilt every COURSES_FACETS_LOCAL_MAX_AGE seconds instead.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Demo mode - simplified configuration
 DEMO_MODE = True
+
+# AI Tutor deferred batch generation
+AI_TUTOR_BATCH_SIZE = int(os.getenv('AI_TUTOR_BATCH_SIZE', '50'))
+AI_TUTOR_BATCH_MAX_ATTEMPTS = 3
+AI_TUTOR_BATCH_CLAIM_TIMEOUT = 60 * 60  # seconds before jobs of an interrupted submission are queued again
+
+# AI Tutor practice-problem judge
+AI_TUTOR_JUDGE_WORKERS = None  # defaults to the number of CPUs
+AI_TUTOR_JUDGE_UID = None  # unprivileged UID for sandbox processes (required unless isolated)
+AI_TUTOR_JUDGE_ISOLATED = False  # True only when the web process runs in a disposable container
+AI_TUTOR_JUDGE_SUBMISSION_TIMEOUT = 60  # seconds a submission may wait for pool workers
+AI_TUTOR_JUDGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# AI Tutor pre-generated practice problem inventory
+AI_TUTOR_INVENTORY_TARGET = 10  # ready problems kept per (topic, difficulty)
+AI_TUTOR_INVENTORY_LOW_WATER = 3  # a claim below this queues a refill
+AI_TUTOR_INVENTORY_BUCKETS = None  # [(topic, difficulty), ...]; defaults to catalog topics
+
+# AI Tutor speculative follow-up prefetch
+AI_TUTOR_PREFETCH_ENABLED = True
+AI_TUTOR_PREFETCH_WORKERS = 1
+AI_TUTOR_PREFETCH_MAX_PENDING = 20  # queued prefetches per process before new ones are skipped
+AI_TUTOR_PREFETCH_DAILY_TOKENS = int(os.getenv('AI_TUTOR_PREFETCH_DAILY_TOKENS', '200000'))
+AI_TUTOR_PREFETCH_TIMEOUT = 60 * 15  # seconds a prefetched answer is kept
+AI_TUTOR_PREFETCH_TOKEN_RESERVE = 2000  # tokens reserved from the daily budget while a prefetch runs
+
+# AI Tutor hot conversation history cache. It needs the shared cache (REDIS_URL):
+# with the per-process default it is bypassed, every prompt reads its history from
+# MongoDB, and a warning is logged at startup when DEBUG is off.
+AI_TUTOR_HISTORY_CACHE_MESSAGES = 10  # recent messages kept per session
+AI_TUTOR_HISTORY_CACHE_TIMEOUT = 60 * 60 * 2
+AI_TUTOR_HISTORY_LRU_SIZE = 1000  # sessions kept in each worker's memory
+
+# AI Tutor lesson retrieval
+AI_TUTOR_RETRIEVAL_TOP_K = 3  # passages sent to the model as context
+AI_TUTOR_RETRIEVAL_MIN_COVERAGE = 0.85  # share of the question a passage must match to answer locally
+AI_TUTOR_RETRIEVAL_MIN_SCORE = 5.0  # minimum BM25 score to answer locally
+AI_TUTOR_RETRIEVAL_CONTEXT_COVERAGE = 0.3  # minimum match for a passage to be sent as context
+
+# AI Tutor learning pattern counters
+AI_TUTOR_PATTERN_FLUSH_INTERVAL = 5  # seconds between coalesced bulk writes
+AI_TUTOR_PATTERN_MAX_PENDING = 500  # buffered counters that force an early flush
+
+# AI Tutor topic classifier
+AI_TUTOR_CLASSIFIER_PATH = os.path.join(BASE_DIR, 'var', 'topic_classifier.pkl')
+AI_TUTOR_CLASSIFIER_MIN_EXAMPLES = 20  # questions a topic needs to be learned
+AI_TUTOR_CLASSIFIER_MIN_CONFIDENCE = 0.6  # below this a question stays untagged
+
+# Course recommendations
+COURSES_SIMILAR_TOP_K = 20  # similar courses stored per course
+COURSES_SIMILAR_MIN_COMMON = 2  # shared students needed before two courses count as similar
+COURSES_POPULAR_CACHE_TIMEOUT = 60 * 60  # cold-start popularity list
+COURSES_RELATED_TOP_N = 8  # related courses stored per course for the detail page
+COURSES_FACETS_LOCAL_MAX_AGE = 60  # with a per-process cache, seconds before other processes' course changes show in facet counts
+
+# List pagination
+PAGINATION_COUNT_MAX_AGE = 60 * 5  # seconds before a cached list count is refreshed in the background
+
+# Lesson time tracking
+COURSES_HEARTBEAT_MAX_SECONDS = 300  # most time one beacon batch can add to a lesson
+COURSES_HEARTBEAT_FLUSH_INTERVAL = 30  # seconds between coalesced time writes
+COURSES_HEARTBEAT_MAX_PENDING = 1000  # buffered counters that force an early flush
+
+# Responsive image derivatives
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)  # widths rendered for srcset (never upscaled)
+IMAGE_DERIVATIVE_QUALITY = 80  # WebP / JPEG quality
+IMAGE_DERIVATIVE_WORKERS = 2  # rendering processes
+IMAGE_DERIVATIVE_CACHE_MAX_AGE = 60 * 60 * 24 * 365  # derivatives have content-hash names
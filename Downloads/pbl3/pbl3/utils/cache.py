@@ -0,0 +1,22 @@
+"""
+Cache helpers.
+Several caches (tutor history, catalog facets, taxonomy, course outlines) keep
+worker-local copies in step through version numbers in the Django cache. That
+only works when every worker sees the same cache, so they check
+cache_is_shared() and go to the database instead when it is per-process (or,
+for the facet index, rebuild their copy when it is too old).
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared(alias='default'):
+    """
+    Whether a cache is shared by all worker processes.
+
+    Returns:
+        bool: False for the local-memory and dummy backends
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
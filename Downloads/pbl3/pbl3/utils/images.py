@@ -0,0 +1,257 @@
+"""
+Responsive image derivatives for uploaded images.
+When an image is uploaded to a registered field, resized WebP and JPEG copies
+are rendered with Pillow in a process pool and stored under content-hash names
+(derivatives/<hash>-<width>w.<ext>). Such a name never changes meaning, so the
+files can be served with long-lived immutable cache headers and are shared by
+identical uploads. A small JSON manifest per source image records the
+derivatives; templates read it (through the cache) to emit srcset.
+
+Models opt in from their app's ready() with register_image_field(). Until the
+derivatives exist, pages fall back to the original image.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Try to import Pillow, handle gracefully if not available
+try:
+    from PIL import Image, ImageOps
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_DIR = 'derivatives'
+MANIFEST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Image fields that get derivatives: (model, field name, condition)
+_registry = []
+
+# Rendering pool with lazy initialization
+_executor = None
+
+
+def get_image_executor():
+    """
+    Get the rendering process pool, creating it on first use.
+
+    Worker processes are spawned rather than forked, so they do not inherit the
+    web worker's threads and database connections.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    return _executor
+
+
+def _render(data, widths, quality):
+    """
+    Render the derivatives of an image (runs in a pool process).
+
+    Args:
+        data (bytes): The original image
+        widths (list): Target widths; wider than the original are skipped
+        quality (int): WebP / JPEG quality
+
+    Returns:
+        dict: 'width' and 'height' of the original, and 'images', a list of
+            (format, width, bytes)
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    width, height = image.size
+    targets = sorted({target for target in widths if target < width}) + [width]
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    images = []
+    for target in targets:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        output = io.BytesIO()
+        resized.save(output, 'WEBP', quality=quality, method=4)
+        images.append(('webp', target, output.getvalue()))
+
+        # JPEG has no alpha channel: flatten onto white
+        if resized.mode == 'RGBA':
+            flat = Image.new('RGB', resized.size, (255, 255, 255))
+            flat.paste(resized, mask=resized.getchannel('A'))
+            resized = flat
+        output = io.BytesIO()
+        resized.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+        images.append(('jpeg', target, output.getvalue()))
+
+    return {'width': width, 'height': height, 'images': images}
+
+
+def _source_key(name):
+    return hashlib.sha1(name.encode('utf-8')).hexdigest()
+
+
+def _manifest_name(name):
+    return f"{DERIVATIVE_DIR}/manifests/{_source_key(name)}.json"
+
+
+def _cache_key(name):
+    return f"images:manifest:{_source_key(name)}"
+
+
+def get_manifest(field_file):
+    """
+    Derivatives of an uploaded image.
+
+    Args:
+        field_file (FieldFile): The image field value
+
+    Returns:
+        dict or None: {'width', 'height', 'webp': [[width, url], ...], 'jpeg': [...]}
+            with derivatives narrowest first, or None if none exist yet
+    """
+    if not field_file:
+        return None
+
+    key = _cache_key(field_file.name)
+    manifest = cache.get(key)
+    if manifest is None:
+        try:
+            with default_storage.open(_manifest_name(field_file.name)) as stored:
+                manifest = json.loads(stored.read().decode('utf-8'))
+        except (OSError, ValueError):
+            manifest = {}
+        # Missing manifests are cached briefly so pages do not probe storage on every render
+        cache.set(key, manifest, MANIFEST_CACHE_TIMEOUT if manifest else 60)
+    if not manifest:
+        return None
+
+    return {
+        'width': manifest['width'],
+        'height': manifest['height'],
+        **{
+            format: [[width, default_storage.url(name)] for width, name in manifest['derivatives'].get(format, [])]
+            for format in ('webp', 'jpeg')
+        }
+    }
+
+
+def _store(name, digest, rendered):
+    """Save rendered derivatives and the manifest of source image `name`."""
+    derivatives = {'webp': [], 'jpeg': []}
+    for format, width, data in rendered['images']:
+        extension = 'jpg' if format == 'jpeg' else format
+        derivative = f"{DERIVATIVE_DIR}/{digest[:2]}/{digest[:16]}-{width}w.{extension}"
+        # Content-hash names: an existing file already holds these bytes
+        if not default_storage.exists(derivative):
+            default_storage.save(derivative, ContentFile(data))
+        derivatives[format].append([width, derivative])
+
+    manifest = {
+        'source': name,
+        'hash': digest,
+        'width': rendered['width'],
+        'height': rendered['height'],
+        'derivatives': derivatives,
+    }
+    manifest_name = _manifest_name(name)
+    if default_storage.exists(manifest_name):
+        default_storage.delete(manifest_name)
+    default_storage.save(manifest_name, ContentFile(json.dumps(manifest).encode('utf-8')))
+    cache.set(_cache_key(name), manifest, MANIFEST_CACHE_TIMEOUT)
+    logger.info(f"Stored {len(rendered['images'])} derivative(s) of {name}")
+
+
+def generate_derivatives(field_file, wait=False):
+    """
+    Render and store the derivatives of an uploaded image in the process pool.
+
+    Args:
+        field_file (FieldFile): The image field value
+        wait (bool): Block until the derivatives are stored (e.g. in management commands)
+
+    Returns:
+        bool: True if rendering was started (or, with wait, completed)
+    """
+    if not PILLOW_AVAILABLE or not field_file:
+        return False
+
+    name = field_file.name
+    try:
+        with field_file.storage.open(name) as source:
+            data = source.read()
+    except OSError as e:
+        logger.warning(f"Could not read image {name}: {str(e)}")
+        return False
+
+    digest = hashlib.sha256(data).hexdigest()
+    widths = list(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 1280)))
+    quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+
+    try:
+        future = get_image_executor().submit(_render, data, widths, quality)
+    except RuntimeError as e:
+        logger.warning(f"Could not queue derivatives of {name}: {str(e)}")
+        return False
+
+    def store(done):
+        try:
+            _store(name, digest, done.result())
+        except Exception as e:
+            logger.error(f"Error generating derivatives of {name}: {str(e)}")
+
+    if wait:
+        store(future)
+        return future.exception() is None
+    future.add_done_callback(store)
+    return True
+
+
+def register_image_field(model, field_name, condition=None):
+    """
+    Generate derivatives whenever a new image is saved to a model field.
+
+    Args:
+        model (Model): The model class
+        field_name (str): Name of the ImageField / FileField
+        condition (callable, optional): Called with the instance; derivatives are
+            only made when it returns True (e.g. for attachments that are images)
+    """
+    def schedule(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        if not field_file or (condition is not None and not condition(instance)):
+            return
+        # Storage names are unique per upload, so an existing manifest means nothing changed
+        if cache.get(_cache_key(field_file.name)) or default_storage.exists(_manifest_name(field_file.name)):
+            return
+        transaction.on_commit(lambda: generate_derivatives(field_file))
+
+    _registry.append((model, field_name, condition))
+    post_save.connect(schedule, sender=model, weak=False, dispatch_uid=f"image-derivatives:{model._meta.label}:{field_name}")
+
+
+def registered_image_fields():
+    """The (model, field name, condition) triples passed to register_image_field()."""
+    return list(_registry)
@@ -0,0 +1,254 @@
+"""
+Keyset pagination for Django list views.
+KeysetPaginationMixin replaces ListView's OFFSET paging: a page is fetched with
+a WHERE clause on the ordering columns of the row at the page boundary, carried
+in an opaque cursor token, so deep pages cost the same as the first one.
+
+Total counts are approximate: each distinct query's COUNT(*) is cached, and a
+stale count is served while a background worker refreshes it, so page views do
+not run COUNT(*) in steady state.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Background count refresher with lazy initialization
+_executor = None
+
+
+def get_count_executor():
+    """
+    Get the count refresh pool, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: The shared pool
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='approximate-count')
+
+    return _executor
+
+
+def _count_key(queryset):
+    """Cache key of a queryset's count, or None for a query that matches nothing."""
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(f"{sql}|{params!r}".encode('utf-8')).hexdigest()
+    return f"pagination:count:{queryset.model._meta.label_lower}:{digest}"
+
+
+def _refresh_count(key, queryset):
+    try:
+        cache.set(key, {'count': queryset.count(), 'at': time.time()}, None)
+    except Exception as e:
+        logger.warning(f"Could not refresh approximate count {key}: {str(e)}")
+    finally:
+        cache.delete(f"{key}:refreshing")
+        # Worker threads keep their own database connections - do not leak them
+        connections.close_all()
+
+
+def approximate_count(queryset):
+    """
+    Row count of a queryset, from the cache.
+
+    The first request for a query counts synchronously; afterwards a count older
+    than PAGINATION_COUNT_MAX_AGE is returned as is and refreshed in the background.
+
+    Returns:
+        int: The (possibly slightly stale) count
+    """
+    key = _count_key(queryset)
+    if key is None:
+        return 0
+
+    cached = cache.get(key)
+    if cached is None:
+        count = queryset.count()
+        cache.set(key, {'count': count, 'at': time.time()}, None)
+        return count
+
+    max_age = getattr(settings, 'PAGINATION_COUNT_MAX_AGE', 60 * 5)
+    # Only one refresh per key at a time, across workers
+    if time.time() - cached['at'] > max_age and cache.add(f"{key}:refreshing", True, 60):
+        try:
+            get_count_executor().submit(_refresh_count, key, queryset.all())
+        except RuntimeError as e:
+            cache.delete(f"{key}:refreshing")
+            logger.warning(f"Could not queue count refresh: {str(e)}")
+    return cached['count']
+
+
+def encode_cursor(values, direction):
+    """Opaque cursor for the ordering values of a boundary row; direction is 'next' or 'previous'."""
+    raw = json.dumps([direction, values], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor.
+
+    Returns:
+        tuple: (direction, values)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        direction, values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if direction not in ('next', 'previous') or not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return direction, values
+
+
+class KeysetPaginator:
+    """Minimal paginator for templates: approximate count and page size."""
+
+    def __init__(self, count, per_page):
+        self.count = count
+        self.per_page = per_page
+
+    @property
+    def num_pages(self):
+        return max(1, -(-self.count // self.per_page))
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated list.
+
+    Attributes:
+        object_list (list): Rows of the page
+        next_cursor / previous_cursor (str or None): Cursors of the neighbouring pages
+    """
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset pagination for ListView subclasses.
+
+    keyset_ordering lists the ordering columns, ending with a unique one (such as
+    'id') so the order is total. The columns must be non-null fields of the model.
+    Pages are selected with ?cursor=<token>; templates get page_obj.next_cursor
+    and page_obj.previous_cursor, and paginator.count is approximate.
+
+    Views return None from get_keyset_ordering() to fall back to OFFSET paging,
+    e.g. for relevance-ranked search results.
+    """
+
+    keyset_ordering = ('-id',)
+    cursor_kwarg = 'cursor'
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def _keyset_filter(self, ordering, values, forward):
+        """Rows after (forward) or before the row with `values` in `ordering`."""
+        condition = Q()
+        for index, column in enumerate(ordering):
+            name = column.lstrip('-')
+            descending = column.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            clause = Q(**{f"{name}__{lookup}": values[index]})
+            for previous, value in zip(ordering[:index], values):
+                clause &= Q(**{previous.lstrip('-'): value})
+            condition |= clause
+        return condition
+
+    def _decode_values(self, ordering, values):
+        """Cursor values converted back to the ordering columns' Python types."""
+        if len(values) != len(ordering):
+            raise ValueError("Cursor does not match the ordering")
+        model = self.model or self.get_queryset().model
+        try:
+            return [model._meta.get_field(column.lstrip('-')).to_python(value) for column, value in zip(ordering, values)]
+        except ValidationError:
+            raise ValueError("Malformed cursor")
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_keyset_ordering()
+        if not ordering:
+            return super().paginate_queryset(queryset, page_size)
+
+        direction, values = 'next', None
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if cursor:
+            try:
+                direction, raw_values = decode_cursor(cursor)
+                values = self._decode_values(ordering, raw_values)
+            except ValueError:
+                raise Http404("Invalid page cursor")
+
+        forward = direction == 'next'
+        count = approximate_count(queryset)
+        if forward:
+            page_queryset = queryset.order_by(*ordering)
+        else:
+            page_queryset = queryset.order_by(*[
+                column[1:] if column.startswith('-') else f"-{column}" for column in ordering
+            ])
+        if values is not None:
+            page_queryset = page_queryset.filter(self._keyset_filter(ordering, values, forward))
+
+        # One extra row tells whether there is another page in this direction
+        rows = list(page_queryset[:page_size + 1])
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if not forward:
+            rows.reverse()
+
+        def boundary(row):
+            return [getattr(row, column.lstrip('-')) for column in ordering]
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if more or not forward:
+                next_cursor = encode_cursor(boundary(rows[-1]), 'next')
+            if values is not None and (forward or more):
+                previous_cursor = encode_cursor(boundary(rows[0]), 'previous')
+
+        paginator = KeysetPaginator(count, page_size)
+        page = KeysetPage(rows, paginator, next_cursor, previous_cursor)
+        return paginator, page, rows, page.has_other_pages()
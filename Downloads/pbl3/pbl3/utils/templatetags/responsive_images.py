@@ -0,0 +1,44 @@
+"""
+Template tags for responsive images.
+
+    {% load responsive_images %}
+    {% responsive_image course.thumbnail alt=course.title sizes="(max-width: 768px) 100vw, 33vw" %}
+"""
+
+from django import template
+from django.utils.html import format_html
+
+from utils.images import get_manifest
+
+register = template.Library()
+
+
+def _srcset(entries):
+    return ', '.join(f"{url} {width}w" for width, url in entries)
+
+
+@register.simple_tag
+def responsive_image(field_file, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """
+    A <picture> with WebP and JPEG srcsets of an uploaded image, or a plain
+    <img> of the original while its derivatives do not exist yet.
+    """
+    if not field_file:
+        return ''
+
+    manifest = get_manifest(field_file)
+    if manifest is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}">',
+            field_file.url, alt, css_class, loading
+        )
+
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" loading="{}" decoding="async">'
+        '</picture>',
+        _srcset(manifest['webp']), sizes,
+        manifest['jpeg'][-1][1], _srcset(manifest['jpeg']), sizes,
+        manifest['width'], manifest['height'], alt, css_class, loading
+    )